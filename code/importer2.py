@@ -14,6 +14,7 @@ from random import randint
 
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from lms_core.models import Comment, Course, CourseContent, CourseMember
 
 start_time = time.time()
@@ -83,6 +84,8 @@ with open(filepath + "contents.json") as jsonfile:
                 )
             )
     CourseContent.objects.bulk_create(obj_create)
+    # bulk_create bypasses CourseContent.save(), so fill in the paths here
+    call_command("rebuild_content_paths")
 
 with open(filepath + "comments.json") as jsonfile:
     comments = json.load(jsonfile)
@@ -4,7 +4,7 @@ from lms_core.models import Course
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ["name", "price", "description", "teacher", 'created_at']
-    list_filter = ["teacher"]
+    list_filter = ["teacher", "is_archived"]
     search_fields = ["name", "description"]
     readonly_fields = ["created_at", "updated_at"]
-    fields = ["name", "description", "price", "image", "teacher", "created_at", "updated_at"]
\ No newline at end of file
+    fields = ["name", "description", "price", "image", "teacher", "is_archived", "created_at", "updated_at"]
\ No newline at end of file
@@ -1,39 +1,106 @@
 from datetime import timedelta
 
 import jwt
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.db.models import Count, F, Q
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from lms_core.caching import (
+    build_content_tree,
+    get_content_tree,
+    get_course_payloads,
+    get_user_memberships,
+    get_visible_content_ids,
+    invalidate_user_memberships,
+    visible_content_tree,
+)
+from lms_core.conditional import (
+    conditional_response,
+    instance_validators,
+    payload_validators,
+)
+from lms_core.moderation import get_comment_screener, moderation_fields
 from lms_core.models import (
+    NOTIFICATION_TYPES,
     Bookmark,
     Comment,
     CompletionTracking,
     Course,
     CourseContent,
     CourseMember,
+    DiscussionReply,
+    DiscussionThread,
+    ForumActivity,
+    ForumStats,
+    Notification,
+    NotificationCounter,
+)
+from lms_core.notifications import (
+    mark_all_read,
+    notify_course,
+    wait_for_notifications,
 )
+from lms_core.pagination import InvalidCursor, keyset_page, thread_page
+from lms_core.realtime import (
+    LONG_POLL_SECONDS,
+    course_channel,
+    event_stream,
+    thread_channel,
+    user_channel,
+)
+from lms_core.renderers import NegotiatingNinjaAPI
 from lms_core.schema import (
     BatchEnrollIn,
     BookmarkListOut,
+    CommentIn,
+    CommentListOut,
+    CommentModerationIn,
+    CommentModerationOut,
+    CommentOut,
     CompletionProgressOut,
+    ContentBreadcrumbOut,
+    ContentMoveIn,
+    ContentSubtreeOut,
     CourseAnalytics,
+    CourseCatalogOut,
+    CourseContentNodeOut,
     CourseContentScheduleIn,
+    CourseMemberOut,
+    CourseSchemaOut,
+    DiscussionReplyIn,
+    DiscussionReplyOut,
+    DiscussionThreadDetailOut,
+    DiscussionThreadIn,
+    DiscussionThreadListOut,
+    DiscussionThreadOut,
+    ForumStatsOut,
+    NotificationIn,
+    NotificationOut,
+    NotificationStatsOut,
+    SearchFacetsOut,
+    SearchFilters,
+    SearchResultsOut,
     SuccessResponse,
+    SuggestionOut,
     UserActivityDashboard,
     UserOut,
     UserProfileOut,
     UserProfileUpdateIn,
     UserRegisterIn,
 )
-from ninja import NinjaAPI
+from lms_core.search import search, search_facets
+from lms_core.search.facets import loaded_facet_index
+from lms_core.search.suggest import get_suggest_index, loaded_suggest_index
+from ninja import Query
 from ninja.responses import Response
 from ninja_simple_jwt.auth.ninja_auth import HttpJwtAuth
 from ninja_simple_jwt.auth.views.api import mobile_auth_router
 
-apiv1 = NinjaAPI()
+apiv1 = NegotiatingNinjaAPI()
 apiv1.add_router("/auth/", mobile_auth_router)
 apiAuth = HttpJwtAuth()
 
@@ -284,6 +351,14 @@ def batch_enroll_students(request, course_id: int, enrollment_data: BatchEnrollI
         ]
 
         CourseMember.objects.bulk_create(memberships)
+        # bulk_create skips post_save, so the membership caches are dropped here
+        invalidate_user_memberships(*students_to_enroll)
+        facets = loaded_facet_index()
+        if facets:
+            facets.set_available(course.id, not course.is_enrollment_full())
+        suggestions = loaded_suggest_index()
+        if suggestions:
+            suggestions.add_enrollments(course.id, len(students_to_enroll))
         return {"message": f"Successfully enrolled {len(students_to_enroll)} students"}
     except Course.DoesNotExist:
         return Response({"error": "Course not found"}, status=404)
@@ -324,13 +399,243 @@ def get_course_analytics(request, course_id: int):
         return Response({"error": "Course not found"}, status=404)
 
 
+# FITUR 12: COURSE DETAIL & CONTENT LISTING (conditional GET)
+@apiv1.get("/courses", response=CourseCatalogOut)
+def list_course_catalog(
+    request,
+    cursor: str = None,
+    limit: int = 20,
+    include_teacher: bool = False,
+):
+    """Course catalog paged by an opaque (created_at, id) keyset cursor"""
+    limit = max(1, min(limit, 100))
+    courses = Course.objects.all()
+    if include_teacher:
+        courses = courses.select_related("teacher")
+
+    try:
+        page, next_cursor = keyset_page(courses, cursor, limit)
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=400)
+
+    course_list = []
+    for course in page:
+        course_list.append(
+            {
+                "id": course.id,
+                "name": course.name,
+                "description": course.description,
+                "price": course.price,
+                "image": course.image.url if course.image else None,
+                "teacher": (
+                    {
+                        "id": course.teacher.id,
+                        "email": course.teacher.email,
+                        "first_name": course.teacher.first_name,
+                        "last_name": course.teacher.last_name,
+                    }
+                    if include_teacher
+                    else None
+                ),
+                "max_students": course.max_students,
+                "created_at": course.created_at,
+                "updated_at": course.updated_at,
+            }
+        )
+
+    return {"courses": course_list, "next_cursor": next_cursor}
+
+
+@apiv1.get("/courses/{course_id}", response=CourseSchemaOut)
+def get_course_detail(request, course_id: int, response: HttpResponse):
+    """Get course detail, answering 304 when the client's copy is current"""
+    not_modified = conditional_response(
+        request, response, *instance_validators(Course, course_id)
+    )
+    if not_modified:
+        return not_modified
+
+    payload = get_course_payloads([course_id]).get(course_id)
+    if payload is None:
+        return Response({"error": "Course not found"}, status=404)
+    return payload
+
+
+@apiv1.get("/mycourses", response=list[CourseMemberOut], auth=apiAuth)
+def list_my_courses(request):
+    """List current user's courses from the membership and course caches"""
+    user = request.user
+    memberships = get_user_memberships(user.id)
+    payloads = get_course_payloads([course_id for _, course_id, _ in memberships])
+    user_payload = {
+        "id": user.id,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+
+    return [
+        {
+            "id": member_id,
+            "course_id": payloads[course_id],
+            "user_id": user_payload,
+            "roles": roles,
+        }
+        for member_id, course_id, roles in memberships
+        if course_id in payloads
+    ]
+
+
+@apiv1.get(
+    "/courses/{course_id}/contents",
+    response=list[CourseContentNodeOut],
+    auth=apiAuth,
+)
+def list_course_contents(request, course_id: int, response: HttpResponse):
+    """List course contents as a nested tree, answering 304 when unchanged"""
+    course = (
+        Course.objects.filter(id=course_id).values("teacher_id", "updated_at").first()
+    )
+    if course is None:
+        return Response({"error": "Course not found"}, status=404)
+
+    is_teacher = course["teacher_id"] == request.user.id
+    if not is_teacher and not _is_course_member(course_id, request.user.id):
+        return Response({"error": "User not enrolled in this course"}, status=403)
+
+    tree = get_content_tree(course_id)
+    if not is_teacher:
+        tree = visible_content_tree(tree, get_visible_content_ids(course_id))
+
+    not_modified = conditional_response(
+        request,
+        response,
+        *payload_validators(tree, _latest_update(tree, course["updated_at"])),
+    )
+    if not_modified:
+        return not_modified
+    return tree
+
+
+def _is_course_member(course_id, user_id):
+    return CourseMember.objects.filter(course_id=course_id, user_id=user_id).exists()
+
+
+def _latest_update(nodes, latest):
+    for node in nodes:
+        latest = _latest_update(node["children"], max(latest, node["updated_at"]))
+    return latest
+
+
+def _count_nodes(nodes):
+    return sum(1 + _count_nodes(node["children"]) for node in nodes)
+
+
+# FITUR 17: CONTENT HIERARCHY (materialized path)
+@apiv1.get("/contents/{content_id}/subtree", response=ContentSubtreeOut, auth=apiAuth)
+def get_content_subtree(request, content_id: int, depth: int = None):
+    """Get a content with its descendants using one prefix-range query"""
+    try:
+        content = CourseContent.objects.select_related("course_id").get(id=content_id)
+    except CourseContent.DoesNotExist:
+        return Response({"error": "Content not found"}, status=404)
+
+    is_teacher = content.course_id.teacher_id == request.user.id
+    if not is_teacher and not _is_course_member(content.course_id_id, request.user.id):
+        return Response({"error": "User not enrolled in this course"}, status=403)
+
+    descendants = list(content.descendants(max_depth=depth).order_by("path"))
+    root = build_content_tree([content, *descendants])[0]
+    if not is_teacher:
+        visible = visible_content_tree(
+            [root], get_visible_content_ids(content.course_id_id)
+        )
+        if not visible:
+            return Response({"error": "Content not found"}, status=404)
+        root = visible[0]
+
+    return {"root": root, "descendant_count": _count_nodes(root["children"])}
+
+
+@apiv1.get(
+    "/contents/{content_id}/breadcrumbs",
+    response=list[ContentBreadcrumbOut],
+    auth=apiAuth,
+)
+def get_content_breadcrumbs(request, content_id: int):
+    """Get the ancestor chain of a content, root first, itself last"""
+    try:
+        content = CourseContent.objects.select_related("course_id").get(id=content_id)
+    except CourseContent.DoesNotExist:
+        return Response({"error": "Content not found"}, status=404)
+
+    if content.course_id.teacher_id != request.user.id:
+        if not _is_course_member(content.course_id_id, request.user.id):
+            return Response({"error": "User not enrolled in this course"}, status=403)
+        # Visible contents only have visible ancestors
+        if content.id not in get_visible_content_ids(content.course_id_id):
+            return Response({"error": "Content not available yet"}, status=403)
+
+    return [*content.ancestors(), content]
+
+
+@apiv1.put("/contents/{content_id}/move", response=SuccessResponse, auth=apiAuth)
+def move_content(request, content_id: int, move_data: ContentMoveIn):
+    """Move a content (and its subtree) under another parent in the same course"""
+    try:
+        content = CourseContent.objects.select_related("course_id").get(id=content_id)
+    except CourseContent.DoesNotExist:
+        return Response({"error": "Content not found"}, status=404)
+
+    if content.course_id.teacher_id != request.user.id:
+        return Response(
+            {"error": "Only the course teacher can move contents"}, status=403
+        )
+
+    parent = None
+    if move_data.parent_id is not None:
+        parent = CourseContent.objects.filter(
+            id=move_data.parent_id, course_id=content.course_id_id
+        ).first()
+        if parent is None:
+            return Response({"error": "Parent content not found"}, status=404)
+
+    try:
+        content.move_to(parent)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    return {"message": "Content moved successfully"}
+
+
+# FITUR 20: SEARCH (in-memory inverted index, BM25)
+@apiv1.get("/search", response=SearchResultsOut)
+def search_catalog(request, filters: Query[SearchFilters], limit: int = 20):
+    """Search courses and published contents by relevance"""
+    return search(filters, max(1, min(limit, 100)))
+
+
+# FITUR 21: SEARCH FACETS (bitmap intersection)
+@apiv1.get("/search/facets", response=SearchFacetsOut)
+def search_facet_counts(request, filters: Query[SearchFilters]):
+    """Course counts per category, tag, teacher, price bucket and availability"""
+    return search_facets(filters)
+
+
+# FITUR 22: SEARCH SUGGEST (prefix autocomplete)
+@apiv1.get("/search/suggest", response=list[SuggestionOut])
+def search_suggest(request, query: str, limit: int = 10):
+    """Course, category and tag completions ranked by enrolled students"""
+    return get_suggest_index().suggest(query, max(1, limit))
+
+
 # FITUR 3: CONTENT SCHEDULING (+1 Point)
 @apiv1.put("/contents/{content_id}/schedule", response=SuccessResponse, auth=apiAuth)
 def schedule_content(request, content_id: int, schedule_data: CourseContentScheduleIn):
-    """Schedule content release time"""
+    """Schedule content release time; the release scheduler publishes it then"""
     try:
         content = CourseContent.objects.get(id=content_id)
         content.release_time = schedule_data.release_time
+        content.release_pending = not content.is_published
         content.save()
         return {"message": "Content scheduled successfully"}
     except CourseContent.DoesNotExist:
@@ -345,6 +650,7 @@ def publish_content(request, content_id: int):
     try:
         content = CourseContent.objects.get(id=content_id)
         content.is_published = True
+        content.release_pending = False
         content.save()
         return {"message": "Content published successfully"}
     except CourseContent.DoesNotExist:
@@ -354,16 +660,604 @@ def publish_content(request, content_id: int):
 # Part 2: Unpublish Content (+1 Point)
 @apiv1.put("/contents/{content_id}/unpublish", response=SuccessResponse, auth=apiAuth)
 def unpublish_content(request, content_id: int):
-    """Unpublish content"""
+    """Unpublish content, cancelling a pending scheduled release"""
     try:
         content = CourseContent.objects.get(id=content_id)
         content.is_published = False
+        content.release_pending = False
         content.save()
         return {"message": "Content unpublished successfully"}
     except CourseContent.DoesNotExist:
         return Response({"error": "Content not found"}, status=404)
 
 
+# FITUR 23: CONTENT COMMENTS (keyset pagination)
+def _membership_id(course_id, user_id):
+    """CourseMember id of the user in a course, from the membership cache"""
+    for member_id, member_course_id, _ in get_user_memberships(user_id):
+        if member_course_id == course_id:
+            return member_id
+    return None
+
+
+def _comment_payload(comment, author):
+    return {
+        "id": comment.id,
+        "content_id": comment.content_id_id,
+        "author": {
+            "id": author.id,
+            "email": author.email,
+            "first_name": author.first_name,
+            "last_name": author.last_name,
+        },
+        "comment": comment.comment,
+        "is_approved": comment.is_approved,
+        "is_flagged": comment.is_flagged,
+        "created_at": comment.created_at,
+        "updated_at": comment.updated_at,
+    }
+
+
+@apiv1.get("/contents/{content_id}/comments", response=CommentListOut, auth=apiAuth)
+def list_content_comments(
+    request,
+    content_id: int,
+    cursor: str = None,
+    limit: int = 20,
+    approved: bool = None,
+):
+    """Comments of a content, newest first; students only see approved ones"""
+    content = (
+        CourseContent.objects.filter(id=content_id)
+        .values("course_id", "course_id__teacher_id")
+        .first()
+    )
+    if content is None:
+        return Response({"error": "Content not found"}, status=404)
+
+    course_id = content["course_id"]
+    if content["course_id__teacher_id"] != request.user.id:
+        if _membership_id(course_id, request.user.id) is None:
+            return Response({"error": "User not enrolled in this course"}, status=403)
+        if content_id not in get_visible_content_ids(course_id):
+            return Response({"error": "Content not available yet"}, status=403)
+        approved = True
+
+    # Authors come in the same query (comment -> member -> user), so a page
+    # costs one query however many comments the content has
+    comments = (
+        Comment.objects.filter(content_id=content_id)
+        .select_related("member_id__user_id")
+        .only(
+            "id",
+            "content_id",
+            "comment",
+            "is_approved",
+            "is_flagged",
+            "created_at",
+            "updated_at",
+            "member_id__user_id__id",
+            "member_id__user_id__email",
+            "member_id__user_id__first_name",
+            "member_id__user_id__last_name",
+        )
+    )
+    if approved is not None:
+        comments = comments.filter(is_approved=approved)
+
+    try:
+        page, next_cursor = keyset_page(comments, cursor, max(1, min(limit, 100)))
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=400)
+
+    return {
+        "comments": [
+            _comment_payload(comment, comment.member_id.user_id) for comment in page
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+@apiv1.post("/contents/{content_id}/comments", response={201: CommentOut}, auth=apiAuth)
+def post_content_comment(request, content_id: int, comment_data: CommentIn):
+    """Comment on a content, pre-screened against the moderation term lists.
+
+    Clean comments are approved right away; a hold term keeps the comment for
+    a moderator and a blocklisted term also flags it.
+    """
+    if not comment_data.comment.strip():
+        return Response({"error": "Comment cannot be empty"}, status=400)
+
+    course_id, is_archived = (
+        CourseContent.objects.filter(id=content_id)
+        .values_list("course_id", "course_id__is_archived")
+        .first()
+    ) or (None, False)
+    if course_id is None:
+        return Response({"error": "Content not found"}, status=404)
+    if is_archived:
+        return Response({"error": "Course is archived"}, status=403)
+
+    member_id = _membership_id(course_id, request.user.id)
+    if member_id is None:
+        return Response({"error": "User not enrolled in this course"}, status=403)
+    if content_id not in get_visible_content_ids(course_id):
+        return Response({"error": "Content not available yet"}, status=403)
+
+    decision = get_comment_screener().screen(comment_data.comment)
+    comment = Comment.objects.create(
+        content_id_id=content_id,
+        member_id_id=member_id,
+        comment=comment_data.comment,
+        **moderation_fields(decision),
+    )
+    return 201, _comment_payload(comment, request.user)
+
+
+@apiv1.delete("/comments/{int:comment_id}", response=SuccessResponse, auth=apiAuth)
+def delete_comment(request, comment_id: int):
+    """Delete a comment; allowed for its author and the course teacher"""
+    comment = (
+        Comment.objects.filter(id=comment_id)
+        .values("member_id__user_id", "content_id__course_id__teacher_id")
+        .first()
+    )
+    if comment is None:
+        return Response({"error": "Comment not found"}, status=404)
+
+    if request.user.id not in (
+        comment["member_id__user_id"],
+        comment["content_id__course_id__teacher_id"],
+    ):
+        return Response(
+            {"error": "Only the author or the course teacher can delete this comment"},
+            status=403,
+        )
+
+    Comment.objects.filter(id=comment_id).delete()
+    return {"message": "Comment deleted successfully"}
+
+
+# FITUR 24: BULK COMMENT MODERATION
+@apiv1.put("/comments/moderate", response=CommentModerationOut, auth=apiAuth)
+def moderate_comments(request, moderation: CommentModerationIn):
+    """Approve or reject every matching comment with one UPDATE"""
+    if moderation.keyword is not None:
+        moderation.keyword = moderation.keyword.strip()
+    # A blank keyword or an empty id list selects nothing on its own; taken
+    # as a selector it would moderate every comment of the teacher's courses
+    selectors = {
+        name: value
+        for name, value in moderation.model_dump(
+            exclude={"approved", "dry_run"}, exclude_none=True
+        ).items()
+        if value not in ("", [])
+    }
+    if not selectors:
+        return Response(
+            {"error": "Provide comment_ids or at least one filter"}, status=400
+        )
+
+    # Related filters are subqueries on other tables, never a join back to
+    # the comment table, so MySQL runs this as a single UPDATE ... WHERE
+    contents = CourseContent.objects.filter(course_id__teacher_id=request.user.id)
+    if moderation.course_id is not None:
+        contents = contents.filter(course_id=moderation.course_id)
+    if moderation.approved:
+        pending = Q(is_approved=False)
+    else:
+        # Held comments nobody reviewed yet are rejected too, so the
+        # pre-screen does not pick them up again
+        pending = Q(is_approved=True) | Q(reviewed_at__isnull=True)
+    comments = Comment.objects.filter(pending, content_id__in=contents.values("id"))
+    if moderation.comment_ids is not None:
+        comments = comments.filter(id__in=moderation.comment_ids)
+    if moderation.content_id is not None:
+        comments = comments.filter(content_id=moderation.content_id)
+    if moderation.author_id is not None:
+        comments = comments.filter(
+            member_id__in=CourseMember.objects.filter(
+                user_id=moderation.author_id
+            ).values("id")
+        )
+    if moderation.created_after is not None:
+        comments = comments.filter(created_at__gte=moderation.created_after)
+    if moderation.created_before is not None:
+        comments = comments.filter(created_at__lt=moderation.created_before)
+    if moderation.keyword:
+        comments = comments.filter(comment__icontains=moderation.keyword)
+    if moderation.flagged is not None:
+        comments = comments.filter(is_flagged=moderation.flagged)
+
+    if moderation.dry_run:
+        return {"affected": comments.count(), "dry_run": True}
+    # Approving a comment also clears the pre-screen flag on it
+    cleared = {"is_flagged": False} if moderation.approved else {}
+    now = timezone.now()
+    affected = comments.update(
+        is_approved=moderation.approved, reviewed_at=now, updated_at=now, **cleared
+    )
+    return {"affected": affected, "dry_run": False}
+
+
+# FITUR 26-28: DISCUSSION FORUM (denormalized reply stats, reply tree, rollups)
+def _forum_access(course_id, user_id):
+    """Return (course payload, error response) for a course's forum"""
+    course = get_course_payloads([course_id]).get(course_id)
+    if course is None:
+        return None, Response({"error": "Course not found"}, status=404)
+    if (
+        course["teacher"]["id"] != user_id
+        and _membership_id(course_id, user_id) is None
+    ):
+        return None, Response({"error": "User not enrolled in this course"}, status=403)
+    return course, None
+
+
+def _thread_payload(thread, course, author):
+    return {
+        "id": thread.id,
+        "title": thread.title,
+        "description": thread.description,
+        "course": course,
+        "author": {
+            "id": author.id,
+            "email": author.email,
+            "first_name": author.first_name,
+            "last_name": author.last_name,
+        },
+        "is_pinned": thread.is_pinned,
+        "is_locked": thread.is_locked,
+        "reply_count": thread.reply_count,
+        "last_reply_at": thread.last_reply_at,
+        "created_at": thread.created_at,
+        "updated_at": thread.updated_at,
+    }
+
+
+@apiv1.get(
+    "/courses/{course_id}/threads", response=DiscussionThreadListOut, auth=apiAuth
+)
+def list_course_threads(request, course_id: int, cursor: str = None, limit: int = 20):
+    """Forum threads of a course, pinned first, then by latest activity"""
+    course, error = _forum_access(course_id, request.user.id)
+    if error:
+        return error
+
+    # Reply stats are columns and the course comes from the payload cache,
+    # so a page is one query on thread_listing_idx joined to the authors
+    threads = DiscussionThread.objects.filter(course_id=course_id).select_related(
+        "author"
+    )
+    try:
+        page, next_cursor = thread_page(threads, cursor, max(1, min(limit, 100)))
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=400)
+
+    return {
+        "threads": [_thread_payload(thread, course, thread.author) for thread in page],
+        "next_cursor": next_cursor,
+    }
+
+
+@apiv1.post(
+    "/courses/{course_id}/threads",
+    response={201: DiscussionThreadOut},
+    auth=apiAuth,
+)
+def create_course_thread(request, course_id: int, thread_data: DiscussionThreadIn):
+    """Start a forum thread; open to the course teacher and its members"""
+    if not thread_data.title.strip():
+        return Response({"error": "Title cannot be empty"}, status=400)
+    course, error = _forum_access(course_id, request.user.id)
+    if error:
+        return error
+
+    thread = DiscussionThread.objects.create(
+        course_id=course_id,
+        author_id=request.user.id,
+        title=thread_data.title,
+        description=thread_data.description,
+    )
+    return 201, _thread_payload(thread, course, request.user)
+
+
+def _reply_payload(reply, author):
+    return {
+        "id": reply.id,
+        "thread_id": reply.thread_id,
+        "author": {
+            "id": author.id,
+            "email": author.email,
+            "first_name": author.first_name,
+            "last_name": author.last_name,
+        },
+        "content": reply.content,
+        "parent_reply_id": reply.parent_reply_id,
+        "is_solution": reply.is_solution,
+        "created_at": reply.created_at,
+        "updated_at": reply.updated_at,
+        "replies": [],
+    }
+
+
+@apiv1.get("/threads/{thread_id}", response=DiscussionThreadDetailOut, auth=apiAuth)
+def get_thread_detail(request, thread_id: int, cursor: str = None, limit: int = 20):
+    """A thread with a page of top-level replies, each with its full subtree"""
+    thread = (
+        DiscussionThread.objects.filter(id=thread_id).select_related("author").first()
+    )
+    if thread is None:
+        return Response({"error": "Thread not found"}, status=404)
+    course, error = _forum_access(thread.course_id, request.user.id)
+    if error:
+        return error
+
+    top_level = DiscussionReply.objects.filter(
+        thread_id=thread_id, root_reply__isnull=True
+    ).select_related("author")
+    try:
+        page, next_cursor = keyset_page(
+            top_level, cursor, max(1, min(limit, 100)), descending=False
+        )
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=400)
+
+    # Every descendant of the page in one query. Nodes are built first and
+    # linked in a second pass: imported or restored replies can be older
+    # than their parent, and one whose parent is missing is left out
+    nodes = {reply.id: _reply_payload(reply, reply.author) for reply in page}
+    descendants = list(
+        DiscussionReply.objects.filter(root_reply_id__in=list(nodes))
+        .select_related("author")
+        .order_by("created_at", "id")
+    )
+    for reply in descendants:
+        nodes[reply.id] = _reply_payload(reply, reply.author)
+    for reply in descendants:
+        parent = nodes.get(reply.parent_reply_id)
+        if parent is not None:
+            parent["replies"].append(nodes[reply.id])
+
+    return {
+        "thread": _thread_payload(thread, course, thread.author),
+        "replies": [nodes[reply.id] for reply in page],
+        "next_cursor": next_cursor,
+    }
+
+
+@apiv1.post(
+    "/threads/{thread_id}/replies",
+    response={201: DiscussionReplyOut},
+    auth=apiAuth,
+)
+def create_thread_reply(request, thread_id: int, reply_data: DiscussionReplyIn):
+    """Reply to a thread, or to another reply of it with ``parent_reply_id``"""
+    if not reply_data.content.strip():
+        return Response({"error": "Reply cannot be empty"}, status=400)
+    thread = (
+        DiscussionThread.objects.filter(id=thread_id)
+        .values("course_id", "is_locked")
+        .first()
+    )
+    if thread is None:
+        return Response({"error": "Thread not found"}, status=404)
+    _, error = _forum_access(thread["course_id"], request.user.id)
+    if error:
+        return error
+    if thread["is_locked"]:
+        return Response({"error": "Thread is locked"}, status=403)
+
+    root_reply_id = None
+    if reply_data.parent_reply_id is not None:
+        parent = (
+            DiscussionReply.objects.filter(
+                id=reply_data.parent_reply_id, thread_id=thread_id
+            )
+            .values("id", "root_reply_id")
+            .first()
+        )
+        if parent is None:
+            return Response(
+                {"error": "Parent reply not found in this thread"}, status=400
+            )
+        root_reply_id = parent["root_reply_id"] or parent["id"]
+
+    reply = DiscussionReply.objects.create(
+        thread_id=thread_id,
+        author_id=request.user.id,
+        content=reply_data.content,
+        parent_reply_id=reply_data.parent_reply_id,
+        root_reply_id=root_reply_id,
+    )
+    return 201, _reply_payload(reply, request.user)
+
+
+@apiv1.get("/courses/{course_id}/forum/stats", response=ForumStatsOut, auth=apiAuth)
+def get_forum_stats(request, course_id: int, days: int = 7):
+    """Forum totals plus threads active in the last ``days`` days.
+
+    Totals come from the ForumStats row and activity from the per-day
+    ForumActivity buckets, so the reply table is never scanned.
+    """
+    _, error = _forum_access(course_id, request.user.id)
+    if error:
+        return error
+
+    stats = ForumStats.objects.filter(course_id=course_id).first()
+    since = timezone.localdate() - timedelta(days=max(1, min(days, 90)) - 1)
+    active = (
+        ForumActivity.objects.filter(course_id=course_id, day__gte=since)
+        .values("thread_id")
+        .distinct()
+        .count()
+    )
+    recent_threads = DiscussionThread.objects.filter(course_id=course_id).order_by(
+        "-updated_at"
+    )[:5]
+    return {
+        "total_threads": stats.total_threads if stats else 0,
+        "total_replies": stats.total_replies if stats else 0,
+        "active_discussions": active,
+        "recent_activity": [
+            (
+                f"New reply in {thread.title}"
+                if thread.last_reply_at
+                else f"New thread: {thread.title}"
+            )
+            for thread in recent_threads.only("title", "last_reply_at")
+        ],
+    }
+
+
+# FITUR 29: REALTIME UPDATES (Server-Sent Events, needs an ASGI server)
+def _event_response(channels):
+    response = StreamingHttpResponse(
+        event_stream(channels), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@apiv1.get("/courses/{course_id}/events", auth=apiAuth)
+async def course_events(request, course_id: int):
+    """Stream new threads, replies and approved comments of a course"""
+    _, error = await sync_to_async(_forum_access)(course_id, request.user.id)
+    if error:
+        return error
+    return _event_response([course_channel(course_id)])
+
+
+@apiv1.get("/threads/{thread_id}/events", auth=apiAuth)
+async def thread_events(request, thread_id: int):
+    """Stream new replies of a thread"""
+    course_id = await (
+        DiscussionThread.objects.filter(id=thread_id)
+        .values_list("course_id", flat=True)
+        .afirst()
+    )
+    if course_id is None:
+        return Response({"error": "Thread not found"}, status=404)
+    _, error = await sync_to_async(_forum_access)(course_id, request.user.id)
+    if error:
+        return error
+    return _event_response([thread_channel(thread_id)])
+
+
+# FITUR 30: COURSE ANNOUNCEMENTS (bulk notification fan-out)
+@apiv1.post(
+    "/courses/{course_id}/announcements",
+    response={202: SuccessResponse},
+    auth=apiAuth,
+)
+def announce_to_course(request, course_id: int, notification: NotificationIn):
+    """Notify every member of a course; the fan-out runs in the background"""
+    if not notification.title.strip():
+        return Response({"error": "Title cannot be empty"}, status=400)
+    if notification.notification_type not in dict(NOTIFICATION_TYPES):
+        return Response({"error": "Unknown notification type"}, status=400)
+    course = get_course_payloads([course_id]).get(course_id)
+    if course is None:
+        return Response({"error": "Course not found"}, status=404)
+    if course["teacher"]["id"] != request.user.id:
+        return Response(
+            {"error": "Only the course teacher can send announcements"}, status=403
+        )
+
+    notify_course(
+        course_id,
+        exclude_user_id=request.user.id,
+        sender_id=request.user.id,
+        title=notification.title,
+        message=notification.message,
+        notification_type=notification.notification_type,
+        action_url=notification.action_url,
+    )
+    return 202, {"message": "Announcement queued for delivery"}
+
+
+# FITUR 31-32: NOTIFICATION COUNTERS (badge counts without GROUP BY, read watermark)
+@apiv1.get("/notifications/stats", response=NotificationStatsOut, auth=apiAuth)
+def get_notification_stats(request):
+    """Total, unread and per-type counts from the user's counter row"""
+    counter = NotificationCounter.objects.filter(user_id=request.user.id).first()
+    if counter is None:
+        return {
+            "total_notifications": 0,
+            "unread_notifications": 0,
+            "notifications_by_type": {},
+        }
+    return {
+        "total_notifications": counter.total,
+        "unread_notifications": counter.unread,
+        "notifications_by_type": counter.by_type(),
+    }
+
+
+@apiv1.put(
+    "/notifications/{int:notification_id}/read",
+    response=SuccessResponse,
+    auth=apiAuth,
+)
+def mark_notification_read(request, notification_id: int):
+    """Mark one of the user's notifications as read"""
+    notifications = Notification.objects.filter(
+        id=notification_id, recipient_id=request.user.id
+    )
+    created_at = notifications.values_list("created_at", flat=True).first()
+    if created_at is None:
+        return Response({"error": "Notification not found"}, status=404)
+    with transaction.atomic():
+        # Only the request that flips is_read decrements the unread counter,
+        # and only if the notification is newer than the read-all watermark
+        if notifications.filter(is_read=False).update(is_read=True):
+            NotificationCounter.add(
+                [request.user.id], None, total=0, unread=-1, created_at=created_at
+            )
+    return {"message": "Notification marked as read"}
+
+
+@apiv1.put("/notifications/read-all", response=SuccessResponse, auth=apiAuth)
+def mark_all_notifications_read(request):
+    """Mark everything read by moving the user's watermark (one row write)"""
+    mark_all_read(request.user.id)
+    return {"message": "All notifications marked as read"}
+
+
+@apiv1.delete(
+    "/notifications/{int:notification_id}", response=SuccessResponse, auth=apiAuth
+)
+def delete_notification(request, notification_id: int):
+    """Delete one of the user's notifications (counters follow via signal)"""
+    notification = Notification.objects.filter(
+        id=notification_id, recipient_id=request.user.id
+    ).first()
+    if notification is None:
+        return Response({"error": "Notification not found"}, status=404)
+    notification.delete()
+    return {"message": "Notification deleted successfully"}
+
+
+# FITUR 34: NOTIFICATION DELIVERY (long-poll and SSE instead of timed polling)
+@apiv1.get("/notifications/poll", response=list[NotificationOut], auth=apiAuth)
+async def poll_notifications(
+    request, after: int = 0, timeout: float = LONG_POLL_SECONDS, unread: bool = False
+):
+    """Notifications with id > ``after`` (only unread ones with ``unread``);
+    held open until one arrives or ``timeout`` seconds pass (then an empty
+    list)
+    """
+    timeout = min(max(timeout, 0), LONG_POLL_SECONDS)
+    return await wait_for_notifications(request.user.id, after, timeout, unread)
+
+
+@apiv1.get("/notifications/events", auth=apiAuth)
+async def notification_events(request):
+    """Stream the user's new notifications as they are created"""
+    return _event_response([user_channel(request.user.id)])
+
+
 # FITUR 2: COMMENT MODERATION (+1 Point)
 @apiv1.put("/comments/{comment_id}/moderate", response=SuccessResponse, auth=apiAuth)
 def moderate_comment(request, comment_id: int, approved: bool = True):
@@ -371,6 +1265,9 @@ def moderate_comment(request, comment_id: int, approved: bool = True):
     try:
         comment = Comment.objects.get(id=comment_id)
         comment.is_approved = approved
+        comment.reviewed_at = timezone.now()
+        if approved:
+            comment.is_flagged = False
         comment.save()
 
         status = "approved" if approved else "rejected"
@@ -409,6 +1306,9 @@ def mark_content_complete(request, content_id: int):
         if not CourseMember.objects.filter(course_id=course, user_id=user).exists():
             return Response({"error": "User not enrolled in this course"}, status=403)
 
+        if content.id not in get_visible_content_ids(course.id):
+            return Response({"error": "Content not available yet"}, status=403)
+
         completion, created = CompletionTracking.objects.get_or_create(
             user=user, content=content
         )
@@ -429,22 +1329,22 @@ def get_course_progress(request, course_id: int):
     """Get current user's progress in a course"""
     try:
         course = Course.objects.get(id=course_id)
-        user = request.auth
+        user_id = request.user.id
 
-        if not CourseMember.objects.filter(course_id=course, user_id=user).exists():
+        if not _is_course_member(course.id, user_id):
             return Response({"error": "User not enrolled in this course"}, status=403)
 
-        total_contents = CourseContent.objects.filter(
-            course_id=course, is_published=True
-        ).count()
-        completed_contents = CompletionTracking.objects.filter(
-            user=user, content__course_id=course, content__is_published=True
-        )
+        visible_ids = get_visible_content_ids(course.id)
+        total_contents = len(visible_ids)
+        completed_content_ids = [
+            content_id
+            for content_id in CompletionTracking.objects.filter(
+                user_id=user_id, content__course_id=course
+            ).values_list("content_id", flat=True)
+            if content_id in visible_ids
+        ]
 
-        completed_count = completed_contents.count()
-        completed_content_ids = list(
-            completed_contents.values_list("content_id", flat=True)
-        )
+        completed_count = len(completed_content_ids)
         completion_percentage = (
             (completed_count / total_contents * 100) if total_contents > 0 else 0.0
         )
@@ -541,6 +1441,9 @@ def bookmark_content(request, content_id: int):
         if not is_member:
             return Response({"error": "User not enrolled in this course"}, status=403)
 
+        if content.id not in get_visible_content_ids(course_object.id):
+            return Response({"error": "Content not available yet"}, status=403)
+
         # Create or remove bookmark
         bookmark, created = Bookmark.objects.get_or_create(content=content, user=user)
         if not created:
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class LmsCoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lms_core'
+
+    def ready(self):
+        import lms_core.signals  # noqa: F401
+        from lms_core.search.database import ensure_fulltext
+
+        post_migrate.connect(ensure_fulltext, sender=self)
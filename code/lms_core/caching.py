@@ -0,0 +1,212 @@
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from lms_core.models import Course, CourseContent, CourseMember
+
+# Long with a shared cache (Redis), short with a per-process one, where
+# another worker's invalidation never arrives (LMS_CACHE_TIMEOUT)
+CACHE_TIMEOUT = getattr(settings, "LMS_CACHE_TIMEOUT", 60 * 60)
+MEMBERSHIP_TIMEOUT = CACHE_TIMEOUT
+COURSE_PAYLOAD_TIMEOUT = CACHE_TIMEOUT
+CONTENT_TREE_TIMEOUT = CACHE_TIMEOUT
+VISIBLE_CONTENTS_TIMEOUT = CACHE_TIMEOUT
+# Recheck interval of a scheduled release that is due but not yet published
+RELEASE_RETRY = timedelta(seconds=5)
+
+
+def membership_key(user_id):
+    return f"lms:memberships:{user_id}"
+
+
+def course_payload_key(course_id):
+    return f"lms:course:{course_id}"
+
+
+def content_tree_key(course_id):
+    return f"lms:content_tree:{course_id}"
+
+
+def visible_contents_key(course_id):
+    return f"lms:visible_contents:{course_id}"
+
+
+def course_payload(course):
+    """Serialize a course (with ``teacher`` loaded) in the CourseSchemaOut shape"""
+    return {
+        "id": course.id,
+        "name": course.name,
+        "description": course.description,
+        "price": course.price,
+        "image": course.image.url if course.image else None,
+        "teacher": {
+            "id": course.teacher.id,
+            "email": course.teacher.email,
+            "first_name": course.teacher.first_name,
+            "last_name": course.teacher.last_name,
+        },
+        "max_students": course.max_students,
+        "created_at": course.created_at,
+        "updated_at": course.updated_at,
+    }
+
+
+def get_user_memberships(user_id):
+    """Return the user's memberships as (member_id, course_id, role) tuples"""
+    key = membership_key(user_id)
+    memberships = cache.get(key)
+    if memberships is None:
+        memberships = list(
+            CourseMember.objects.filter(user_id=user_id)
+            .order_by("id")
+            .values_list("id", "course_id", "roles")
+        )
+        cache.set(key, memberships, MEMBERSHIP_TIMEOUT)
+    return memberships
+
+
+def get_course_payloads(course_ids):
+    """Return {course_id: payload}, loading only cache misses in one query"""
+    keys = {course_payload_key(course_id): course_id for course_id in course_ids}
+    payloads = {keys[key]: payload for key, payload in cache.get_many(keys).items()}
+
+    missing = [course_id for course_id in course_ids if course_id not in payloads]
+    if missing:
+        fresh = {
+            course.id: course_payload(course)
+            for course in Course.objects.filter(id__in=missing).select_related(
+                "teacher"
+            )
+        }
+        cache.set_many(
+            {course_payload_key(course_id): p for course_id, p in fresh.items()},
+            COURSE_PAYLOAD_TIMEOUT,
+        )
+        payloads.update(fresh)
+    return payloads
+
+
+def content_node(content):
+    return {
+        "id": content.id,
+        "name": content.name,
+        "description": content.description,
+        "video_url": content.video_url,
+        "file_attachment": (
+            content.file_attachment.url if content.file_attachment else None
+        ),
+        "parent_id": content.parent_id_id,
+        "release_time": content.release_time,
+        "is_published": content.is_published,
+        "created_at": content.created_at,
+        "updated_at": content.updated_at,
+        "children": [],
+    }
+
+
+def build_content_tree(contents):
+    """Assemble flat contents into nested nodes in two O(n) passes.
+
+    A node whose parent is missing from ``contents`` becomes a root, so a
+    broken or cross-course ``parent_id`` never hides content.
+    """
+    nodes = {content.id: content_node(content) for content in contents}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node["parent_id"])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent["children"].append(node)
+    return roots
+
+
+def get_content_tree(course_id):
+    """Return the full content tree of a course, loaded with one query"""
+    key = content_tree_key(course_id)
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_content_tree(
+            CourseContent.objects.filter(course_id=course_id).order_by("id")
+        )
+        cache.set(key, tree, CONTENT_TREE_TIMEOUT)
+    return tree
+
+
+def visible_content_tree(tree, visible_ids):
+    """Prune the tree to the nodes in ``visible_ids``"""
+    visible = []
+    for node in tree:
+        if node["id"] in visible_ids:
+            children = visible_content_tree(node["children"], visible_ids)
+            visible.append({**node, "children": children})
+    return visible
+
+
+def get_visible_content_ids(course_id, now=None):
+    """Return the ids of contents students can see in a course.
+
+    A content is visible when it is published, released, and all of its
+    ancestors are visible too. The set is cached until the next pending
+    release_time in the course, so it expires exactly when visibility
+    changes; publish/unpublish/schedule go through save() or the release
+    scheduler, both of which drop it explicitly. Scheduled contents count
+    as pending until the scheduler has published them, as the scheduler's
+    own invalidation may not reach this process's cache.
+    """
+    key = visible_contents_key(course_id)
+    visible_ids = cache.get(key)
+    if visible_ids is not None:
+        return visible_ids
+
+    now = now or timezone.now()
+    rows = CourseContent.objects.filter(course_id=course_id).values_list(
+        "id", "parent_id", "is_published", "release_pending", "release_time"
+    )
+    parents, shown, pending = {}, {}, []
+    for pk, parent_pk, is_published, release_pending, release_time in rows:
+        parents[pk] = parent_pk
+        shown[pk] = is_published and (release_time is None or release_time <= now)
+        if release_pending and release_time is not None:
+            # Released by the scheduler, maybe a tick after release_time
+            pending.append(max(release_time, now + RELEASE_RETRY))
+        elif is_published and release_time is not None and release_time > now:
+            pending.append(release_time)
+
+    resolved = {}
+    for pk in parents:
+        chain = []
+        node = pk
+        while node in parents and node not in resolved and node not in chain:
+            chain.append(node)
+            node = parents[node]
+        inherited = resolved.get(node, True)
+        for node in reversed(chain):
+            inherited = inherited and shown[node]
+            resolved[node] = inherited
+
+    visible_ids = frozenset(pk for pk, is_visible in resolved.items() if is_visible)
+    timeout = VISIBLE_CONTENTS_TIMEOUT
+    if pending:
+        timeout = max(1, math.ceil((min(pending) - now).total_seconds()))
+        timeout = min(timeout, VISIBLE_CONTENTS_TIMEOUT)
+    cache.set(key, visible_ids, timeout)
+    return visible_ids
+
+
+def invalidate_user_memberships(*user_ids):
+    cache.delete_many([membership_key(user_id) for user_id in user_ids])
+
+
+def invalidate_course_payloads(*course_ids):
+    cache.delete_many([course_payload_key(course_id) for course_id in course_ids])
+
+
+def invalidate_content_tree(*course_ids):
+    cache.delete_many([content_tree_key(course_id) for course_id in course_ids])
+
+
+def invalidate_visible_contents(*course_ids):
+    cache.delete_many([visible_contents_key(course_id) for course_id in course_ids])
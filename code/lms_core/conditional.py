@@ -0,0 +1,71 @@
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from lms_core.renderers import JSON_MEDIA_TYPE, negotiate_media_type
+from ninja.responses import NinjaJSONEncoder
+
+
+def payload_validators(payload, last_modified=None):
+    """Compute the ETag of the payload that is actually served.
+
+    Cached bodies (the content tree) are hashed instead of asking the
+    database, so the tag always describes the body a 200 would return,
+    even when another worker's cache is behind the database.
+    """
+    raw = json.dumps(payload, cls=NinjaJSONEncoder, sort_keys=True)
+    return _make_etag(raw), last_modified
+
+
+def instance_validators(model, pk):
+    """Compute (etag, last_modified) for a single row from its ``updated_at``.
+
+    Returns ``(None, None)`` when the row does not exist so the caller can
+    fall through to its regular 404 handling.
+    """
+    updated_at = (
+        model.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+    )
+    if updated_at is None:
+        return None, None
+    return _make_etag(pk, updated_at), updated_at
+
+
+def conditional_response(request, response, etag, last_modified):
+    """Answer ``If-None-Match`` / ``If-Modified-Since`` before the real work.
+
+    ``response`` is the Ninja temporal response; the validators are set on it
+    so that a full 200 also carries them. Returns a 304 response when the
+    client's copy is still fresh, otherwise ``None``.
+    """
+    if etag is None:
+        return None
+
+    # JSON and MessagePack bodies of the same data are different representations
+    media_type = negotiate_media_type(request)
+    if media_type != JSON_MEDIA_TYPE:
+        etag = '%s;%s"' % (etag[:-1], media_type.rsplit("/", 1)[-1])
+
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    headers = {"ETag": etag}
+    if last_modified_ts is not None:
+        headers["Last-Modified"] = http_date(last_modified_ts)
+    for header, value in headers.items():
+        response[header] = value
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified_ts
+    )
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        patch_vary_headers(not_modified, ["Accept"])
+    return not_modified
+
+
+def _make_etag(*parts):
+    raw = "|".join(
+        part.isoformat() if hasattr(part, "isoformat") else str(part) for part in parts
+    )
+    return '"%s"' % hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from lms_core.retention import (
+    ARCHIVE_CHUNK_SIZE,
+    archive_course_comments,
+    archive_notifications,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move read notifications older than the retention period and comments "
+        "of archived courses into the archive tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "LMS_NOTIFICATION_RETENTION_DAYS", 90),
+            help="Archive read notifications older than this many days",
+        )
+        parser.add_argument("--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE)
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to pause between chunks, to throttle the job",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        notifications = archive_notifications(
+            options["days"], options["chunk_size"], options["sleep"]
+        )
+        comments = archive_course_comments(options["chunk_size"], options["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {notifications} notifications and {comments} comments "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from lms_core.models import CourseContent
+from lms_core.paths import rebuild_paths
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized path of every CourseContent from parent_id"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = rebuild_paths(CourseContent, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {changed} content paths"))
@@ -0,0 +1,47 @@
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from lms_core.retention import restore_course_comments, restore_notifications
+
+
+class Command(BaseCommand):
+    help = "Move archived notifications of a user or comments of a course back"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, help="Restore this user's notifications"
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Only notifications created on or after this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--course",
+            type=int,
+            help="Unarchive this course and restore its comments",
+        )
+
+    def handle(self, *args, **options):
+        if options["user"] is None and options["course"] is None:
+            raise CommandError("Pass --user and/or --course")
+        if options["user"] is not None:
+            since = options["since"]
+            if since is not None:
+                # Midnight of that day in TIME_ZONE
+                since = timezone.make_aware(datetime.combine(since, time.min))
+            restored = restore_notifications(options["user"], since)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Restored {restored} notifications of user {options['user']}"
+                )
+            )
+        if options["course"] is not None:
+            restored = restore_course_comments(options["course"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Unarchived course {options['course']} and restored "
+                    f"{restored} comments"
+                )
+            )
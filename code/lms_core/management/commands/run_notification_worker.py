@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from lms_core.notifications import drain_fan_out_jobs, flush_digests
+from lms_core.scheduler import acquire_lease, default_owner, release_lease
+
+LEASE_NAME = "notification-worker"
+
+
+class Command(BaseCommand):
+    help = "Write queued course notifications and due notification digests"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=2, help="seconds between runs"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="run a single pass and exit"
+        )
+
+    def handle(self, *args, **options):
+        owner = default_owner()
+        lease_ttl = timedelta(seconds=max(60, int(options["interval"] * 3)))
+        try:
+            while True:
+                if acquire_lease(LEASE_NAME, owner, lease_ttl):
+                    fanned_out = drain_fan_out_jobs()
+                    if fanned_out:
+                        self.stdout.write(f"Wrote {fanned_out} course notifications")
+                    written = flush_digests()
+                    if written:
+                        self.stdout.write(f"Wrote {written} notification digests")
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            release_lease(LEASE_NAME, owner)
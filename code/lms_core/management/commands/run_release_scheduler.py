@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from lms_core.scheduler import ReleaseScheduler
+
+
+class Command(BaseCommand):
+    help = "Publish scheduled contents when their release_time arrives"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=5, help="max seconds between ticks"
+        )
+        parser.add_argument(
+            "--refresh", type=int, default=30, help="seconds between heap reloads"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="run a single tick and exit"
+        )
+
+    def handle(self, *args, **options):
+        scheduler = ReleaseScheduler(
+            refresh=options["refresh"],
+            lease_ttl=max(60, int(options["interval"] * 3)),
+        )
+        try:
+            while True:
+                published = scheduler.tick()
+                if published:
+                    self.stdout.write(f"Published {published} contents")
+                if options["once"]:
+                    break
+                time.sleep(
+                    scheduler.seconds_until_next(timezone.now(), options["interval"])
+                )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.stop()
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from lms_core.moderation import (
+    APPROVE,
+    FLAG,
+    HOLD,
+    get_comment_screener,
+    screen_pending_comments,
+)
+
+
+class Command(BaseCommand):
+    help = "Run the keyword pre-screen over comments still waiting for moderation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the decisions without updating any comment",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        decisions = screen_pending_comments(
+            get_comment_screener(),
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        elapsed = time.perf_counter() - started
+        screened = sum(decisions.values())
+        prefix = "[dry run] " if options["dry_run"] else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}Screened {screened} comments in {elapsed:.1f}s "
+                f"({screened / max(elapsed, 1e-9):,.0f}/s): "
+                f"{decisions[APPROVE]} approved, {decisions[HOLD]} held, "
+                f"{decisions[FLAG]} flagged"
+            )
+        )
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.6 on 2026-10-19 05:58
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+# Digits per path step, as CourseContent.PATH_STEP was when this ran
+PATH_STEP = 10
+
+
+def build_paths(apps, schema_editor):
+    # Frozen copy of lms_core.paths.rebuild_paths: migrations must not
+    # depend on app code that keeps changing
+    CourseContent = apps.get_model('lms_core', 'CourseContent')
+    parents, children = {}, defaultdict(list)
+    for pk, parent_pk in CourseContent.objects.values_list('id', 'parent_id').iterator(chunk_size=1000):
+        parents[pk] = parent_pk
+    for pk, parent_pk in parents.items():
+        children[parent_pk if parent_pk in parents else None].append(pk)
+
+    paths = {}
+
+    def walk(roots):
+        stack = [(pk, '') for pk in roots]
+        while stack:
+            pk, parent_path = stack.pop()
+            if pk in paths:
+                continue
+            paths[pk] = f'{parent_path}{pk:0{PATH_STEP}d}/'
+            stack.extend((child, paths[pk]) for child in children[pk])
+
+    walk(children[None])
+    for pk in sorted(parents):
+        if pk not in paths:
+            walk([pk])
+
+    CourseContent.objects.bulk_update([CourseContent(id=pk, path=path, depth=path.count('/') - 1) for pk, path in paths.items()], ['path', 'depth'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0006_course_catalog_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursecontent',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='kedalaman'),
+        ),
+        migrations.AddField(
+            model_name='coursecontent',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255, verbose_name='jalur'),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0007_coursecontent_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerLease',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='nama')),
+                ('owner', models.CharField(max_length=255, verbose_name='pemilik')),
+                ('expires_at', models.DateTimeField(verbose_name='kedaluwarsa pada')),
+            ],
+            options={
+                'verbose_name': 'Lease Scheduler',
+                'verbose_name_plural': 'Lease Scheduler',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='coursecontent',
+            index=models.Index(fields=['is_published', 'release_time'], name='content_release_idx'),
+        ),
+    ]
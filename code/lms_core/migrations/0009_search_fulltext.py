@@ -0,0 +1,87 @@
+from django.db import migrations
+
+# Frozen copy of the full-text schema of lms_core.search.database as it was
+# when this migration was written; that module's post_migrate hook keeps
+# the schema up to date afterwards
+TABLES = ('lms_core_course', 'lms_core_coursecontent')
+
+
+def install_sqlite(schema_editor):
+    for table in TABLES:
+        fts = f'{table}_fts'
+        schema_editor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(name, description, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+        schema_editor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description); END')
+        schema_editor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END")
+        schema_editor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF name, description ON {table} BEGIN INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description); END")
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def uninstall_sqlite(schema_editor):
+    for table in TABLES:
+        fts = f'{table}_fts'
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts}_{trigger}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {fts}')
+
+
+def install_postgresql(schema_editor):
+    for table in TABLES:
+        schema_editor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (setweight(to_tsvector('simple', coalesce(name, '')), 'A') || setweight(to_tsvector('simple', coalesce(description, '')), 'C')) STORED")
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {table}_search_gin ON {table} USING GIN (search_vector)')
+
+
+def uninstall_postgresql(schema_editor):
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_gin')
+        schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+
+
+def mysql_indexes(schema_editor, table):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        return connection.introspection.get_constraints(cursor, table)
+
+
+def install_mysql(schema_editor):
+    for table in TABLES:
+        existing = mysql_indexes(schema_editor, table)
+        if f'{table}_search_ft' not in existing:
+            schema_editor.execute(f'CREATE FULLTEXT INDEX {table}_search_ft ON {table} (name, description)')
+        if f'{table}_name_ft' not in existing:
+            schema_editor.execute(f'CREATE FULLTEXT INDEX {table}_name_ft ON {table} (name)')
+
+
+def uninstall_mysql(schema_editor):
+    for table in TABLES:
+        existing = mysql_indexes(schema_editor, table)
+        for index in (f'{table}_search_ft', f'{table}_name_ft'):
+            if index in existing:
+                schema_editor.execute(f'DROP INDEX {index} ON {table}')
+
+
+VENDORS = {
+    'sqlite': (install_sqlite, uninstall_sqlite),
+    'postgresql': (install_postgresql, uninstall_postgresql),
+    'mysql': (install_mysql, uninstall_mysql),
+}
+
+
+def install(apps, schema_editor):
+    if schema_editor.connection.vendor in VENDORS:
+        VENDORS[schema_editor.connection.vendor][0](schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    if schema_editor.connection.vendor in VENDORS:
+        VENDORS[schema_editor.connection.vendor][1](schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0008_release_scheduler'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0009_search_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_id', 'is_approved', '-created_at', '-id'], name='comment_listing_idx'),
+        ),
+    ]
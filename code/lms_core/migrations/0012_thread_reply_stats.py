@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:32
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reply_stats(apps, schema_editor):
+    DiscussionThread = apps.get_model('lms_core', 'DiscussionThread')
+    DiscussionReply = apps.get_model('lms_core', 'DiscussionReply')
+    replies = DiscussionReply.objects.filter(thread=OuterRef('pk')).order_by().values('thread')
+    DiscussionThread.objects.update(
+        reply_count=Coalesce(Subquery(replies.annotate(count=Count('id')).values('count')), 0),
+        last_reply_at=Subquery(replies.annotate(last=Max('created_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0011_comment_is_flagged'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discussionthread',
+            name='last_reply_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='balasan terakhir'),
+        ),
+        migrations.AddField(
+            model_name='discussionthread',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='jumlah balasan'),
+        ),
+        migrations.RunPython(backfill_reply_stats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='discussionthread',
+            index=models.Index(fields=['course', '-is_pinned', '-updated_at', '-id'], name='thread_listing_idx'),
+        ),
+    ]
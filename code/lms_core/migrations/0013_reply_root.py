@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:33
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_root_replies(apps, schema_editor):
+    DiscussionReply = apps.get_model('lms_core', 'DiscussionReply')
+    parents = dict(DiscussionReply.objects.values_list('id', 'parent_reply_id'))
+
+    def root_of(reply_id):
+        while parents[reply_id] is not None:
+            reply_id = parents[reply_id]
+        return reply_id
+
+    by_root = defaultdict(list)
+    for reply_id, parent_id in parents.items():
+        if parent_id is not None:
+            by_root[root_of(reply_id)].append(reply_id)
+    for root_id, reply_ids in by_root.items():
+        for start in range(0, len(reply_ids), 500):
+            DiscussionReply.objects.filter(id__in=reply_ids[start:start + 500]).update(root_reply_id=root_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0012_thread_reply_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discussionreply',
+            name='root_reply',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='descendants', to='lms_core.discussionreply', verbose_name='balasan akar'),
+        ),
+        migrations.RunPython(backfill_root_replies, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='discussionreply',
+            index=models.Index(fields=['thread', 'root_reply', 'created_at', 'id'], name='reply_tree_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:35
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_forum_stats(apps, schema_editor):
+    DiscussionThread = apps.get_model('lms_core', 'DiscussionThread')
+    DiscussionReply = apps.get_model('lms_core', 'DiscussionReply')
+    ForumStats = apps.get_model('lms_core', 'ForumStats')
+    ForumActivity = apps.get_model('lms_core', 'ForumActivity')
+
+    totals = DiscussionThread.objects.order_by().values('course_id').annotate(threads=Count('id'), replies=Sum('reply_count'))
+    ForumStats.objects.bulk_create(
+        [ForumStats(course_id=row['course_id'], total_threads=row['threads'], total_replies=row['replies'] or 0) for row in totals],
+        batch_size=1000,
+    )
+
+    posts = Counter()
+    for thread in DiscussionThread.objects.annotate(day=TruncDate('created_at')).values('course_id', 'id', 'day'):
+        posts[(thread['course_id'], thread['id'], thread['day'])] += 1
+    replies = DiscussionReply.objects.order_by().annotate(day=TruncDate('created_at')).values('thread__course_id', 'thread_id', 'day').annotate(posts=Count('id'))
+    for row in replies:
+        posts[(row['thread__course_id'], row['thread_id'], row['day'])] += row['posts']
+    ForumActivity.objects.bulk_create(
+        [ForumActivity(course_id=course_id, thread_id=thread_id, day=day, posts=count) for (course_id, thread_id, day), count in posts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0013_reply_root'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForumStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='lms_core.course', verbose_name='kursus')),
+                ('total_threads', models.PositiveIntegerField(default=0, verbose_name='jumlah thread')),
+                ('total_replies', models.PositiveIntegerField(default=0, verbose_name='jumlah balasan')),
+            ],
+            options={
+                'verbose_name': 'Statistik Forum',
+                'verbose_name_plural': 'Statistik Forum',
+            },
+        ),
+        migrations.CreateModel(
+            name='ForumActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='tanggal')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='jumlah posting')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lms_core.course', verbose_name='kursus')),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lms_core.discussionthread', verbose_name='thread')),
+            ],
+            options={
+                'verbose_name': 'Aktivitas Forum',
+                'verbose_name_plural': 'Aktivitas Forum',
+                'indexes': [models.Index(fields=['course', 'day'], name='forum_activity_idx')],
+                'constraints': [models.UniqueConstraint(fields=('thread', 'day'), name='forum_activity_thread_day')],
+            },
+        ),
+        migrations.RunPython(backfill_forum_stats, migrations.RunPython.noop),
+    ]
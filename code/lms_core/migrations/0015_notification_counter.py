@@ -0,0 +1,58 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    Notification = apps.get_model('lms_core', 'Notification')
+    NotificationCounter = apps.get_model('lms_core', 'NotificationCounter')
+    counters = {}
+    rows = Notification.objects.order_by().values('recipient_id', 'notification_type').annotate(total=Count('id'), unread=Count('id', filter=Q(is_read=False)))
+    for row in rows:
+        counter = counters.setdefault(row['recipient_id'], NotificationCounter(user_id=row['recipient_id']))
+        counter.total += row['total']
+        counter.unread += row['unread']
+        type_field = f"{row['notification_type']}_count"
+        if hasattr(counter, type_field):
+            setattr(counter, type_field, getattr(counter, type_field) + row['total'])
+    NotificationCounter.objects.bulk_create(counters.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('lms_core', '0014_forum_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='pengguna')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='jumlah')),
+                ('unread', models.PositiveIntegerField(default=0, verbose_name='belum dibaca')),
+                ('enrollment_count', models.PositiveIntegerField(default=0, verbose_name='notifikasi enrollment')),
+                ('new_content_count', models.PositiveIntegerField(default=0, verbose_name='notifikasi konten baru')),
+                ('assignment_count', models.PositiveIntegerField(default=0, verbose_name='notifikasi tugas')),
+                ('discussion_count', models.PositiveIntegerField(default=0, verbose_name='notifikasi diskusi')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='notifikasi komentar')),
+                ('completion_count', models.PositiveIntegerField(default=0, verbose_name='notifikasi penyelesaian')),
+                ('certificate_count', models.PositiveIntegerField(default=0, verbose_name='notifikasi sertifikat')),
+                ('announcement_count', models.PositiveIntegerField(default=0, verbose_name='notifikasi pengumuman')),
+            ],
+            options={
+                'verbose_name': 'Penghitung Notifikasi',
+                'verbose_name_plural': 'Penghitung Notifikasi',
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read', '-created_at'], name='notification_inbox_idx'),
+        ),
+    ]
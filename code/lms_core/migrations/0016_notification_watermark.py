@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0015_notification_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='dibaca semua pada'),
+        ),
+    ]
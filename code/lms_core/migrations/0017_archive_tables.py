@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0016_notification_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='is_archived',
+            field=models.BooleanField(default=False, verbose_name='Diarsipkan'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('course_id', models.BigIntegerField(verbose_name='kursus')),
+                ('content_id', models.BigIntegerField(verbose_name='konten')),
+                ('member_id', models.BigIntegerField(verbose_name='pengguna')),
+                ('comment', models.TextField(verbose_name='komentar')),
+                ('is_approved', models.BooleanField(verbose_name='disetujui')),
+                ('is_flagged', models.BooleanField(verbose_name='ditandai')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='diarsipkan pada')),
+            ],
+            options={
+                'verbose_name': 'Arsip Komentar',
+                'verbose_name_plural': 'Arsip Komentar',
+                'indexes': [models.Index(fields=['course_id', 'id'], name='archived_comment_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('recipient_id', models.BigIntegerField(verbose_name='penerima')),
+                ('sender_id', models.BigIntegerField(blank=True, null=True, verbose_name='pengirim')),
+                ('title', models.CharField(max_length=200, verbose_name='judul')),
+                ('message', models.TextField(verbose_name='pesan')),
+                ('notification_type', models.CharField(choices=[('enrollment', 'Enrollment'), ('new_content', 'New Content'), ('assignment', 'Assignment'), ('discussion', 'Discussion'), ('comment', 'Comment'), ('completion', 'Completion'), ('certificate', 'Certificate'), ('announcement', 'Announcement')], max_length=20, verbose_name='tipe')),
+                ('is_read', models.BooleanField(verbose_name='sudah dibaca')),
+                ('related_course_id', models.BigIntegerField(blank=True, null=True, verbose_name='kursus terkait')),
+                ('related_content_id', models.BigIntegerField(blank=True, null=True, verbose_name='konten terkait')),
+                ('action_url', models.CharField(blank=True, max_length=500, null=True, verbose_name='URL aksi')),
+                ('created_at', models.DateTimeField(verbose_name='dibuat pada')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='diarsipkan pada')),
+            ],
+            options={
+                'verbose_name': 'Arsip Notifikasi',
+                'verbose_name_plural': 'Arsip Notifikasi',
+                'indexes': [models.Index(fields=['recipient_id', 'created_at'], name='archived_notification_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0017_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='ditinjau pada'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='ditinjau pada'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0018_comment_reviewed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('enrollment', 'Enrollment'), ('new_content', 'New Content'), ('assignment', 'Assignment'), ('discussion', 'Discussion'), ('comment', 'Comment'), ('completion', 'Completion'), ('certificate', 'Certificate'), ('announcement', 'Announcement')], max_length=20, verbose_name='tipe')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='jumlah event')),
+                ('fields', models.JSONField(default=dict, verbose_name='data event terakhir')),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now, verbose_name='event pertama')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_digests', to='lms_core.course', verbose_name='kursus')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_digests', to=settings.AUTH_USER_MODEL, verbose_name='penerima')),
+            ],
+            options={
+                'verbose_name': 'Digest Tertunda',
+                'verbose_name_plural': 'Digest Tertunda',
+                'indexes': [models.Index(fields=['first_seen'], name='pending_digest_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('recipient', 'notification_type', 'course'), name='pending_digest_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:17
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_pending_releases(apps, schema_editor):
+    # Unpublished contents scheduled for later were released by the old
+    # scheduler; past ones may have been unpublished on purpose
+    CourseContent = apps.get_model('lms_core', 'CourseContent')
+    CourseContent.objects.filter(
+        is_published=False, release_time__gt=timezone.now()
+    ).update(release_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0019_pendingdigest'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='coursecontent',
+            name='content_release_idx',
+        ),
+        migrations.AddField(
+            model_name='coursecontent',
+            name='release_pending',
+            field=models.BooleanField(default=False, verbose_name='menunggu rilis'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecontent',
+            index=models.Index(fields=['release_pending', 'release_time'], name='content_release_idx'),
+        ),
+        migrations.RunPython(mark_pending_releases, migrations.RunPython.noop),
+    ]
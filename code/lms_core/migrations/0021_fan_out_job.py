@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0020_content_release_pending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FanOutJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exclude_user_id', models.BigIntegerField(blank=True, null=True, verbose_name='kecuali pengguna')),
+                ('fields', models.JSONField(default=dict, verbose_name='data notifikasi')),
+                ('last_user_id', models.BigIntegerField(default=0, verbose_name='penerima terakhir')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='dibuat pada')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fan_out_jobs', to='lms_core.course', verbose_name='kursus')),
+            ],
+            options={
+                'verbose_name': 'Antrian Fan-out',
+                'verbose_name_plural': 'Antrian Fan-out',
+            },
+        ),
+    ]
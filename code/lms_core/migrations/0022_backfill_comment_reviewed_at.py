@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:40
+
+from django.db import migrations
+from django.db.models import F
+
+
+def backfill_reviewed_at(apps, schema_editor):
+    # Before reviewed_at, a rejected comment was only told apart from a
+    # pending one by having been saved again after it was created
+    for model_name in ('Comment', 'ArchivedComment'):
+        model = apps.get_model('lms_core', model_name)
+        model.objects.filter(
+            is_approved=False,
+            reviewed_at__isnull=True,
+            updated_at__gt=F('created_at'),
+        ).update(reviewed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0021_fan_out_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_reviewed_at, migrations.RunPython.noop),
+    ]
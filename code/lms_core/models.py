@@ -1,5 +1,8 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DEFERRED, Case, F, Q, Value, When
+from django.db.models.functions import Coalesce, Concat, Greatest, Substr
+from django.utils import timezone
 
 
 # Create your models here.
@@ -12,6 +15,7 @@ class Course(models.Model):
         User, verbose_name="Pengajar", on_delete=models.RESTRICT
     )
     max_students = models.IntegerField("Maksimal Siswa", null=True, blank=True)
+    is_archived = models.BooleanField("Diarsipkan", default=False)
     created_at = models.DateTimeField("Dibuat pada", auto_now_add=True)
     updated_at = models.DateTimeField("Diperbarui pada", auto_now=True)
 
@@ -22,6 +26,10 @@ class Course(models.Model):
         verbose_name = "Mata Kuliah"
         verbose_name_plural = "Data Mata Kuliah"
         ordering = ["-created_at"]
+        indexes = [
+            # keyset pagination of the catalog on (created_at, id)
+            models.Index(fields=["-created_at", "-id"], name="course_catalog_idx"),
+        ]
 
     def is_member(self, user):
         return CourseMember.objects.filter(course_id=self, user_id=user).exists()
@@ -55,6 +63,10 @@ class CourseMember(models.Model):
         return f"{self.id} {self.course_id} : {self.user_id}"
 
 
+# Digits per level in CourseContent.path ("0000000012/0000000045/")
+PATH_STEP = 10
+
+
 class CourseContent(models.Model):
     name = models.CharField("judul konten", max_length=200)
     description = models.TextField("deskripsi", default="-")
@@ -68,16 +80,135 @@ class CourseContent(models.Model):
     )
     release_time = models.DateTimeField("waktu rilis", null=True, blank=True)
     is_published = models.BooleanField("dipublikasi", default=False)
+    # Set by scheduling, cleared by publish/unpublish and by the release
+    # scheduler, which only publishes contents that have it
+    release_pending = models.BooleanField("menunggu rilis", default=False)
+    # Materialized path of ancestor ids (self included), maintained on save
+    path = models.CharField(
+        "jalur", max_length=255, blank=True, default="", db_index=True, editable=False
+    )
+    depth = models.PositiveIntegerField("kedalaman", default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Konten Matkul"
         verbose_name_plural = "Konten Matkul"
+        indexes = [
+            # pending releases for the release scheduler
+            models.Index(
+                fields=["release_pending", "release_time"],
+                name="content_release_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.course_id} {self.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Read the raw value: a deferred parent_id (``only()``) would cost a
+        # query per row, and save() treats an unknown parent as moved
+        instance._saved_parent_id = instance.__dict__.get("parent_id_id", DEFERRED)
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        # path/depth are only written by _sync_path, so a stale instance
+        # can't overwrite a path changed by an ancestor's move
+        if not adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ("path", "depth")
+            ]
+        moved = (
+            adding
+            or not self.path
+            or getattr(self, "_saved_parent_id", None) != self.parent_id_id
+        )
+        # The row and its subtree's paths change together or not at all
+        with transaction.atomic():
+            if moved and not adding:
+                self._stored_paths()
+            super().save(*args, **kwargs)
+            if moved:
+                self._sync_path()
+        self._saved_parent_id = self.parent_id_id
+
+    def _stored_paths(self):
+        """Return (own path, parent path) from the database, rejecting cycles"""
+        paths = dict(
+            CourseContent.objects.filter(
+                pk__in=[self.pk, self.parent_id_id]
+            ).values_list("pk", "path")
+        )
+        own_path = paths.get(self.pk, "")
+        parent_path = paths.get(self.parent_id_id, "")
+        if self.parent_id_id == self.pk or (
+            own_path and parent_path.startswith(own_path)
+        ):
+            raise ValueError("Cannot move content under its own subtree")
+        return own_path, parent_path
+
+    def _sync_path(self):
+        """Recompute this node's path and shift its subtree with one UPDATE"""
+        old_path, parent_path = self._stored_paths()
+        new_path = f"{parent_path}{self.pk:0{PATH_STEP}d}/"
+        new_depth = new_path.count("/") - 1
+        if new_path != old_path:
+            CourseContent.objects.filter(pk=self.pk).update(
+                path=new_path, depth=new_depth
+            )
+            if old_path:
+                old_depth = old_path.count("/") - 1
+                CourseContent.objects.filter(path__startswith=old_path).exclude(
+                    pk=self.pk
+                ).update(
+                    path=Concat(Value(new_path), Substr("path", len(old_path) + 1)),
+                    depth=F("depth") + (new_depth - old_depth),
+                )
+        self.path, self.depth = new_path, new_depth
+
+    def move_to(self, parent):
+        """Re-parent this content (``None`` for a root) together with its subtree"""
+        self.parent_id = parent
+        self.save()
+
+    def descendants(self, max_depth=None):
+        """Contents below this one as a single indexed prefix-range query"""
+        if not self.path:
+            # Unsaved: an empty prefix would match every content
+            return CourseContent.objects.none()
+        queryset = CourseContent.objects.filter(
+            course_id=self.course_id_id, path__startswith=self.path
+        ).exclude(pk=self.pk)
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=self.depth + max_depth)
+        return queryset
+
+    def descendant_count(self):
+        return self.descendants().count()
+
+    def ancestors(self):
+        """Ancestors from the root down, read by primary key from the path"""
+        ancestor_ids = [int(step) for step in self.path.split("/")[:-2]]
+        return CourseContent.objects.filter(pk__in=ancestor_ids).order_by("depth")
+
+
+class SchedulerLease(models.Model):
+    name = models.CharField("nama", max_length=100, primary_key=True)
+    owner = models.CharField("pemilik", max_length=255)
+    expires_at = models.DateTimeField("kedaluwarsa pada")
+
+    class Meta:
+        verbose_name = "Lease Scheduler"
+        verbose_name_plural = "Lease Scheduler"
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.owner})"
+
 
 class Comment(models.Model):
     content_id = models.ForeignKey(
@@ -88,12 +219,24 @@ class Comment(models.Model):
     )
     comment = models.TextField("komentar")
     is_approved = models.BooleanField("disetujui", default=False)
+    is_flagged = models.BooleanField("ditandai", default=False)
+    # Set when a moderator approves or rejects the comment; a rejected
+    # comment is unapproved like a pending one, this keeps the keyword
+    # pre-screen from approving it again
+    reviewed_at = models.DateTimeField("ditinjau pada", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Komentar"
         verbose_name_plural = "Komentar"
+        indexes = [
+            # keyset listing of a content's (approved) comments, newest first
+            models.Index(
+                fields=["content_id", "is_approved", "-created_at", "-id"],
+                name="comment_listing_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return "Komen: " + str(self.member_id.user_id) + "-" + self.comment
@@ -198,6 +341,13 @@ class DiscussionThread(models.Model):
     author = models.ForeignKey(User, verbose_name="penulis", on_delete=models.CASCADE)
     is_pinned = models.BooleanField("disematkan", default=False)
     is_locked = models.BooleanField("dikunci", default=False)
+    # Maintained by DiscussionReply.save() and the reply post_delete signal
+    reply_count = models.PositiveIntegerField(
+        "jumlah balasan", default=0, editable=False
+    )
+    last_reply_at = models.DateTimeField(
+        "balasan terakhir", null=True, blank=True, editable=False
+    )
     created_at = models.DateTimeField("dibuat pada", auto_now_add=True)
     updated_at = models.DateTimeField("diperbarui pada", auto_now=True)
 
@@ -205,12 +355,35 @@ class DiscussionThread(models.Model):
         verbose_name = "Thread Diskusi"
         verbose_name_plural = "Thread Diskusi"
         ordering = ["-is_pinned", "-updated_at"]
+        indexes = [
+            # Forum listing of a course: WHERE course_id = ? ORDER BY
+            # is_pinned DESC, updated_at DESC, id DESC
+            models.Index(
+                fields=["course", "-is_pinned", "-updated_at", "-id"],
+                name="thread_listing_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.course.name} - {self.title}"
 
-    def reply_count(self):
-        return self.discussionreply_set.count()
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            # Reply stats are only written with F() updates, so saving a
+            # stale instance (pin, lock, edit) can't roll them back
+            if kwargs.get("update_fields") is None:
+                kwargs["update_fields"] = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.name not in ("reply_count", "last_reply_at")
+                ]
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ForumStats.add(self.course_id, threads=1)
+            ForumActivity.record(self.course_id, self.id, self.created_at)
 
     def last_reply(self):
         return self.discussionreply_set.order_by("-created_at").first()
@@ -229,6 +402,17 @@ class DiscussionReply(models.Model):
         null=True,
         blank=True,
     )
+    # Top-level ancestor (NULL for top-level replies), set once on insert:
+    # a page of top-level replies loads all its subtrees with one IN query
+    root_reply = models.ForeignKey(
+        "self",
+        verbose_name="balasan akar",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="descendants",
+    )
     is_solution = models.BooleanField("solusi", default=False)
     created_at = models.DateTimeField("dibuat pada", auto_now_add=True)
     updated_at = models.DateTimeField("diperbarui pada", auto_now=True)
@@ -237,10 +421,107 @@ class DiscussionReply(models.Model):
         verbose_name = "Balasan Diskusi"
         verbose_name_plural = "Balasan Diskusi"
         ordering = ["created_at"]
+        indexes = [
+            # Top-level replies of a thread: root_reply IS NULL, in order
+            models.Index(
+                fields=["thread", "root_reply", "created_at", "id"],
+                name="reply_tree_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.thread.title} - {self.author.username}"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding and self.parent_reply_id and self.root_reply_id is None:
+            parent = self.parent_reply
+            self.root_reply_id = parent.root_reply_id or parent.id
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                # A reply counts as thread activity, so it also bumps the
+                # thread up the forum listing
+                DiscussionThread.objects.filter(id=self.thread_id).update(
+                    reply_count=F("reply_count") + 1,
+                    last_reply_at=Greatest(
+                        Coalesce("last_reply_at", Value(self.created_at)),
+                        Value(self.created_at),
+                    ),
+                    updated_at=self.created_at,
+                )
+                course_id = self.thread.course_id
+                ForumStats.add(course_id, replies=1)
+                ForumActivity.record(course_id, self.thread_id, self.created_at)
+
+
+class ForumStats(models.Model):
+    """Running forum totals of a course, kept in step with thread/reply writes"""
+
+    course = models.OneToOneField(
+        Course, verbose_name="kursus", on_delete=models.CASCADE, primary_key=True
+    )
+    total_threads = models.PositiveIntegerField("jumlah thread", default=0)
+    total_replies = models.PositiveIntegerField("jumlah balasan", default=0)
+
+    class Meta:
+        verbose_name = "Statistik Forum"
+        verbose_name_plural = "Statistik Forum"
+
+    def __str__(self):
+        return f"{self.course.name} - forum"
+
+    @classmethod
+    def add(cls, course_id, threads=0, replies=0):
+        """Shift the totals of a course with one UPDATE, creating its row once"""
+        changes = {
+            "total_threads": F("total_threads") + threads,
+            "total_replies": F("total_replies") + replies,
+        }
+        if not cls.objects.filter(course_id=course_id).update(**changes):
+            cls.objects.get_or_create(course_id=course_id)
+            cls.objects.filter(course_id=course_id).update(**changes)
+
+
+class ForumActivity(models.Model):
+    """Posts (thread start or reply) per thread per day.
+
+    "Active in the last N days" is then a distinct count over at most one
+    row per thread and day, without touching the reply table.
+    """
+
+    course = models.ForeignKey(Course, verbose_name="kursus", on_delete=models.CASCADE)
+    thread = models.ForeignKey(
+        DiscussionThread, verbose_name="thread", on_delete=models.CASCADE
+    )
+    day = models.DateField("tanggal")
+    posts = models.PositiveIntegerField("jumlah posting", default=0)
+
+    class Meta:
+        verbose_name = "Aktivitas Forum"
+        verbose_name_plural = "Aktivitas Forum"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["thread", "day"], name="forum_activity_thread_day"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["course", "day"], name="forum_activity_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.thread.title} - {self.day}"
+
+    @classmethod
+    def record(cls, course_id, thread_id, when):
+        day = timezone.localdate(when)
+        rows = cls.objects.filter(thread_id=thread_id, day=day)
+        if not rows.update(posts=F("posts") + 1):
+            cls.objects.get_or_create(
+                thread_id=thread_id, day=day, defaults={"course_id": course_id}
+            )
+            rows.update(posts=F("posts") + 1)
+
 
 NOTIFICATION_TYPES = [
     ("enrollment", "Enrollment"),
@@ -296,10 +577,118 @@ class Notification(models.Model):
         verbose_name = "Notifikasi"
         verbose_name_plural = "Notifikasi"
         ordering = ["-created_at"]
+        indexes = [
+            # A user's inbox, optionally unread only, newest first
+            models.Index(
+                fields=["recipient", "is_read", "-created_at"],
+                name="notification_inbox_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.recipient.username} - {self.title}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            NotificationCounter.add(
+                [self.recipient_id],
+                self.notification_type,
+                unread=0 if self.is_read else 1,
+                created_at=self.created_at,
+            )
+
+
+class NotificationCounter(models.Model):
+    """A user's notification totals, so badge counts are one primary-key read.
+
+    Kept in step by Notification.save(), the fan-out's bulk inserts, the
+    read endpoints and the notification post_delete signal, always with F()
+    updates. There is one ``<type>_count`` column per NOTIFICATION_TYPES.
+
+    ``last_read_at`` is the "mark all as read" watermark: a notification is
+    unread only while ``is_read`` is False and it was created after it.
+    """
+
+    user = models.OneToOneField(
+        User,
+        verbose_name="pengguna",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="notification_counter",
+    )
+    total = models.PositiveIntegerField("jumlah", default=0)
+    unread = models.PositiveIntegerField("belum dibaca", default=0)
+    last_read_at = models.DateTimeField("dibaca semua pada", null=True, blank=True)
+    enrollment_count = models.PositiveIntegerField("notifikasi enrollment", default=0)
+    new_content_count = models.PositiveIntegerField("notifikasi konten baru", default=0)
+    assignment_count = models.PositiveIntegerField("notifikasi tugas", default=0)
+    discussion_count = models.PositiveIntegerField("notifikasi diskusi", default=0)
+    comment_count = models.PositiveIntegerField("notifikasi komentar", default=0)
+    completion_count = models.PositiveIntegerField("notifikasi penyelesaian", default=0)
+    certificate_count = models.PositiveIntegerField("notifikasi sertifikat", default=0)
+    announcement_count = models.PositiveIntegerField("notifikasi pengumuman", default=0)
+
+    class Meta:
+        verbose_name = "Penghitung Notifikasi"
+        verbose_name_plural = "Penghitung Notifikasi"
+
+    def __str__(self):
+        return f"{self.user.username} - {self.unread}/{self.total}"
+
+    def by_type(self):
+        counts = {
+            notification_type: getattr(self, f"{notification_type}_count")
+            for notification_type, _ in NOTIFICATION_TYPES
+        }
+        return {key: count for key, count in counts.items() if count}
+
+    @classmethod
+    def add(cls, user_ids, notification_type, total=1, unread=1, created_at=None):
+        """Shift the counters of ``user_ids`` with one UPDATE.
+
+        Users without a row get one with one INSERT (skipping rows created
+        meanwhile) and a second UPDATE. Negative values subtract (deletes,
+        reads). With ``created_at``, ``unread`` only applies to counters
+        whose watermark is older, since the notification is already read
+        for the others.
+        """
+        changes = {}
+        if total:
+            changes["total"] = F("total") + total
+            type_field = f"{notification_type}_count"
+            changes[type_field] = F(type_field) + total
+        if unread:
+            changes["unread"] = F("unread") + unread
+            if created_at is not None:
+                changes["unread"] = Case(
+                    When(
+                        Q(last_read_at__isnull=True) | Q(last_read_at__lt=created_at),
+                        then=changes["unread"],
+                    ),
+                    default=F("unread"),
+                    output_field=models.PositiveIntegerField(),
+                )
+        if not changes:
+            return
+        existing = set(
+            cls.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True)
+        )
+        if existing:
+            cls.objects.filter(user_id__in=existing).update(**changes)
+        missing = set(user_ids) - existing
+        if missing:
+            # A row another request inserts meanwhile is skipped by the
+            # INSERT and still gets this batch's change: every id is
+            # updated exactly once
+            cls.objects.bulk_create(
+                [cls(user_id=user_id) for user_id in missing], ignore_conflicts=True
+            )
+            cls.objects.filter(user_id__in=missing).update(**changes)
+
 
 class NotificationPreference(models.Model):
     user = models.OneToOneField(
@@ -328,3 +717,143 @@ class NotificationPreference(models.Model):
 
     def __str__(self):
         return f"{self.user.username} notification preferences"
+
+
+class PendingDigest(models.Model):
+    """Coalescible notifications waiting for their digest window.
+
+    One row per (recipient, type, course): every event bumps ``count`` and
+    replaces ``fields`` (the Notification fields of the latest event).
+    run_notification_worker writes the rows whose window has passed, so
+    pending events survive a worker being killed.
+    """
+
+    recipient = models.ForeignKey(
+        User,
+        verbose_name="penerima",
+        on_delete=models.CASCADE,
+        related_name="pending_digests",
+    )
+    notification_type = models.CharField(
+        "tipe", max_length=20, choices=NOTIFICATION_TYPES
+    )
+    course = models.ForeignKey(
+        Course,
+        verbose_name="kursus",
+        on_delete=models.CASCADE,
+        related_name="pending_digests",
+    )
+    count = models.PositiveIntegerField("jumlah event", default=0)
+    fields = models.JSONField("data event terakhir", default=dict)
+    first_seen = models.DateTimeField("event pertama", default=timezone.now)
+
+    class Meta:
+        verbose_name = "Digest Tertunda"
+        verbose_name_plural = "Digest Tertunda"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipient", "notification_type", "course"],
+                name="pending_digest_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["first_seen"], name="pending_digest_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id} - {self.notification_type} x{self.count}"
+
+
+class FanOutJob(models.Model):
+    """A notification for every member of a course, waiting to be written.
+
+    notify_course inserts the row in the caller's transaction and
+    run_notification_worker writes the notifications in chunks of members
+    ordered by id. ``last_user_id`` moves in the same transaction as each
+    chunk, so a restarted worker resumes after the last written member.
+    """
+
+    course = models.ForeignKey(
+        Course,
+        verbose_name="kursus",
+        on_delete=models.CASCADE,
+        related_name="fan_out_jobs",
+    )
+    exclude_user_id = models.BigIntegerField("kecuali pengguna", null=True, blank=True)
+    fields = models.JSONField("data notifikasi", default=dict)
+    last_user_id = models.BigIntegerField("penerima terakhir", default=0)
+    created_at = models.DateTimeField("dibuat pada", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Antrian Fan-out"
+        verbose_name_plural = "Antrian Fan-out"
+
+    def __str__(self):
+        return f"{self.course_id} - {self.fields.get('title', '')}"
+
+
+class ArchivedNotification(models.Model):
+    """A Notification moved out of the hot table by the retention job.
+
+    The original id is kept as the primary key and references are plain
+    ids without constraints, so the archive neither slows down writes to
+    users, courses and contents nor cascades with them.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    recipient_id = models.BigIntegerField("penerima")
+    sender_id = models.BigIntegerField("pengirim", null=True, blank=True)
+    title = models.CharField("judul", max_length=200)
+    message = models.TextField("pesan")
+    notification_type = models.CharField(
+        "tipe", max_length=20, choices=NOTIFICATION_TYPES
+    )
+    is_read = models.BooleanField("sudah dibaca")
+    related_course_id = models.BigIntegerField("kursus terkait", null=True, blank=True)
+    related_content_id = models.BigIntegerField("konten terkait", null=True, blank=True)
+    action_url = models.CharField("URL aksi", max_length=500, null=True, blank=True)
+    created_at = models.DateTimeField("dibuat pada")
+    archived_at = models.DateTimeField("diarsipkan pada", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Arsip Notifikasi"
+        verbose_name_plural = "Arsip Notifikasi"
+        indexes = [
+            # restoring one user's notifications for an audit
+            models.Index(
+                fields=["recipient_id", "created_at"], name="archived_notification_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id} - {self.title}"
+
+
+class ArchivedComment(models.Model):
+    """A Comment of an archived course, moved out of the hot table.
+
+    Keeps the original id and the course id, so a course's comments can be
+    restored in one go.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    course_id = models.BigIntegerField("kursus")
+    content_id = models.BigIntegerField("konten")
+    member_id = models.BigIntegerField("pengguna")
+    comment = models.TextField("komentar")
+    is_approved = models.BooleanField("disetujui")
+    is_flagged = models.BooleanField("ditandai")
+    reviewed_at = models.DateTimeField("ditinjau pada", null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField("diarsipkan pada", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Arsip Komentar"
+        verbose_name_plural = "Arsip Komentar"
+        indexes = [
+            models.Index(fields=["course_id", "id"], name="archived_comment_idx"),
+        ]
+
+    def __str__(self):
+        return f"Arsip komen {self.id}: {self.comment}"
@@ -0,0 +1,199 @@
+import threading
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from lms_core.models import Comment
+from lms_core.search.tokenizer import normalize
+
+APPROVE = "approve"
+HOLD = "hold"
+FLAG = "flag"
+ALLOW = "allow"
+
+# A flag hit outranks a hold hit; no hits at all means auto-approval
+DECISION_ORDER = (FLAG, HOLD)
+
+
+def normalize_text(text):
+    """Lowercase, accent-free text with whitespace runs collapsed to one space"""
+    return " ".join(normalize(text).split())
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: every pattern is found in one pass over the text.
+
+    Patterns are (phrase, kind) pairs compiled into a trie with failure
+    links; ``find`` walks the text once and reports whole-word hits, so a
+    blocked "ass" does not fire inside "class".
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+        for phrase, kind in patterns:
+            phrase = normalize_text(phrase)
+            if phrase:
+                self._insert(phrase, kind)
+        self._link()
+
+    def _insert(self, phrase, kind):
+        state = 0
+        for char in phrase:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(())
+            state = next_state
+        # Word boundaries are only required at alphanumeric edges, so
+        # "http://" still matches inside "http://spam.example"
+        self.outputs[state] += (
+            (len(phrase), kind, phrase[0].isalnum(), phrase[-1].isalnum()),
+        )
+
+    def _link(self):
+        """Breadth-first failure links; outputs inherit their fallback's"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+                self.outputs[next_state] += self.outputs[self.fail[next_state]]
+
+    def find(self, text):
+        """Return [(start, end, kind)] of whole-word hits in normalized text"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        hits = []
+        state = 0
+        length = len(text)
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for size, kind, word_start, word_end in outputs[state]:
+                start = end - size + 1
+                if word_start and start and text[start - 1].isalnum():
+                    continue
+                if word_end and end + 1 < length and text[end + 1].isalnum():
+                    continue
+                hits.append((start, end + 1, kind))
+        return hits
+
+
+class CommentScreener:
+    """Decide approve / hold / flag for a comment from configured term lists.
+
+    Flag terms hold the comment and mark it for moderators, hold terms only
+    keep it out of the approved listing, and allowlisted phrases cancel any
+    hit they cover ("anak anjing" allowed while "anjing" is flagged).
+    """
+
+    def __init__(self, flag_terms=(), hold_terms=(), allow_terms=()):
+        self.matcher = AhoCorasick(
+            [
+                *((term, FLAG) for term in flag_terms),
+                *((term, HOLD) for term in hold_terms),
+                *((term, ALLOW) for term in allow_terms),
+            ]
+        )
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            getattr(settings, "LMS_COMMENT_BLOCKLIST", ()),
+            getattr(settings, "LMS_COMMENT_HOLDLIST", ()),
+            getattr(settings, "LMS_COMMENT_ALLOWLIST", ()),
+        )
+
+    def matches(self, text):
+        """Return [(term, kind)] of the hits not covered by an allowed phrase"""
+        text = normalize_text(text)
+        hits = self.matcher.find(text)
+        allowed = [(start, end) for start, end, kind in hits if kind == ALLOW]
+        return [
+            (text[start:end], kind)
+            for start, end, kind in hits
+            if kind != ALLOW
+            and not any(low <= start and end <= high for low, high in allowed)
+        ]
+
+    def screen(self, text):
+        kinds = {kind for _, kind in self.matches(text)}
+        for decision in DECISION_ORDER:
+            if decision in kinds:
+                return decision
+        return APPROVE
+
+
+def moderation_fields(decision):
+    """Comment field values for a screening decision"""
+    return {"is_approved": decision == APPROVE, "is_flagged": decision == FLAG}
+
+
+def screen_pending_comments(screener, batch_size=1000, dry_run=False):
+    """Screen the moderation backlog: unapproved, unflagged comments that
+    no moderator has reviewed yet.
+
+    Comments are read in primary-key chunks and every decision in a chunk
+    is applied with one UPDATE, so held comments are left untouched and
+    each chunk costs at most three queries. Returns a Counter of decisions.
+    """
+    decisions = Counter()
+    pending = Comment.objects.filter(
+        is_approved=False, is_flagged=False, reviewed_at__isnull=True
+    )
+    last_id = 0
+    while True:
+        batch = list(
+            pending.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "comment")[:batch_size]
+        )
+        if not batch:
+            return decisions
+        last_id = batch[-1][0]
+
+        ids_by_decision = defaultdict(list)
+        for comment_id, text in batch:
+            ids_by_decision[screener.screen(text)].append(comment_id)
+        for decision, ids in ids_by_decision.items():
+            decisions[decision] += len(ids)
+            if decision != HOLD and not dry_run:
+                Comment.objects.filter(id__in=ids).update(
+                    updated_at=timezone.now(), **moderation_fields(decision)
+                )
+
+
+_screener = None
+_screener_lock = threading.Lock()
+
+
+def get_comment_screener():
+    """Return the screener compiled once per process from settings"""
+    global _screener
+    screener = _screener
+    if screener is None:
+        with _screener_lock:
+            if _screener is None:
+                _screener = CommentScreener.from_settings()
+            screener = _screener
+    return screener
+
+
+@receiver(setting_changed)
+def term_lists_changed(setting, **kwargs):
+    global _screener
+    if setting.startswith("LMS_COMMENT_"):
+        _screener = None
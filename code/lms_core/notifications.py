@@ -0,0 +1,571 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from lms_core.caching import get_course_payloads
+from lms_core.models import (
+    CourseContent,
+    CourseMember,
+    FanOutJob,
+    Notification,
+    NotificationCounter,
+    NotificationPreference,
+    PendingDigest,
+)
+from lms_core.realtime import get_broker, publish_many, user_channel
+
+logger = logging.getLogger(__name__)
+
+# Rows per SELECT of recipients and per bulk INSERT; every chunk commits on
+# its own, so a 20k-member course never holds one long transaction
+FANOUT_CHUNK_SIZE = 1000
+
+# NotificationPreference flag per notification type; types without a flag
+# (assignment, certificate) always go out
+PREFERENCE_FIELDS = {
+    "enrollment": "enrollment_notifications",
+    "new_content": "content_notifications",
+    "discussion": "discussion_notifications",
+    "comment": "comment_notifications",
+    "completion": "completion_notifications",
+    "announcement": "announcement_notifications",
+}
+
+# Notifications returned by one long-poll response
+LONG_POLL_LIMIT = 50
+
+
+def course_recipients(course_id, notification_type, exclude_user_id=None):
+    """Member user ids of a course that accept ``notification_type``, by id.
+
+    The preference flag comes from a LEFT JOIN on NotificationPreference;
+    members without a preference row get the model default (True).
+    """
+    members = CourseMember.objects.filter(course_id=course_id)
+    if exclude_user_id is not None:
+        members = members.exclude(user_id=exclude_user_id)
+    field = PREFERENCE_FIELDS.get(notification_type)
+    if field:
+        members = members.annotate(
+            wants=Coalesce(
+                F(f"user_id__notification_preferences__{field}"), Value(True)
+            )
+        ).filter(wants=True)
+    return members.order_by("user_id").values_list("user_id", flat=True).distinct()
+
+
+def fan_out(recipients, chunk_size=FANOUT_CHUNK_SIZE, **fields):
+    """Create one Notification per recipient id, ``chunk_size`` rows at a time.
+
+    ``recipients`` is an ordered user id queryset: it is read in keyset
+    chunks (``user_id > last``) alternating with the INSERTs, so no cursor
+    stays open across writes. Returns the number of notifications created.
+    """
+    started = time.perf_counter()
+    created = 0
+    last_id = 0
+    while True:
+        chunk = list(recipients.filter(user_id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1]
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create(
+                [Notification(recipient_id=user_id, **fields) for user_id in chunk]
+            )
+            NotificationCounter.add(
+                chunk,
+                fields.get("notification_type", "announcement"),
+                created_at=notifications[0].created_at,
+            )
+        announce(notifications)
+        created += len(chunk)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Fanned out %d %s notifications in %.2fs (%.0f/s)",
+        created,
+        fields.get("notification_type", "announcement"),
+        elapsed,
+        created / elapsed if elapsed else 0,
+    )
+    return created
+
+
+def notification_event(notification):
+    """SSE payload of a new notification.
+
+    Rows from bulk_create have no id on backends that cannot return it
+    (MySQL), so the event is a wake-up: clients fetch the rows with
+    /notifications/poll?after=<last seen id> and only use ``id`` when set.
+    """
+    event = {
+        "type": "notification",
+        "notification_type": notification.notification_type,
+        "title": notification.title,
+        "created_at": notification.created_at,
+    }
+    if notification.id is not None:
+        event["id"] = notification.id
+    return event
+
+
+def announce(notifications):
+    """Wake the recipients' SSE streams and long-polls (call after commit)"""
+    publish_many(
+        [
+            (user_channel(notification.recipient_id), notification_event(notification))
+            for notification in notifications
+        ]
+    )
+
+
+def with_unread_state(notifications):
+    """Annotate ``is_unread``: not read one by one and newer than the
+    recipient's "mark all as read" watermark (``is_read`` alone misses the
+    watermark)
+    """
+    watermark = "recipient__notification_counter__last_read_at"
+    return notifications.annotate(
+        is_unread=Case(
+            When(
+                Q(is_read=False)
+                & (
+                    Q(**{f"{watermark}__isnull": True})
+                    | Q(**{f"{watermark}__lt": F("created_at")})
+                ),
+                then=Value(True),
+            ),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def notifications_after(user_id, after_id, limit=LONG_POLL_LIMIT, unread=False):
+    """The user's notifications with id > ``after_id``, oldest first, with
+    ``is_unread``; only the unread ones when ``unread``
+    """
+    if unread:
+        notifications = unread_notifications(user_id)
+    else:
+        notifications = Notification.objects.filter(recipient_id=user_id)
+    return list(
+        with_unread_state(notifications.filter(id__gt=after_id))
+        # Everything NotificationOut nests, the async view cannot lazy-load
+        .select_related(
+            "recipient",
+            "sender",
+            "related_course__teacher",
+            "related_content__course_id__teacher",
+        ).order_by("id")[:limit]
+    )
+
+
+async def wait_for_notifications(user_id, after_id, timeout, unread=False):
+    """Long-poll: notifications newer than ``after_id`` (see
+    notifications_after), waiting up to ``timeout`` seconds for one to be
+    announced.
+
+    The user's channel is subscribed before the first query, so nothing
+    committed in between is missed; a held request costs that query plus
+    one more when woken, none while it waits.
+    """
+    async with get_broker().subscribe([user_channel(user_id)]) as subscription:
+        notifications = await sync_to_async(notifications_after)(
+            user_id, after_id, unread=unread
+        )
+        if notifications:
+            return notifications
+        try:
+            if await subscription.get(timeout) is None:
+                return []
+        except EOFError:
+            pass
+    return await sync_to_async(notifications_after)(user_id, after_id, unread=unread)
+
+
+def unread_notifications(user_id):
+    """The user's unread notifications: not read one by one and newer than
+    the "mark all as read" watermark (served by notification_inbox_idx)
+    """
+    notifications = Notification.objects.filter(recipient_id=user_id, is_read=False)
+    watermark = (
+        NotificationCounter.objects.filter(user_id=user_id)
+        .values_list("last_read_at", flat=True)
+        .first()
+    )
+    if watermark is not None:
+        notifications = notifications.filter(created_at__gt=watermark)
+    return notifications
+
+
+def mark_all_read(user_id, now=None):
+    """Move the user's watermark to ``now``: one single-row write however
+    many notifications it covers
+    """
+    now = now or timezone.now()
+    counters = NotificationCounter.objects.filter(user_id=user_id)
+    if not counters.update(last_read_at=now, unread=0):
+        NotificationCounter.objects.get_or_create(
+            user_id=user_id, defaults={"last_read_at": now}
+        )
+    return now
+
+
+def notify_course(course_id, exclude_user_id=None, **fields):
+    """Queue a notification for every member of a course.
+
+    The job is a FanOutJob row inserted in the caller's transaction, so it
+    is only queued if the caller commits and survives a restart; the
+    request only pays for that INSERT. run_notification_worker writes the
+    notifications (see drain_fan_out_jobs).
+    """
+    fields.setdefault("notification_type", "announcement")
+    fields.setdefault("related_course_id", course_id)
+    FanOutJob.objects.create(
+        course_id=course_id, exclude_user_id=exclude_user_id, fields=fields
+    )
+
+
+def run_fan_out_chunk(job_id, chunk_size=FANOUT_CHUNK_SIZE):
+    """Write the next ``chunk_size`` notifications of a FanOutJob, deleting
+    the job once every member has one. Returns the number written.
+
+    The job row is locked and ``last_user_id`` moved in the chunk's
+    transaction, so a chunk is written exactly once even if the worker dies
+    or two workers pick the same job.
+    """
+    with transaction.atomic():
+        job = FanOutJob.objects.select_for_update().filter(id=job_id).first()
+        if job is None:
+            return 0
+        fields = dict(job.fields)
+        recipients = course_recipients(
+            job.course_id, fields["notification_type"], job.exclude_user_id
+        )
+        chunk = list(recipients.filter(user_id__gt=job.last_user_id)[:chunk_size])
+        if not chunk:
+            job.delete()
+            logger.info("Finished fan-out job %s for course %s", job_id, job.course_id)
+            return 0
+        # The job only keeps ids: a sender or content deleted since it was
+        # queued is dropped rather than failing the INSERT
+        sender_id = fields.get("sender_id")
+        if sender_id and not User.objects.filter(id=sender_id).exists():
+            fields["sender_id"] = None
+        content_id = fields.get("related_content_id")
+        if content_id and not CourseContent.objects.filter(id=content_id).exists():
+            fields.pop("related_content_id")
+        notifications = Notification.objects.bulk_create(
+            [Notification(recipient_id=user_id, **fields) for user_id in chunk]
+        )
+        NotificationCounter.add(
+            chunk, fields["notification_type"], created_at=notifications[0].created_at
+        )
+        job.last_user_id = chunk[-1]
+        job.save(update_fields=["last_user_id"])
+        transaction.on_commit(partial(announce, notifications))
+    return len(chunk)
+
+
+def drain_fan_out_jobs(chunk_size=FANOUT_CHUNK_SIZE):
+    """Write every queued FanOutJob, oldest first.
+
+    Jobs take turns one chunk at a time, so a 20k-member course does not
+    hold back an announcement to a small one. A failing job is logged and
+    left for the next run. Returns the number of notifications written.
+    """
+    written = 0
+    failed = set()
+    while True:
+        job_ids = list(
+            FanOutJob.objects.exclude(id__in=failed)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        if not job_ids:
+            return written
+        for job_id in job_ids:
+            try:
+                written += run_fan_out_chunk(job_id, chunk_size)
+            except Exception:
+                logger.exception("Notification fan-out job %s failed", job_id)
+                failed.add(job_id)
+
+
+# Title of a coalesced notification per type
+DIGEST_TITLES = {
+    "comment": "{count} new comments in {course}",
+    "discussion": "{count} new replies in {course}",
+}
+
+
+def shift_counters(rows, sign=1, unread=True, created_at=None):
+    """Count (recipient_id, notification_type) ``rows`` in or (sign=-1) out.
+
+    A recipient may have several rows of one type, so the counters get one
+    UPDATE per type and per number of rows; ``unread=False`` leaves the
+    unread counts alone (rows that were already read).
+    """
+    per_type = defaultdict(Counter)
+    for recipient_id, notification_type in rows:
+        per_type[notification_type][recipient_id] += 1
+    for notification_type, recipients in per_type.items():
+        by_amount = defaultdict(list)
+        for recipient_id, amount in recipients.items():
+            by_amount[amount].append(recipient_id)
+        for amount, user_ids in by_amount.items():
+            NotificationCounter.add(
+                user_ids,
+                notification_type,
+                total=sign * amount,
+                unread=sign * amount if unread else 0,
+                created_at=created_at,
+            )
+
+
+def write_digests(buckets, chunk_size=FANOUT_CHUNK_SIZE):
+    """Write [((recipient, type, course), [first_seen, count, fields])]: a
+    bucket of one event as that notification, larger ones as a digest
+    ("12 new replies in Course X")
+    """
+    wanted = defaultdict(set)
+    for (recipient_id, notification_type, _), _ in buckets:
+        wanted[PREFERENCE_FIELDS.get(notification_type)].add(recipient_id)
+    opted_out = set()
+    fields = [field for field in wanted if field]
+    if fields:
+        for row in NotificationPreference.objects.filter(
+            user_id__in=set().union(*wanted.values())
+        ).values("user_id", *fields):
+            opted_out.update(
+                (row["user_id"], field)
+                for field in fields
+                if not row[field] and row["user_id"] in wanted[field]
+            )
+
+    # Pending events only keep ids: senders and contents deleted since are
+    # dropped rather than failing the INSERT
+    senders = set(
+        User.objects.filter(
+            id__in={latest.get("sender_id") for _, (_, _, latest) in buckets}
+        ).values_list("id", flat=True)
+    )
+    contents = set(
+        CourseContent.objects.filter(
+            id__in={latest.get("related_content_id") for _, (_, _, latest) in buckets}
+        ).values_list("id", flat=True)
+    )
+    courses = get_course_payloads(list({course_id for (_, _, course_id), _ in buckets}))
+    notifications = []
+    for (recipient_id, notification_type, course_id), (_, count, latest) in buckets:
+        if (recipient_id, PREFERENCE_FIELDS.get(notification_type)) in opted_out:
+            continue
+        latest = dict(latest)
+        if latest.get("sender_id") not in senders:
+            latest["sender_id"] = None
+        if latest.get("related_content_id") not in contents:
+            latest.pop("related_content_id", None)
+        if count == 1:
+            notification = Notification(
+                recipient_id=recipient_id,
+                notification_type=notification_type,
+                related_course_id=course_id,
+                **latest,
+            )
+        else:
+            course = courses.get(course_id, {}).get("name", "")
+            title = DIGEST_TITLES.get(notification_type, "{count} new in {course}")
+            notification = Notification(
+                recipient_id=recipient_id,
+                notification_type=notification_type,
+                related_course_id=course_id,
+                title=title.format(count=count, course=course)[:200],
+                message=f"Latest: {latest.get('title', '')}",
+            )
+        notifications.append(notification)
+
+    for start in range(0, len(notifications), chunk_size):
+        chunk = notifications[start : start + chunk_size]
+        with transaction.atomic():
+            Notification.objects.bulk_create(chunk)
+            shift_counters(
+                [(n.recipient_id, n.notification_type) for n in chunk],
+                created_at=chunk[0].created_at,
+            )
+            transaction.on_commit(partial(announce, chunk))
+    return len(notifications)
+
+
+def queue_digest(recipient_ids, notification_type, course_id, fields, now=None):
+    """Count one event towards each recipient's pending digest.
+
+    Recipients without a pending row get one (count 0) with one INSERT
+    that skips rows created meanwhile, then a single UPDATE counts the
+    event for all of them.
+    """
+    pending = PendingDigest.objects.filter(
+        notification_type=notification_type,
+        course_id=course_id,
+        recipient_id__in=recipient_ids,
+    )
+    missing = set(recipient_ids) - set(pending.values_list("recipient_id", flat=True))
+    if missing:
+        PendingDigest.objects.bulk_create(
+            [
+                PendingDigest(
+                    recipient_id=recipient_id,
+                    notification_type=notification_type,
+                    course_id=course_id,
+                    first_seen=now or timezone.now(),
+                )
+                for recipient_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+    pending.update(count=F("count") + 1, fields=fields)
+
+
+def digest_window():
+    return getattr(settings, "LMS_NOTIFICATION_DIGEST_WINDOW", 300)
+
+
+def flush_digests(window=None, now=None, chunk_size=FANOUT_CHUNK_SIZE):
+    """Write the pending digests older than ``window`` seconds (default
+    LMS_NOTIFICATION_DIGEST_WINDOW); returns the notifications written.
+
+    Each chunk is claimed, deleted and written in one transaction, so a
+    flush that dies halfway leaves the rest pending for the next one.
+    """
+    if window is None:
+        window = digest_window()
+    cutoff = (now or timezone.now()) - timedelta(seconds=window)
+    written = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                PendingDigest.objects.filter(first_seen__lte=cutoff)
+                .select_for_update()
+                .order_by("id")[:chunk_size]
+            )
+            if not rows:
+                return written
+            PendingDigest.objects.filter(id__in=[row.id for row in rows]).delete()
+            written += write_digests(
+                [
+                    (
+                        (row.recipient_id, row.notification_type, row.course_id),
+                        [row.first_seen, row.count, row.fields],
+                    )
+                    for row in rows
+                ],
+                chunk_size,
+            )
+
+
+class DigestThrottle:
+    """Remembers which (recipient, type, course) keys this process notified
+    within the last ``window`` seconds.
+
+    The first event of a key goes out at once as a plain notification;
+    only the events that follow within the window are counted in
+    PendingDigest. A quiet key therefore costs what a direct notification
+    costs, and the digest table is only written for busy keys. The memory
+    is only a routing hint: losing it (restart, another worker) sends one
+    more event directly.
+    """
+
+    def __init__(self, window, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self.sent = {}
+        self.pruned_at = clock()
+        self.lock = threading.Lock()
+
+    def claim(self, keys):
+        """Return the quiet ``keys``, marking them as notified now"""
+        now = self.clock()
+        with self.lock:
+            if now - self.pruned_at >= self.window:
+                self.sent = {
+                    key: sent_at
+                    for key, sent_at in self.sent.items()
+                    if now - sent_at < self.window
+                }
+                self.pruned_at = now
+            quiet = {
+                key
+                for key in keys
+                if key not in self.sent or now - self.sent[key] >= self.window
+            }
+            for key in quiet:
+                self.sent[key] = now
+        return quiet
+
+
+def send_or_queue(
+    recipient_ids, notification_type, course_id, fields, throttle, now=None
+):
+    """Notify the recipients whose key is quiet at once and count the event
+    towards the pending digest of the others
+    """
+    quiet = throttle.claim(
+        {(recipient_id, notification_type, course_id) for recipient_id in recipient_ids}
+    )
+    if quiet:
+        write_digests([(key, [None, 1, fields]) for key in quiet])
+    busy = set(recipient_ids) - {recipient_id for recipient_id, _, _ in quiet}
+    if busy:
+        queue_digest(busy, notification_type, course_id, fields, now)
+
+
+_throttle = None
+_throttle_lock = threading.Lock()
+
+
+def get_digest_throttle():
+    """Return this process's DigestThrottle (LMS_NOTIFICATION_DIGEST_WINDOW)"""
+    global _throttle
+    throttle = _throttle
+    if throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                _throttle = DigestThrottle(digest_window())
+            throttle = _throttle
+    return throttle
+
+
+def notify_digest(recipient_ids, notification_type, course_id, **fields):
+    """Send a coalescible notification, in the caller's transaction: at
+    once for recipients not notified of the same type and course within
+    the window (or with a 0 window), into their pending digest otherwise
+    """
+    recipient_ids = set(recipient_ids)
+    if not recipient_ids:
+        return
+    if digest_window() <= 0:
+        write_digests(
+            [
+                ((recipient_id, notification_type, course_id), [None, 1, fields])
+                for recipient_id in recipient_ids
+            ]
+        )
+    else:
+        send_or_queue(
+            recipient_ids,
+            notification_type,
+            course_id,
+            fields,
+            get_digest_throttle(),
+        )
@@ -0,0 +1,92 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    """Opaque cursor for the (created_at, id) position of the last row served"""
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def keyset_page(queryset, cursor, limit, descending=True):
+    """Return (rows, next_cursor) seeking on (created_at, id) instead of OFFSET.
+
+    The WHERE clause starts right after the cursor position, so with a
+    composite index on (created_at, id) every page costs the same no matter
+    how deep it is. One extra row is fetched to know whether a next page
+    exists.
+    """
+    if descending:
+        queryset = queryset.order_by("-created_at", "-id")
+    else:
+        queryset = queryset.order_by("created_at", "id")
+
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        if descending:
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+        else:
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            )
+
+    rows = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def encode_thread_cursor(thread):
+    """Cursor for the (is_pinned, updated_at, id) position of a forum thread"""
+    raw = f"{int(thread.is_pinned)}|{thread.updated_at.isoformat()}|{thread.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_thread_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        pinned, updated_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        return pinned == "1", datetime.fromisoformat(updated_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def thread_page(queryset, cursor, limit):
+    """Keyset page of forum threads: pinned first, then latest activity.
+
+    Seeks on (is_pinned, updated_at, id) descending, the column order of
+    thread_listing_idx, so deep pages cost the same as the first.
+    """
+    queryset = queryset.order_by("-is_pinned", "-updated_at", "-id")
+    if cursor:
+        pinned, updated_at, pk = decode_thread_cursor(cursor)
+        after = Q(is_pinned=pinned) & (
+            Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, id__lt=pk)
+        )
+        if pinned:
+            after |= Q(is_pinned=False)
+        queryset = queryset.filter(after)
+
+    rows = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_thread_cursor(rows[-1])
@@ -0,0 +1,44 @@
+from collections import defaultdict
+
+from lms_core.models import PATH_STEP
+
+
+def rebuild_paths(content_model, batch_size=1000):
+    """Recompute path/depth of every content from parent_id in O(n).
+
+    Works with the real or a migration's historical model. Contents whose
+    parent is missing, or which sit on a parent_id cycle, become roots.
+    Returns the number of rows whose path changed.
+    """
+    rows = content_model.objects.values_list("id", "parent_id", "path")
+    parents, current, children = {}, {}, defaultdict(list)
+    for pk, parent_pk, path in rows.iterator(chunk_size=batch_size):
+        parents[pk] = parent_pk
+        current[pk] = path
+    for pk, parent_pk in parents.items():
+        children[parent_pk if parent_pk in parents else None].append(pk)
+
+    paths = {}
+
+    def walk(roots):
+        stack = [(pk, "") for pk in roots]
+        while stack:
+            pk, parent_path = stack.pop()
+            if pk in paths:
+                continue
+            paths[pk] = f"{parent_path}{pk:0{PATH_STEP}d}/"
+            stack.extend((child, paths[pk]) for child in children[pk])
+
+    walk(children[None])
+    # anything unreachable from a root is on a cycle; cut it at its lowest id
+    for pk in sorted(parents):
+        if pk not in paths:
+            walk([pk])
+
+    changed = [
+        content_model(id=pk, path=path, depth=path.count("/") - 1)
+        for pk, path in paths.items()
+        if current[pk] != path
+    ]
+    content_model.objects.bulk_update(changed, ["path", "depth"], batch_size=batch_size)
+    return len(changed)
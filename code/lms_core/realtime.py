@@ -0,0 +1,232 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber; a client that falls this far behind is
+# disconnected (EventSource reconnects) instead of growing memory
+QUEUE_SIZE = 100
+
+# Comment line sent on idle streams so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+# Reconnect delay suggested to EventSource clients
+RETRY_MILLISECONDS = 3000
+
+REDIS_PREFIX = "lms:events:"
+
+# Longest a notification long-poll request is held open without news
+LONG_POLL_SECONDS = 25
+
+_CLOSED = object()
+
+
+def course_channel(course_id):
+    return f"course:{course_id}"
+
+
+def thread_channel(thread_id):
+    return f"thread:{thread_id}"
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """One SSE client: an asyncio queue fed from any thread via its loop"""
+
+    def __init__(self, channels):
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # the client's loop already shut down
+            pass
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Make room for the close marker; the stream ends after it
+            self.queue.get_nowait()
+            self.queue.put_nowait(_CLOSED)
+
+    async def get(self, timeout=None):
+        """Next event, None on timeout; raises EOFError once overflowed"""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is _CLOSED:
+            raise EOFError("subscriber fell behind")
+        return event
+
+
+class Broker:
+    """In-process pub/sub: channel name -> subscriptions of this worker.
+
+    An idle subscriber is a queue and a parked coroutine, nothing runs for
+    it until an event arrives. ``publish`` may be called from sync code
+    (signals run in a thread under ASGI) and hands events over to each
+    subscriber's event loop.
+    """
+
+    def __init__(self):
+        self.channels = defaultdict(set)
+        self.lock = threading.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        subscription = Subscription(channels)
+        with self.lock:
+            for channel in subscription.channels:
+                self.channels[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self.lock:
+                for channel in subscription.channels:
+                    subscribers = self.channels[channel]
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.channels[channel]
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def publish_many(self, messages):
+        for channel, event in messages:
+            self.publish(channel, event)
+
+    def deliver(self, channel, event):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscriber_count(self):
+        with self.lock:
+            return len(set().union(*self.channels.values()))
+
+
+class RedisBroker(Broker):
+    """Broker fanning events out to every worker through Redis pub/sub.
+
+    Events are only published to Redis; each worker runs one listener
+    task on its event loop that pattern-subscribes to all channels and
+    delivers to its local subscribers, so the Redis connection count does
+    not grow with the number of SSE clients.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+        self.listener = None
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(self._listen())
+        async with super().subscribe(channels) as subscription:
+            yield subscription
+
+    def publish(self, channel, event):
+        try:
+            self.client.publish(
+                REDIS_PREFIX + channel, json.dumps(event, cls=DjangoJSONEncoder)
+            )
+        except redis.RedisError:
+            logger.exception("Could not publish %s event to Redis", channel)
+
+    def publish_many(self, messages):
+        # One round trip for a whole fan-out chunk
+        pipeline = self.client.pipeline(transaction=False)
+        for channel, event in messages:
+            pipeline.publish(
+                REDIS_PREFIX + channel, json.dumps(event, cls=DjangoJSONEncoder)
+            )
+        try:
+            pipeline.execute()
+        except redis.RedisError:
+            logger.exception("Could not publish %d events to Redis", len(messages))
+
+    async def _listen(self):
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(REDIS_PREFIX + "*")
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                channel = message["channel"].decode()[len(REDIS_PREFIX) :]
+                self.deliver(channel, json.loads(message["data"]))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return this worker's broker, backed by Redis when LMS_REALTIME_REDIS_URL is set"""
+    global _broker
+    broker = _broker
+    if broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, "LMS_REALTIME_REDIS_URL", None)
+                if url and redis is None:
+                    logger.warning("redis is not installed; events stay in-process")
+                _broker = RedisBroker(url) if url and redis else Broker()
+            broker = _broker
+    return broker
+
+
+def publish(channels, event):
+    broker = get_broker()
+    for channel in channels:
+        broker.publish(channel, event)
+
+
+def publish_many(messages):
+    """Publish [(channel, event)] in one go (one Redis round trip)"""
+    if messages:
+        get_broker().publish_many(messages)
+
+
+def format_event(event):
+    """One SSE message: ``event:`` is the event type, ``data:`` its JSON"""
+    data = json.dumps(event, cls=DjangoJSONEncoder)
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+async def event_stream(channels):
+    """Async iterator of SSE text for a StreamingHttpResponse"""
+    async with get_broker().subscribe(channels) as subscription:
+        yield f"retry: {RETRY_MILLISECONDS}\n: connected\n\n"
+        while True:
+            try:
+                event = await subscription.get(KEEPALIVE_SECONDS)
+            except EOFError:
+                return
+            yield ": keepalive\n\n" if event is None else format_event(event)
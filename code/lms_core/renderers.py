@@ -0,0 +1,121 @@
+import json
+from datetime import timezone
+
+from django.utils.cache import patch_vary_headers
+from ninja import NinjaAPI
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - optional dependency
+    cbor2 = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+CBOR_MEDIA_TYPE = "application/cbor"
+
+# Accept header values clients send for each binary format
+BINARY_MEDIA_TYPES = {
+    "application/msgpack": MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE,
+    "application/cbor": CBOR_MEDIA_TYPE,
+}
+
+
+def _fallback(obj):
+    """Encode values msgpack/CBOR don't know natively the same way JSON does"""
+    return NinjaJSONEncoder().default(obj)
+
+
+def encode_msgpack(data):
+    # datetime=True packs aware datetimes as the msgpack Timestamp extension
+    return msgpack.packb(data, datetime=True, default=_fallback)
+
+
+def encode_cbor(data):
+    # datetime_as_timestamp=True emits CBOR tag 1 (epoch seconds)
+    return cbor2.dumps(
+        data,
+        datetime_as_timestamp=True,
+        timezone=timezone.utc,
+        default=lambda encoder, obj: encoder.encode(_fallback(obj)),
+    )
+
+
+ENCODERS = {
+    MSGPACK_MEDIA_TYPE: encode_msgpack if msgpack else None,
+    CBOR_MEDIA_TYPE: encode_cbor if cbor2 else None,
+}
+
+
+def _quality(accepted):
+    """The q-value of an Accept entry; missing or malformed counts as 1"""
+    try:
+        quality = float(accepted.params.get("q", 1))
+    except ValueError:
+        return 1.0
+    return quality if 0 <= quality <= 1 else 1.0
+
+
+def negotiate_media_type(request):
+    """Pick the response format from the Accept header, defaulting to JSON.
+
+    Formats are ranked by q-value, JSON taking the q of its most specific
+    matching range (``application/json`` > ``application/*`` > ``*/*``)
+    and winning ties. Only explicitly listed binary types switch the
+    format, so browsers and clients sending ``*/*`` keep getting JSON. A
+    format whose library is not installed is skipped.
+    """
+    json_quality, json_specificity = 0.0, -1
+    binary, binary_quality = None, 0.0
+    for accepted in request.accepted_types:
+        quality = _quality(accepted)
+        media_type = BINARY_MEDIA_TYPES.get(f"{accepted.main_type}/{accepted.sub_type}")
+        if media_type:
+            if ENCODERS[media_type] and quality > binary_quality:
+                binary, binary_quality = media_type, quality
+        elif accepted.match(JSON_MEDIA_TYPE):
+            specificity = (accepted.main_type != "*") + (accepted.sub_type != "*")
+            if specificity > json_specificity:
+                json_quality, json_specificity = quality, specificity
+    if binary and binary_quality > json_quality:
+        return binary
+    return JSON_MEDIA_TYPE
+
+
+class NegotiatingRenderer(BaseRenderer):
+    """Render the same schema output as JSON, MessagePack or CBOR"""
+
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, request, data, *, response_status):
+        media_type = negotiate_media_type(request)
+        request.negotiated_media_type = media_type
+        if media_type == JSON_MEDIA_TYPE:
+            return json.dumps(data, cls=NinjaJSONEncoder)
+        return ENCODERS[media_type](data)
+
+
+class NegotiatingNinjaAPI(NinjaAPI):
+    """NinjaAPI that labels responses with the negotiated content type"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("renderer", NegotiatingRenderer())
+        super().__init__(*args, **kwargs)
+
+    def create_response(self, request, data, *, status=None, temporal_response=None):
+        response = super().create_response(
+            request, data, status=status, temporal_response=temporal_response
+        )
+        media_type = getattr(request, "negotiated_media_type", JSON_MEDIA_TYPE)
+        if media_type != JSON_MEDIA_TYPE:
+            response["Content-Type"] = media_type
+        patch_vary_headers(response, ["Accept"])
+        return response
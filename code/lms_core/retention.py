@@ -0,0 +1,267 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from lms_core.models import (
+    ArchivedComment,
+    ArchivedNotification,
+    Comment,
+    Course,
+    CourseContent,
+    CourseMember,
+    Notification,
+)
+from lms_core.notifications import shift_counters
+
+# Rows moved per transaction; each chunk locks only its own rows
+ARCHIVE_CHUNK_SIZE = 1000
+
+NOTIFICATION_COLUMNS = [field.attname for field in Notification._meta.concrete_fields]
+
+
+def _bulk_restore(model, objects, timestamps):
+    """bulk_create ``objects`` keeping their ``timestamps`` fields.
+
+    auto_now/auto_now_add overwrite those on insert, so the archived values
+    are put back with one bulk UPDATE.
+    """
+    original = [[getattr(obj, field) for field in timestamps] for obj in objects]
+    model.objects.bulk_create(objects)
+    for obj, values in zip(objects, original):
+        for field, value in zip(timestamps, values):
+            setattr(obj, field, value)
+    model.objects.bulk_update(objects, timestamps)
+
+
+def move_in_chunks(queryset, move, chunk_size=ARCHIVE_CHUNK_SIZE, pause=0):
+    """Run ``move(chunk)`` over ``queryset`` in chunks of ``chunk_size`` rows.
+
+    Chunks are found by seeking past the last id seen (``id > last ORDER BY
+    id LIMIT n``), so sparse ids cost no empty ranges. Every chunk is moved
+    in its own short transaction, so no lock is held across the whole
+    table, and ``pause`` seconds between chunks leave room for live
+    traffic. Returns the number of rows moved.
+    """
+    moved = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                queryset.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            count = move(queryset.filter(id__gt=last_id, id__lte=ids[-1]))
+        last_id = ids[-1]
+        moved += count
+        if count and pause:
+            time.sleep(pause)
+    return moved
+
+
+def archivable_notifications(days, now=None):
+    """Read notifications older than ``days``: read one by one or covered
+    by the recipient's "mark all as read" watermark
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Notification.objects.filter(created_at__lt=cutoff).filter(
+        Q(is_read=True)
+        | Q(recipient__notification_counter__last_read_at__gte=F("created_at"))
+    )
+
+
+def _archive_notifications(chunk):
+    rows = list(chunk.select_for_update(of=("self",)).values(*NOTIFICATION_COLUMNS))
+    if not rows:
+        return 0
+    ArchivedNotification.objects.bulk_create(
+        [ArchivedNotification(**row) for row in rows]
+    )
+    # Raw DELETE: the post_delete signal would update the counters one row
+    # at a time, they are shifted per chunk below instead
+    Notification.objects.filter(id__in=[row["id"] for row in rows])._raw_delete(
+        Notification.objects.db
+    )
+    shift_counters(
+        [(row["recipient_id"], row["notification_type"]) for row in rows],
+        sign=-1,
+        unread=False,
+    )
+    return len(rows)
+
+
+def archive_notifications(days=None, chunk_size=ARCHIVE_CHUNK_SIZE, pause=0):
+    """Move read notifications older than ``days`` (default
+    LMS_NOTIFICATION_RETENTION_DAYS) to ArchivedNotification
+    """
+    if days is None:
+        days = getattr(settings, "LMS_NOTIFICATION_RETENTION_DAYS", 90)
+    return move_in_chunks(
+        archivable_notifications(days), _archive_notifications, chunk_size, pause
+    )
+
+
+def _archive_comments(chunk):
+    rows = list(
+        chunk.select_for_update(of=("self",)).values(
+            "id",
+            "content_id_id",
+            "member_id_id",
+            "comment",
+            "is_approved",
+            "is_flagged",
+            "reviewed_at",
+            "created_at",
+            "updated_at",
+            course=F("content_id__course_id"),
+        )
+    )
+    if not rows:
+        return 0
+    ArchivedComment.objects.bulk_create(
+        [
+            ArchivedComment(
+                id=row["id"],
+                course_id=row["course"],
+                content_id=row["content_id_id"],
+                member_id=row["member_id_id"],
+                comment=row["comment"],
+                is_approved=row["is_approved"],
+                is_flagged=row["is_flagged"],
+                reviewed_at=row["reviewed_at"],
+                created_at=row["created_at"],
+                updated_at=row["updated_at"],
+            )
+            for row in rows
+        ]
+    )
+    Comment.objects.filter(id__in=[row["id"] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_course_comments(chunk_size=ARCHIVE_CHUNK_SIZE, pause=0):
+    """Move every comment of an archived course to ArchivedComment"""
+    return move_in_chunks(
+        Comment.objects.filter(content_id__course_id__is_archived=True),
+        _archive_comments,
+        chunk_size,
+        pause,
+    )
+
+
+def _restore_notifications(chunk):
+    archived = list(chunk.select_for_update())
+    if not archived:
+        return 0
+    # References may have been deleted since: a notification without its
+    # recipient stays archived, other links are dropped
+    users = set(
+        User.objects.filter(
+            id__in={row.recipient_id for row in archived}
+            | {row.sender_id for row in archived if row.sender_id}
+        ).values_list("id", flat=True)
+    )
+    courses = set(
+        Course.objects.filter(
+            id__in={row.related_course_id for row in archived if row.related_course_id}
+        ).values_list("id", flat=True)
+    )
+    contents = set(
+        CourseContent.objects.filter(
+            id__in={
+                row.related_content_id for row in archived if row.related_content_id
+            }
+        ).values_list("id", flat=True)
+    )
+    notifications = []
+    for row in archived:
+        if row.recipient_id not in users:
+            continue
+        notification = Notification(
+            **{column: getattr(row, column) for column in NOTIFICATION_COLUMNS}
+        )
+        if notification.sender_id not in users:
+            notification.sender_id = None
+        if notification.related_course_id not in courses:
+            notification.related_course_id = None
+        if notification.related_content_id not in contents:
+            notification.related_content_id = None
+        notifications.append(notification)
+    if not notifications:
+        return 0
+    _bulk_restore(Notification, notifications, ["created_at"])
+    ArchivedNotification.objects.filter(
+        id__in=[notification.id for notification in notifications]
+    ).delete()
+    # They were read when archived and the watermark only moves forward
+    shift_counters(
+        [(n.recipient_id, n.notification_type) for n in notifications], unread=False
+    )
+    return len(notifications)
+
+
+def restore_notifications(recipient_id, since=None, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Move a user's archived notifications (optionally created since
+    ``since``) back into Notification; the next retention run archives
+    them again
+    """
+    archived = ArchivedNotification.objects.filter(recipient_id=recipient_id)
+    if since is not None:
+        archived = archived.filter(created_at__gte=since)
+    return move_in_chunks(archived, _restore_notifications, chunk_size)
+
+
+def _restore_comments(chunk):
+    archived = list(chunk.select_for_update())
+    contents = set(
+        CourseContent.objects.filter(
+            id__in={row.content_id for row in archived}
+        ).values_list("id", flat=True)
+    )
+    members = set(
+        CourseMember.objects.filter(
+            id__in={row.member_id for row in archived}
+        ).values_list("id", flat=True)
+    )
+    # Comments whose content or member is gone would have been cascaded
+    # away; they stay archived
+    comments = [
+        Comment(
+            id=row.id,
+            content_id_id=row.content_id,
+            member_id_id=row.member_id,
+            comment=row.comment,
+            is_approved=row.is_approved,
+            is_flagged=row.is_flagged,
+            reviewed_at=row.reviewed_at,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+        for row in archived
+        if row.content_id in contents and row.member_id in members
+    ]
+    if not comments:
+        return 0
+    _bulk_restore(Comment, comments, ["created_at", "updated_at"])
+    ArchivedComment.objects.filter(id__in=[comment.id for comment in comments]).delete()
+    return len(comments)
+
+
+def restore_course_comments(course_id, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Unarchive a course and move its archived comments back.
+
+    The course is unarchived first, otherwise the next retention run would
+    archive the comments again.
+    """
+    Course.objects.filter(id=course_id).update(is_archived=False)
+    return move_in_chunks(
+        ArchivedComment.objects.filter(course_id=course_id),
+        _restore_comments,
+        chunk_size,
+    )
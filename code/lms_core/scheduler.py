@@ -0,0 +1,138 @@
+import heapq
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.db import IntegrityError
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+from lms_core.models import CourseContent, SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+# Sent after a tick publishes contents; receivers get ``course_ids`` and
+# ``content_ids`` (cache invalidation, notifications, ...)
+contents_released = Signal()
+
+LEASE_NAME = "content-release"
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(name, owner, ttl):
+    """Take or renew the named lease; only one owner holds it at a time.
+
+    Renewal and takeover of an expired lease are a single conditional
+    UPDATE, so two nodes racing for it can't both win.
+    """
+    now = timezone.now()
+    taken = (
+        SchedulerLease.objects.filter(name=name)
+        .filter(Q(owner=owner) | Q(expires_at__lt=now))
+        .update(owner=owner, expires_at=now + ttl)
+    )
+    if taken:
+        return True
+    try:
+        SchedulerLease.objects.create(name=name, owner=owner, expires_at=now + ttl)
+    except IntegrityError:
+        return False
+    return True
+
+
+def release_lease(name, owner):
+    SchedulerLease.objects.filter(name=name, owner=owner).delete()
+
+
+def release_due_contents(now=None):
+    """Publish every content scheduled for release whose release_time has
+    passed.
+
+    Only contents marked ``release_pending`` (by the schedule endpoint) are
+    released; publish and unpublish clear the mark, so a content a teacher
+    unpublished stays unpublished.
+
+    All due rows are flipped with one UPDATE; ``contents_released`` is sent
+    afterwards since ``update()`` bypasses the model save signals.
+    Returns the number of published contents.
+    """
+    now = now or timezone.now()
+    due = list(
+        CourseContent.objects.filter(
+            release_pending=True, release_time__lte=now
+        ).values_list("id", "course_id")
+    )
+    if not due:
+        return 0
+
+    content_ids = [content_id for content_id, _ in due]
+    published = CourseContent.objects.filter(
+        id__in=content_ids, release_pending=True
+    ).update(is_published=True, release_pending=False, updated_at=now)
+    contents_released.send(
+        sender=CourseContent,
+        course_ids=sorted({course_id for _, course_id in due}),
+        content_ids=content_ids,
+    )
+    return published
+
+
+class ReleaseScheduler:
+    """Keeps a min-heap of upcoming release times and publishes them when due.
+
+    The heap is loaded from the (release_pending, release_time) index and
+    refreshed every ``refresh`` seconds to pick up schedules made by other
+    processes; ticks between refreshes only touch the database when the
+    head of the heap is due.
+    """
+
+    def __init__(self, owner=None, refresh=30, batch=1000, lease_ttl=60):
+        self.owner = owner or default_owner()
+        self.refresh = timedelta(seconds=refresh)
+        self.batch = batch
+        self.lease_ttl = timedelta(seconds=lease_ttl)
+        self.heap = []
+        self.loaded_at = None
+
+    def load(self, now):
+        upcoming = CourseContent.objects.filter(
+            release_pending=True, release_time__isnull=False
+        ).order_by("release_time")[: self.batch]
+        self.heap = list(upcoming.values_list("release_time", "id"))
+        heapq.heapify(self.heap)
+        self.loaded_at = now
+
+    def tick(self, now=None):
+        """Run one scheduling step; returns the number of contents published"""
+        now = now or timezone.now()
+        if not acquire_lease(LEASE_NAME, self.owner, self.lease_ttl):
+            self.loaded_at = None
+            return 0
+
+        if self.loaded_at is None or now - self.loaded_at >= self.refresh:
+            self.load(now)
+        if not self.heap or self.heap[0][0] > now:
+            return 0
+
+        while self.heap and self.heap[0][0] <= now:
+            heapq.heappop(self.heap)
+        published = release_due_contents(now)
+        if published:
+            logger.info("Released %s scheduled contents", published)
+        if not self.heap:
+            # the batch may have been truncated; look for more
+            self.loaded_at = None
+        return published
+
+    def seconds_until_next(self, now, interval):
+        """Sleep time until the next release, capped at ``interval``"""
+        if not self.heap:
+            return interval
+        return max(0.0, min(interval, (self.heap[0][0] - now).total_seconds()))
+
+    def stop(self):
+        release_lease(LEASE_NAME, self.owner)
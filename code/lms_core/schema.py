@@ -36,6 +36,23 @@ class CourseSchemaOut(Schema):
     updated_at: datetime
 
 
+class CourseCatalogItemOut(Schema):
+    id: int
+    name: str
+    description: str
+    price: int
+    image: Optional[str]
+    teacher: Optional[UserOut] = None
+    max_students: Optional[int]
+    created_at: datetime
+    updated_at: datetime
+
+
+class CourseCatalogOut(Schema):
+    courses: list[CourseCatalogItemOut]
+    next_cursor: Optional[str]
+
+
 class CourseMemberOut(Schema):
     id: int
     course_id: CourseSchemaOut
@@ -74,6 +91,35 @@ class CourseContentFull(Schema):
     updated_at: datetime
 
 
+class CourseContentNodeOut(Schema):
+    id: int
+    name: str
+    description: str
+    video_url: Optional[str]
+    file_attachment: Optional[str]
+    parent_id: Optional[int]
+    release_time: Optional[datetime]
+    is_published: bool
+    created_at: datetime
+    updated_at: datetime
+    children: list["CourseContentNodeOut"] = []
+
+
+class ContentSubtreeOut(Schema):
+    root: CourseContentNodeOut
+    descendant_count: int
+
+
+class ContentBreadcrumbOut(Schema):
+    id: int
+    name: str
+    depth: int
+
+
+class ContentMoveIn(Schema):
+    parent_id: Optional[int] = None
+
+
 class CourseContentScheduleIn(Schema):
     release_time: datetime
 
@@ -218,6 +264,19 @@ class ContentWithTagsOut(Schema):
     updated_at: datetime
 
 
+# Public search hits: the media stays behind enrollment (/courses/{id}/contents)
+class SearchContentOut(Schema):
+    id: int
+    name: str
+    description: str
+    course_id: CourseSchemaOut
+    release_time: Optional[datetime]
+    is_published: bool
+    tags: list[TagOut]
+    created_at: datetime
+    updated_at: datetime
+
+
 class SearchFilters(Schema):
     query: Optional[str] = None
     category_ids: Optional[list[int]] = None
@@ -231,12 +290,84 @@ class SearchFilters(Schema):
 
 class SearchResultsOut(Schema):
     courses: list[CourseWithCategoriesOut]
-    contents: list[ContentWithTagsOut]
+    contents: list[SearchContentOut]
     total_courses: int
     total_contents: int
     filters_applied: dict
 
 
+class FacetValueOut(Schema):
+    id: int
+    name: str
+    count: int
+
+
+class PriceBucketOut(Schema):
+    label: str
+    min_price: int
+    max_price: Optional[int]
+    count: int
+
+
+class AvailabilityFacetOut(Schema):
+    available: int
+    full: int
+
+
+class SearchFacetsOut(Schema):
+    total: int
+    categories: list[FacetValueOut]
+    tags: list[FacetValueOut]
+    teachers: list[FacetValueOut]
+    price_buckets: list[PriceBucketOut]
+    has_available_slots: AvailabilityFacetOut
+
+
+class SuggestionOut(Schema):
+    kind: str
+    id: int
+    label: str
+    weight: int
+
+
+class CommentIn(Schema):
+    comment: str
+
+
+class CommentOut(Schema):
+    id: int
+    content_id: int
+    author: UserOut
+    comment: str
+    is_approved: bool
+    is_flagged: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+class CommentListOut(Schema):
+    comments: list[CommentOut]
+    next_cursor: Optional[str]
+
+
+class CommentModerationIn(Schema):
+    approved: bool = True
+    comment_ids: Optional[list[int]] = None
+    course_id: Optional[int] = None
+    content_id: Optional[int] = None
+    author_id: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    keyword: Optional[str] = None
+    flagged: Optional[bool] = None
+    dry_run: bool = False
+
+
+class CommentModerationOut(Schema):
+    affected: int
+    dry_run: bool
+
+
 class DiscussionThreadOut(Schema):
     id: int
     title: str
@@ -251,6 +382,11 @@ class DiscussionThreadOut(Schema):
     updated_at: datetime
 
 
+class DiscussionThreadListOut(Schema):
+    threads: list[DiscussionThreadOut]
+    next_cursor: Optional[str]
+
+
 class DiscussionThreadIn(Schema):
     title: str
     description: str
@@ -267,6 +403,16 @@ class DiscussionReplyOut(Schema):
     updated_at: datetime
 
 
+class DiscussionReplyTreeOut(DiscussionReplyOut):
+    replies: list["DiscussionReplyTreeOut"] = []
+
+
+class DiscussionThreadDetailOut(Schema):
+    thread: DiscussionThreadOut
+    replies: list[DiscussionReplyTreeOut]
+    next_cursor: Optional[str]
+
+
 class DiscussionReplyIn(Schema):
     content: str
     parent_reply_id: Optional[int] = None
@@ -287,6 +433,8 @@ class NotificationOut(Schema):
     message: str
     notification_type: str
     is_read: bool
+    # Also False once covered by "mark all as read" (is_read stays False)
+    is_unread: bool
     related_course: Optional[CourseSchemaOut]
     related_content: Optional[CourseContentMini]
     action_url: Optional[str]
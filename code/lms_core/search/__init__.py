@@ -0,0 +1,30 @@
+from django.conf import settings
+from lms_core.search.database import get_database_backend
+from lms_core.search.facets import get_facet_index
+from lms_core.search.memory import get_memory_backend
+from lms_core.search.service import run_search
+
+
+def get_search_backend():
+    """Pick the backend from LMS_SEARCH_BACKEND ("memory" or "database").
+
+    The database backend follows DATABASES["default"]["ENGINE"] and falls
+    back to the memory index on engines without full-text support.
+    """
+    if getattr(settings, "LMS_SEARCH_BACKEND", "memory") == "database":
+        backend = get_database_backend()
+        if backend is not None:
+            return backend
+    return get_memory_backend()
+
+
+def search(filters, limit=20):
+    return run_search(get_search_backend(), filters, limit)
+
+
+def search_facets(filters):
+    """Facet counts for the courses matching ``filters`` (and its query)"""
+    matched_ids = None
+    if filters.query:
+        matched_ids = get_search_backend().match_courses(filters.query)
+    return get_facet_index().counts(filters, matched_ids)
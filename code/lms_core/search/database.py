@@ -0,0 +1,295 @@
+import logging
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.recorder import MigrationRecorder
+from lms_core.models import Course, CourseContent
+
+logger = logging.getLogger(__name__)
+
+FULLTEXT_MIGRATION = ("lms_core", "0009_search_fulltext")
+FULLTEXT_TABLES = (Course._meta.db_table, CourseContent._meta.db_table)
+
+# Candidate sets up to this size are pushed into the SQL as ``id IN (...)``;
+# larger ones are applied to the streamed match ids instead
+CANDIDATE_PUSHDOWN = 5_000
+
+WORD_RE = re.compile(r"\w+")
+
+
+def query_words(query):
+    return WORD_RE.findall(query.lower())
+
+
+class DatabaseSearchBackend:
+    """Search through the database's own full-text index.
+
+    Subclasses provide the vendor SQL: the schema (installed by migration
+    0009 and re-checked after every migrate) and a ``match`` clause that
+    filters and ranks a table. Names weigh more than descriptions, like the
+    memory backend.
+    """
+
+    name = "database"
+    vendor = None
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def search_courses(self, query, limit, candidates=None):
+        return self._search(Course._meta.db_table, False, query, limit, candidates)
+
+    def search_contents(self, query, limit, candidates=None):
+        return self._search(
+            CourseContent._meta.db_table, True, query, limit, candidates
+        )
+
+    def match_courses(self, query):
+        table = Course._meta.db_table
+        words = query_words(query)
+        if not words:
+            return set()
+        sql, params, _, _ = self.match(table, words)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"SELECT {table}.id {sql}", params)
+            return {row[0] for row in cursor.fetchall()}
+
+    def _search(self, table, published_only, query, limit, candidates):
+        words = query_words(query)
+        if not words or candidates is not None and not candidates:
+            return 0, []
+
+        sql, params, order_by, order_params = self.match(table, words)
+        if published_only:
+            sql += f" AND {table}.is_published = %s"
+            params = [*params, True]
+        pushdown = candidates is not None and len(candidates) <= CANDIDATE_PUSHDOWN
+        if pushdown:
+            sql += f" AND {table}.id IN ({', '.join(['%s'] * len(candidates))})"
+            params = [*params, *sorted(candidates)]
+
+        with connections[self.using].cursor() as cursor:
+            if candidates is None or pushdown:
+                cursor.execute(f"SELECT COUNT(*) {sql}", params)
+                total = cursor.fetchone()[0]
+                cursor.execute(
+                    f"SELECT {table}.id {sql} ORDER BY {order_by}, {table}.id DESC"
+                    " LIMIT %s",
+                    [*params, *order_params, limit],
+                )
+                return total, [row[0] for row in cursor.fetchall()]
+
+            cursor.execute(
+                f"SELECT {table}.id {sql} ORDER BY {order_by}, {table}.id DESC",
+                [*params, *order_params],
+            )
+            ids = [row[0] for row in cursor.fetchall() if row[0] in candidates]
+            return len(ids), ids[:limit]
+
+    def match(self, table, words):
+        """Return (FROM/WHERE sql, params, ORDER BY sql, params) for ``words``"""
+        raise NotImplementedError
+
+    @classmethod
+    def install(cls, schema_editor):
+        raise NotImplementedError
+
+    @classmethod
+    def uninstall(cls, schema_editor):
+        raise NotImplementedError
+
+
+class SQLiteSearchBackend(DatabaseSearchBackend):
+    """FTS5 external-content tables kept in sync by triggers, ranked by bm25()"""
+
+    vendor = "sqlite"
+
+    def match(self, table, words):
+        fts = f"{table}_fts"
+        expression = " OR ".join(f'"{word}"*' for word in words)
+        # CROSS JOIN pins the join order: without it SQLite may scan the
+        # base table and probe the full-text index once per row
+        return (
+            f"FROM {fts} CROSS JOIN {table} ON {table}.id = {fts}.rowid"
+            f" WHERE {fts} MATCH %s",
+            [expression],
+            f"bm25({fts}, 3.0, 1.0)",
+            [],
+        )
+
+    @classmethod
+    def install(cls, schema_editor):
+        # Django rebuilds SQLite tables on most ALTERs, which drops their
+        # triggers, so this runs idempotently after every migrate and
+        # refills the index whenever the triggers had to be recreated
+        for table in FULLTEXT_TABLES:
+            fts = f"{table}_fts"
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM sqlite_master"
+                    " WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                    [f"{fts}_insert", f"{fts}_delete", f"{fts}_update"],
+                )
+                if cursor.fetchone()[0] == 3:
+                    continue
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"name, description, content='{table}', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}"
+                f" BEGIN INSERT INTO {fts}(rowid, name, description)"
+                " VALUES (new.id, new.name, new.description); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}"
+                f" BEGIN INSERT INTO {fts}({fts}, rowid, name, description)"
+                " VALUES ('delete', old.id, old.name, old.description); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_update"
+                f" AFTER UPDATE OF name, description ON {table}"
+                f" BEGIN INSERT INTO {fts}({fts}, rowid, name, description)"
+                " VALUES ('delete', old.id, old.name, old.description);"
+                f" INSERT INTO {fts}(rowid, name, description)"
+                " VALUES (new.id, new.name, new.description); END"
+            )
+            schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    @classmethod
+    def uninstall(cls, schema_editor):
+        for table in FULLTEXT_TABLES:
+            fts = f"{table}_fts"
+            for trigger in ("insert", "delete", "update"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+class PostgreSQLSearchBackend(DatabaseSearchBackend):
+    """Generated, weighted ``tsvector`` column with a GIN index, ts_rank()"""
+
+    vendor = "postgresql"
+
+    def match(self, table, words):
+        expression = " | ".join(f"{word}:*" for word in words)
+        return (
+            f"FROM {table}, to_tsquery('simple', %s) query"
+            f" WHERE {table}.search_vector @@ query",
+            [expression],
+            f"ts_rank({table}.search_vector, query) DESC",
+            [],
+        )
+
+    @classmethod
+    def install(cls, schema_editor):
+        # A STORED generated column is recomputed by PostgreSQL itself on
+        # every write, so no trigger is needed to keep it in sync
+        for table in FULLTEXT_TABLES:
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector"
+                " GENERATED ALWAYS AS ("
+                "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+                ") STORED"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_search_gin"
+                f" ON {table} USING GIN (search_vector)"
+            )
+
+    @classmethod
+    def uninstall(cls, schema_editor):
+        for table in FULLTEXT_TABLES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_gin")
+            schema_editor.execute(
+                f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector"
+            )
+
+
+class MySQLSearchBackend(DatabaseSearchBackend):
+    """InnoDB FULLTEXT indexes in natural language mode, name match boosted"""
+
+    vendor = "mysql"
+
+    def match(self, table, words):
+        expression = " ".join(words)
+        return (
+            f"FROM {table} WHERE MATCH({table}.name, {table}.description)"
+            " AGAINST (%s IN NATURAL LANGUAGE MODE)",
+            [expression],
+            f"MATCH({table}.name, {table}.description)"
+            " AGAINST (%s IN NATURAL LANGUAGE MODE)"
+            f" + 2 * MATCH({table}.name) AGAINST (%s IN NATURAL LANGUAGE MODE) DESC",
+            [expression, expression],
+        )
+
+    @classmethod
+    def _indexes(cls, schema_editor, table):
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(cursor, table)
+
+    @classmethod
+    def install(cls, schema_editor):
+        # InnoDB maintains FULLTEXT indexes on every write; MATCH() needs an
+        # index on exactly its column list, hence one for the name boost
+        for table in FULLTEXT_TABLES:
+            existing = cls._indexes(schema_editor, table)
+            if f"{table}_search_ft" not in existing:
+                schema_editor.execute(
+                    f"CREATE FULLTEXT INDEX {table}_search_ft"
+                    f" ON {table} (name, description)"
+                )
+            if f"{table}_name_ft" not in existing:
+                schema_editor.execute(
+                    f"CREATE FULLTEXT INDEX {table}_name_ft ON {table} (name)"
+                )
+
+    @classmethod
+    def uninstall(cls, schema_editor):
+        for table in FULLTEXT_TABLES:
+            existing = cls._indexes(schema_editor, table)
+            for index in (f"{table}_search_ft", f"{table}_name_ft"):
+                if index in existing:
+                    schema_editor.execute(f"DROP INDEX {index} ON {table}")
+
+
+BACKENDS = {
+    backend.vendor: backend
+    for backend in (SQLiteSearchBackend, PostgreSQLSearchBackend, MySQLSearchBackend)
+}
+
+
+def backend_class(connection):
+    return BACKENDS.get(connection.vendor)
+
+
+def get_database_backend(using=DEFAULT_DB_ALIAS):
+    """Return the full-text backend for the database engine, or None"""
+    backend = backend_class(connections[using])
+    if backend is None:
+        logger.warning("No full-text search support for %s", connections[using].vendor)
+        return None
+    return backend(using)
+
+
+def install_fulltext(schema_editor):
+    backend = backend_class(schema_editor.connection)
+    if backend is not None:
+        backend.install(schema_editor)
+
+
+def uninstall_fulltext(schema_editor):
+    backend = backend_class(schema_editor.connection)
+    if backend is not None:
+        backend.uninstall(schema_editor)
+
+
+def ensure_fulltext(using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate hook: re-install the full-text schema once 0009 is applied"""
+    connection = connections[using]
+    if FULLTEXT_MIGRATION not in MigrationRecorder(connection).applied_migrations():
+        return
+    with connection.schema_editor() as schema_editor:
+        install_fulltext(schema_editor)
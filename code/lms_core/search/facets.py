@@ -0,0 +1,365 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from itertools import chain, compress
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Q
+from lms_core.models import Category, ContentTag, Course, CourseCategory, Tag
+
+# (label, min_price inclusive, max_price exclusive) in rupiah
+PRICE_BUCKETS = (
+    ("gratis", 0, 1),
+    ("< 100rb", 1, 100_000),
+    ("100rb - 250rb", 100_000, 250_000),
+    ("250rb - 500rb", 250_000, 500_000),
+    (">= 500rb", 500_000, None),
+)
+
+VALUE_FACETS = ("categories", "tags", "teachers")
+
+# Values returned per facet (filtered values are always included)
+FACET_LIMIT = 50
+
+# Courses sorted by price are also cut into this many blocks with a bitmap
+# each, so a price range is a few ORs plus at most two partial blocks
+PRICE_BLOCKS = 64
+
+# An AND + popcount over a full-width bitmap costs about as much as this
+# many per-course tallies; past it, counting walks the matching courses
+BITMAP_COST = 64
+
+
+def price_bucket(price):
+    for index, (_, low, high) in enumerate(PRICE_BUCKETS):
+        if price >= low and (high is None or price < high):
+            return index
+    return 0
+
+
+_SELECTORS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def compress_bits(values, bits):
+    """Yield ``values[position]`` for every set bit, lowest position first"""
+    return compress(values, bin(bits)[:1:-1].encode().translate(_SELECTORS))
+
+
+def bitmap(positions):
+    """Int with the given bit positions set, built in one pass over a buffer"""
+    positions = list(positions)
+    if not positions:
+        return 0
+    buffer = bytearray((max(positions) >> 3) + 1)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+class FacetIndex:
+    """Per-value course bitmaps for facet counts.
+
+    Every course gets a bit position; each category, tag (of any of the
+    course's contents), price bucket and teacher keeps a Python int with the
+    bits of its courses set. A filter combination is an AND of bitmaps and
+    each facet count a popcount, so no GROUP BY runs per request. Facets
+    with many values (teachers, tags) are tallied from the matching
+    courses instead when fewer courses match than the bitmaps would cost,
+    and unfiltered counts are computed once at build time.
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.course_ids = []
+        self.prices = []
+        self.by_price = []
+        self.sorted_prices = []
+        self.price_block_size = 1
+        self.price_blocks = []
+        self.everything = 0
+        self.categories = {}
+        self.tags = {}
+        self.teachers = {}
+        self.course_values = {facet: [] for facet in VALUE_FACETS}
+        self.totals = {facet: {} for facet in VALUE_FACETS}
+        self.price_buckets = [0] * len(PRICE_BUCKETS)
+        self.available = 0
+        self.names = {"categories": {}, "tags": {}, "teachers": {}}
+        self.lock = threading.Lock()
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def from_rows(cls, courses, category_links, tag_links, available_ids, names):
+        """Build from (course_id, price, teacher_id) rows and (course_id, id) links"""
+        index = cls()
+        teachers = defaultdict(list)
+        buckets = defaultdict(list)
+        courses = list(courses)
+        for position, (course_id, price, teacher_id) in enumerate(courses):
+            index.positions[course_id] = position
+            index.course_ids.append(course_id)
+            index.prices.append(price)
+            teachers[teacher_id].append(position)
+            buckets[price_bucket(price)].append(position)
+
+        index.by_price = sorted(range(len(index.prices)), key=index.prices.__getitem__)
+        index.sorted_prices = [index.prices[position] for position in index.by_price]
+        index.price_block_size = max(64, -(-len(courses) // PRICE_BLOCKS))
+        index.price_blocks = [
+            bitmap(index.by_price[start : start + index.price_block_size])
+            for start in range(0, len(courses), index.price_block_size)
+        ]
+        index.everything = (1 << len(index.course_ids)) - 1
+        index.teachers = {key: bitmap(bits) for key, bits in teachers.items()}
+        for bucket, bits in buckets.items():
+            index.price_buckets[bucket] = bitmap(bits)
+        index.course_values["teachers"] = [
+            (teacher_id,) for _, _, teacher_id in courses
+        ]
+        index.categories = index._link_bitmaps("categories", category_links)
+        index.tags = index._link_bitmaps("tags", tag_links)
+        for facet in VALUE_FACETS:
+            index.totals[facet] = {
+                value_id: bits.bit_count()
+                for value_id, bits in index.value_bitmaps(facet).items()
+            }
+        index.available = index.mask(available_ids)
+        index.names = names
+        return index
+
+    @classmethod
+    def load(cls):
+        courses = Course.objects.order_by("id").values_list("id", "price", "teacher_id")
+        category_links = CourseCategory.objects.values_list("course_id", "category_id")
+        tag_links = ContentTag.objects.values_list(
+            "content__course_id", "tag_id"
+        ).distinct()
+        available_ids = (
+            Course.objects.annotate(
+                student_count=Count("coursemember", filter=Q(coursemember__roles="std"))
+            )
+            .filter(
+                Q(max_students__isnull=True) | Q(max_students__gt=F("student_count"))
+            )
+            .values_list("id", flat=True)
+        )
+        names = {
+            "categories": dict(Category.objects.values_list("id", "name")),
+            "tags": dict(Tag.objects.values_list("id", "name")),
+            "teachers": {
+                teacher.id: teacher.get_full_name() or teacher.username
+                for teacher in User.objects.filter(course__isnull=False).distinct()
+            },
+        }
+        return cls.from_rows(courses, category_links, tag_links, available_ids, names)
+
+    def _link_bitmaps(self, facet, links):
+        grouped = defaultdict(list)
+        per_course = [[] for _ in self.course_ids]
+        for course_id, value_id in links:
+            position = self.positions.get(course_id)
+            if position is not None:
+                grouped[value_id].append(position)
+                per_course[position].append(value_id)
+        self.course_values[facet] = [tuple(values) for values in per_course]
+        return {value_id: bitmap(bits) for value_id, bits in grouped.items()}
+
+    def value_bitmaps(self, facet):
+        return getattr(self, facet)
+
+    def mask(self, course_ids):
+        return bitmap(
+            self.positions[course_id]
+            for course_id in course_ids
+            if course_id in self.positions
+        )
+
+    def set_available(self, course_id, available):
+        position = self.positions.get(course_id)
+        if position is None:
+            return
+        with self.lock:
+            if available:
+                self.available |= 1 << position
+            else:
+                self.available &= ~(1 << position)
+
+    def price_mask(self, min_price, max_price):
+        """OR the price blocks inside the range; bisect into the edge blocks"""
+        start = 0
+        if min_price is not None:
+            start = bisect_left(self.sorted_prices, min_price)
+        end = len(self.sorted_prices)
+        if max_price is not None:
+            end = bisect_right(self.sorted_prices, max_price)
+        if start >= end:
+            return 0
+
+        size = self.price_block_size
+        first_block, last_block = -(-start // size), end // size
+        if first_block >= last_block:
+            return bitmap(self.by_price[start:end])
+        bits = bitmap(self.by_price[start : first_block * size])
+        bits |= bitmap(self.by_price[last_block * size : end])
+        for block in self.price_blocks[first_block:last_block]:
+            bits |= block
+        return bits
+
+    def filter_masks(self, filters, matched_ids=None):
+        """Return {facet: mask} for every active filter"""
+        masks = {}
+        if matched_ids is not None:
+            masks["query"] = self.mask(matched_ids)
+        if filters.category_ids:
+            masks["categories"] = self._union(self.categories, filters.category_ids)
+        if filters.tag_ids:
+            masks["tags"] = self._union(self.tags, filters.tag_ids)
+        if filters.min_price is not None or filters.max_price is not None:
+            masks["price"] = self.price_mask(filters.min_price, filters.max_price)
+        if filters.teacher_id is not None:
+            masks["teachers"] = self.teachers.get(filters.teacher_id, 0)
+        if filters.has_available_slots is not None:
+            masks["availability"] = (
+                self.available
+                if filters.has_available_slots
+                else self.everything & ~self.available
+            )
+        return masks
+
+    @staticmethod
+    def _union(bitmaps, value_ids):
+        bits = 0
+        for value_id in value_ids:
+            bits |= bitmaps.get(value_id, 0)
+        return bits
+
+    def value_counts(self, facet, base):
+        """Return {value_id: count} of ``facet`` over the courses in ``base``"""
+        if base == self.everything:
+            return self.totals[facet]
+        bitmaps = self.value_bitmaps(facet)
+        matching = base.bit_count()
+        if min(matching, len(self.course_ids) - matching) < len(bitmaps) * BITMAP_COST:
+            values = self.course_values[facet]
+            if matching <= len(self.course_ids) // 2:
+                return Counter(chain.from_iterable(compress_bits(values, base)))
+            # Mostly everything matches: subtract the few that don't
+            missing = Counter(
+                chain.from_iterable(compress_bits(values, self.everything & ~base))
+            )
+            totals = self.totals[facet]
+            return {
+                value_id: totals[value_id] - missing[value_id] for value_id in totals
+            }
+        return {
+            value_id: (bits & base).bit_count() for value_id, bits in bitmaps.items()
+        }
+
+    def counts(self, filters, matched_ids=None):
+        """Facet counts for ``filters`` in the SearchFacetsOut shape.
+
+        Counts are disjunctive: a facet's own filter is left out when
+        counting its values, so the UI can show the alternatives too.
+        """
+        selected = {
+            "categories": filters.category_ids or (),
+            "tags": filters.tag_ids or (),
+            "teachers": () if filters.teacher_id is None else (filters.teacher_id,),
+        }
+        with self.lock:
+            masks = self.filter_masks(filters, matched_ids)
+
+            def excluding(facet):
+                bits = self.everything
+                for name, mask in masks.items():
+                    if name != facet:
+                        bits &= mask
+                return bits
+
+            def values(facet):
+                counts = self.value_counts(facet, excluding(facet))
+                shown = heapq.nlargest(
+                    FACET_LIMIT,
+                    (value_id for value_id, count in counts.items() if count),
+                    key=counts.get,
+                )
+                shown += [
+                    value_id
+                    for value_id in selected[facet]
+                    if value_id not in shown and counts.get(value_id)
+                ]
+                names = self.names[facet]
+                return [
+                    {
+                        "id": value_id,
+                        "name": names.get(value_id, ""),
+                        "count": counts[value_id],
+                    }
+                    for value_id in shown
+                ]
+
+            price_base = excluding("price")
+            availability_base = excluding("availability")
+            return {
+                "total": excluding(None).bit_count(),
+                "categories": values("categories"),
+                "tags": values("tags"),
+                "teachers": values("teachers"),
+                "price_buckets": [
+                    {
+                        "label": label,
+                        "min_price": low,
+                        "max_price": high,
+                        "count": (bits & price_base).bit_count(),
+                    }
+                    for (label, low, high), bits in zip(
+                        PRICE_BUCKETS, self.price_buckets
+                    )
+                ],
+                "has_available_slots": {
+                    "available": (self.available & availability_base).bit_count(),
+                    "full": (~self.available & availability_base).bit_count(),
+                },
+            }
+
+
+_facets = None
+_facets_lock = threading.Lock()
+
+
+def get_facet_index():
+    """Return this worker's facet index, rebuilding it after invalidation.
+
+    Signals only invalidate the index of the worker that made the write, so
+    it is also rebuilt once it is LMS_SEARCH_SYNC_SECONDS old; meanwhile
+    other requests keep using the old one.
+    """
+    global _facets
+    facets = _facets
+    if facets is None:
+        with _facets_lock:
+            if _facets is None:
+                _facets = FacetIndex.load()
+            facets = _facets
+    elif time.monotonic() - facets.built_at >= getattr(
+        settings, "LMS_SEARCH_SYNC_SECONDS", 30
+    ) and _facets_lock.acquire(blocking=False):
+        try:
+            if _facets is facets:
+                _facets = FacetIndex.load()
+            facets = _facets
+        finally:
+            _facets_lock.release()
+    return facets
+
+
+def loaded_facet_index():
+    return _facets
+
+
+def invalidate_facet_index():
+    global _facets
+    _facets = None
@@ -0,0 +1,124 @@
+import heapq
+import math
+import pickle
+import threading
+from collections import Counter
+
+from lms_core.search.tokenizer import tokenize
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class InvertedIndex:
+    """In-memory term -> {doc_id: tf} index ranked with Okapi BM25.
+
+    Documents are added as weighted fields, e.g. ``{"name": (text, 3)}``;
+    a field weight repeats its terms so a name match outranks a description
+    match. Signal handlers update it from request threads, so reads and
+    writes share one lock.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_len = {}
+        self.total_len = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_len
+
+    def add(self, doc_id, fields):
+        terms = Counter()
+        for text, weight in fields.values():
+            for term in tokenize(text):
+                terms[term] += weight
+
+        with self.lock:
+            self._remove(doc_id)
+            for term, tf in terms.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+            self.doc_terms[doc_id] = tuple(terms)
+            self.doc_len[doc_id] = sum(terms.values())
+            self.total_len += self.doc_len[doc_id]
+
+    def remove(self, doc_id):
+        with self.lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for term in self.doc_terms.pop(doc_id, ()):
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+        self.total_len -= self.doc_len.pop(doc_id, 0)
+
+    def search(self, query, limit=20, candidates=None):
+        """Return (total_matches, [(doc_id, score), ...]) for the top ``limit``.
+
+        ``candidates`` optionally restricts matches to a set of doc ids
+        (pre-filtered by price, category, ...). Scores are accumulated term
+        by term over the posting lists only, never over the whole corpus.
+        """
+        terms = set(tokenize(query))
+        with self.lock:
+            return self._search(terms, limit, candidates)
+
+    def matches(self, query):
+        """Return the ids of every document matching any query term"""
+        terms = set(tokenize(query))
+        with self.lock:
+            found = set()
+            for term in terms:
+                found.update(self.postings.get(term, ()))
+            return found
+
+    def _search(self, terms, limit, candidates):
+        n_docs = len(self.doc_len)
+        if not terms or not n_docs:
+            return 0, []
+
+        avg_len = self.total_len / n_docs
+        scores = {}
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            if candidates is not None and len(candidates) < df:
+                docs = ((d, posting[d]) for d in candidates if d in posting)
+            else:
+                docs = posting.items()
+            for doc_id, tf in docs:
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (
+                    tf + norm
+                )
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return len(scores), top
+
+    def dump(self, fileobj):
+        with self.lock:
+            pickle.dump(
+                (self.postings, self.doc_terms, self.doc_len, self.total_len),
+                fileobj,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    @classmethod
+    def load(cls, fileobj):
+        """Load a snapshot written by ``dump``; only load trusted files"""
+        index = cls()
+        index.postings, index.doc_terms, index.doc_len, index.total_len = pickle.load(
+            fileobj
+        )
+        return index
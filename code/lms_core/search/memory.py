@@ -0,0 +1,194 @@
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from lms_core.models import ContentTag, Course, CourseCategory, CourseContent
+from lms_core.search.inverted_index import InvertedIndex
+
+logger = logging.getLogger(__name__)
+
+NAME_WEIGHT = 3
+LABEL_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+# catch_up() re-reads rows updated this long before the last sync, so a
+# write whose transaction committed after the sync started is not missed
+CATCH_UP_OVERLAP = timedelta(seconds=5)
+
+
+def course_fields(course, category_names):
+    return {
+        "name": (course.name, NAME_WEIGHT),
+        "categories": (" ".join(category_names), LABEL_WEIGHT),
+        "description": (course.description, DESCRIPTION_WEIGHT),
+    }
+
+
+def content_fields(content, tag_names):
+    return {
+        "name": (content.name, NAME_WEIGHT),
+        "tags": (" ".join(tag_names), LABEL_WEIGHT),
+        "description": (content.description, DESCRIPTION_WEIGHT),
+    }
+
+
+class MemorySearchBackend:
+    """BM25 search over two in-process inverted indexes (courses, contents).
+
+    Only published contents are indexed. The backend is built once per
+    worker (or loaded from a snapshot and caught up from ``updated_at``) and
+    then kept current by model signals for this worker's own writes, plus
+    a catch_up() at most every LMS_SEARCH_SYNC_SECONDS for the writes of
+    other workers.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self.courses = InvertedIndex()
+        self.contents = InvertedIndex()
+        self.synced_at = None
+        self.checked_at = time.monotonic()
+        self.sync_lock = threading.Lock()
+
+    def build(self):
+        started = timezone.now()
+        self._index_courses(Course.objects.all())
+        self._index_contents(CourseContent.objects.filter(is_published=True))
+        self.synced_at = started
+
+    def _index_courses(self, queryset):
+        categories = defaultdict(list)
+        for course_id, name in CourseCategory.objects.filter(
+            course__in=queryset
+        ).values_list("course_id", "category__name"):
+            categories[course_id].append(name)
+        for course in queryset.only("id", "name", "description").iterator():
+            self.courses.add(course.id, course_fields(course, categories[course.id]))
+
+    def _index_contents(self, queryset):
+        tags = defaultdict(list)
+        for content_id, name in ContentTag.objects.filter(
+            content__in=queryset
+        ).values_list("content_id", "tag__name"):
+            tags[content_id].append(name)
+        for content in queryset.only("id", "name", "description").iterator():
+            self.contents.add(content.id, content_fields(content, tags[content.id]))
+
+    def index_course(self, course_id):
+        courses = Course.objects.filter(id=course_id)
+        if courses.exists():
+            self._index_courses(courses)
+        else:
+            self.courses.remove(course_id)
+
+    def index_contents(self, content_ids):
+        contents = CourseContent.objects.filter(id__in=content_ids, is_published=True)
+        indexed = set(contents.values_list("id", flat=True))
+        for content_id in set(content_ids) - indexed:
+            self.contents.remove(content_id)
+        if indexed:
+            self._index_contents(contents)
+
+    def catch_up(self):
+        """Re-index rows changed since the last sync and drop deleted ones"""
+        started = timezone.now()
+        self.checked_at = time.monotonic()
+        if self.synced_at is not None:
+            since = self.synced_at - CATCH_UP_OVERLAP
+            self._index_courses(Course.objects.filter(updated_at__gte=since))
+            changed = CourseContent.objects.filter(updated_at__gte=since)
+            self.index_contents(list(changed.values_list("id", flat=True)))
+
+        live_courses = set(Course.objects.values_list("id", flat=True))
+        for course_id in set(self.courses.doc_len) - live_courses:
+            self.courses.remove(course_id)
+        live_contents = set(
+            CourseContent.objects.filter(is_published=True).values_list("id", flat=True)
+        )
+        for content_id in set(self.contents.doc_len) - live_contents:
+            self.contents.remove(content_id)
+        self.synced_at = started
+
+    def maybe_catch_up(self, interval):
+        """catch_up() if the last one is ``interval`` seconds old; a request
+        arriving while another thread catches up searches the current index
+        """
+        if time.monotonic() - self.checked_at < interval:
+            return
+        if not self.sync_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self.checked_at >= interval:
+                self.catch_up()
+        finally:
+            self.sync_lock.release()
+
+    def search_courses(self, query, limit, candidates=None):
+        total, hits = self.courses.search(query, limit, candidates)
+        return total, [course_id for course_id, _ in hits]
+
+    def search_contents(self, query, limit, candidates=None):
+        total, hits = self.contents.search(query, limit, candidates)
+        return total, [content_id for content_id, _ in hits]
+
+    def match_courses(self, query):
+        return self.courses.matches(query)
+
+    def dump(self, path):
+        """Write a snapshot atomically; it is consistent as of ``synced_at``"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as snapshot:
+            pickle.dump(self.synced_at, snapshot)
+            self.courses.dump(snapshot)
+            self.contents.dump(snapshot)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        backend = cls()
+        with open(path, "rb") as snapshot:
+            backend.synced_at = pickle.load(snapshot)
+            backend.courses = InvertedIndex.load(snapshot)
+            backend.contents = InvertedIndex.load(snapshot)
+        return backend
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_memory_backend():
+    """Return this worker's index, loading the snapshot or building it once
+    and catching up with other workers' writes every LMS_SEARCH_SYNC_SECONDS
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _load_backend()
+    _backend.maybe_catch_up(getattr(settings, "LMS_SEARCH_SYNC_SECONDS", 30))
+    return _backend
+
+
+def loaded_memory_backend():
+    """Return the index only if this worker already has one (for signals)"""
+    return _backend
+
+
+def _load_backend():
+    snapshot = getattr(settings, "LMS_SEARCH_SNAPSHOT", None)
+    if snapshot and os.path.exists(snapshot):
+        backend = MemorySearchBackend.load(snapshot)
+        backend.catch_up()
+        logger.info("Loaded search snapshot %s", snapshot)
+    else:
+        backend = MemorySearchBackend()
+        backend.build()
+    return backend
@@ -0,0 +1,179 @@
+from collections import defaultdict
+
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.db.models.functions import Length, Substr
+from django.utils import timezone
+from lms_core.caching import course_payload, get_visible_content_ids
+from lms_core.models import ContentTag, Course, CourseCategory, CourseContent
+
+
+def filter_course_ids(filters):
+    """Course ids allowed by the non-text filters, or None when unfiltered"""
+    courses = Course.objects.all()
+    filtered = False
+    if filters.category_ids:
+        courses = courses.filter(coursecategory__category_id__in=filters.category_ids)
+        filtered = True
+    if filters.tag_ids:
+        courses = courses.filter(coursecontent__contenttag__tag_id__in=filters.tag_ids)
+        filtered = True
+    if filters.min_price is not None:
+        courses = courses.filter(price__gte=filters.min_price)
+        filtered = True
+    if filters.max_price is not None:
+        courses = courses.filter(price__lte=filters.max_price)
+        filtered = True
+    if filters.teacher_id is not None:
+        courses = courses.filter(teacher_id=filters.teacher_id)
+        filtered = True
+    if filters.has_available_slots is not None:
+        courses = courses.annotate(
+            student_count=Count("coursemember", filter=Q(coursemember__roles="std"))
+        )
+        has_slots = Q(max_students__isnull=True) | Q(
+            max_students__gt=F("student_count")
+        )
+        courses = courses.filter(
+            has_slots if filters.has_available_slots else ~has_slots
+        )
+        filtered = True
+    if not filtered:
+        return None
+    return set(courses.values_list("id", flat=True).distinct())
+
+
+def visible_contents(now):
+    """Contents students can see: published, released, and under no hidden
+    ancestor (the rule of get_visible_content_ids, checked on the path)
+    """
+    hidden_ancestor = (
+        CourseContent.objects.filter(course_id=OuterRef("course_id"))
+        .filter(Q(is_published=False) | Q(release_time__gt=now))
+        .annotate(prefix=Substr(OuterRef("path"), 1, Length("path")))
+        .filter(prefix=F("path"))
+    )
+    return CourseContent.objects.exclude(Exists(hidden_ancestor))
+
+
+def filter_content_ids(filters):
+    """Content ids allowed by the non-text filters, or None when unfiltered"""
+    contents = CourseContent.objects.filter(is_published=True)
+    filtered = False
+    if filters.category_ids:
+        contents = contents.filter(
+            course_id__coursecategory__category_id__in=filters.category_ids
+        )
+        filtered = True
+    if filters.tag_ids:
+        contents = contents.filter(contenttag__tag_id__in=filters.tag_ids)
+        filtered = True
+    if filters.min_price is not None:
+        contents = contents.filter(course_id__price__gte=filters.min_price)
+        filtered = True
+    if filters.max_price is not None:
+        contents = contents.filter(course_id__price__lte=filters.max_price)
+        filtered = True
+    if filters.teacher_id is not None:
+        contents = contents.filter(course_id__teacher_id=filters.teacher_id)
+        filtered = True
+    if not filtered:
+        return None
+    return set(contents.values_list("id", flat=True).distinct())
+
+
+def hydrate_courses(course_ids):
+    """Build CourseWithCategoriesOut dicts in the given (ranked) order"""
+    courses = Course.objects.select_related("teacher").in_bulk(course_ids)
+    categories = defaultdict(list)
+    for link in CourseCategory.objects.filter(course_id__in=course_ids).select_related(
+        "category"
+    ):
+        categories[link.course_id].append(link.category)
+
+    results = []
+    for course_id in course_ids:
+        if course_id in courses:
+            payload = course_payload(courses[course_id])
+            payload["categories"] = categories[course_id]
+            results.append(payload)
+    return results
+
+
+def hydrate_contents(content_ids, now):
+    """Build SearchContentOut dicts in ranked order, skipping contents
+    students cannot see
+    """
+    contents = CourseContent.objects.select_related("course_id__teacher").in_bulk(
+        content_ids
+    )
+    tags = defaultdict(list)
+    for link in ContentTag.objects.filter(content_id__in=content_ids).select_related(
+        "tag"
+    ):
+        tags[link.content_id].append(link.tag)
+
+    visible = {}
+    results = []
+    for content_id in content_ids:
+        content = contents.get(content_id)
+        if content is None:
+            continue
+        course_id = content.course_id_id
+        if course_id not in visible:
+            visible[course_id] = get_visible_content_ids(course_id, now)
+        if content_id not in visible[course_id]:
+            continue
+        results.append(
+            {
+                "id": content.id,
+                "name": content.name,
+                "description": content.description,
+                "course_id": course_payload(content.course_id),
+                "release_time": content.release_time,
+                "is_published": content.is_published,
+                "tags": tags[content_id],
+                "created_at": content.created_at,
+                "updated_at": content.updated_at,
+            }
+        )
+    return results
+
+
+def run_search(backend, filters, limit=20):
+    """Search courses and contents, returning the SearchResultsOut shape"""
+    now = timezone.now()
+    course_candidates = filter_course_ids(filters)
+    content_candidates = filter_content_ids(filters)
+    visible = visible_contents(now)
+
+    if filters.query:
+        # Only visible contents are matched, so the total counts them alone
+        visible_ids = set(visible.values_list("id", flat=True))
+        if content_candidates is None:
+            content_candidates = visible_ids
+        else:
+            content_candidates &= visible_ids
+        total_courses, course_ids = backend.search_courses(
+            filters.query, limit, course_candidates
+        )
+        total_contents, content_ids = backend.search_contents(
+            filters.query, limit, content_candidates
+        )
+    else:
+        courses = Course.objects.order_by("-created_at", "-id")
+        if course_candidates is not None:
+            courses = courses.filter(id__in=course_candidates)
+        contents = visible.order_by("-id")
+        if content_candidates is not None:
+            contents = contents.filter(id__in=content_candidates)
+        total_courses, total_contents = courses.count(), contents.count()
+        course_ids = list(courses.values_list("id", flat=True)[:limit])
+        content_ids = list(contents.values_list("id", flat=True)[:limit])
+
+    return {
+        "courses": hydrate_courses(course_ids),
+        "contents": hydrate_contents(content_ids, now),
+        "total_courses": total_courses,
+        "total_contents": total_contents,
+        "filters_applied": filters.model_dump(exclude_none=True),
+    }
@@ -0,0 +1,208 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db.models import Count, Q
+from lms_core.models import Category, ContentTag, Course, CourseCategory, Tag
+from lms_core.search.tokenizer import WORD_RE, normalize
+
+MAX_KEY_LENGTH = 64
+MAX_SUGGESTIONS = 20
+
+# Prefixes matching more keys than this (one or two letters) are ranked
+# once and memoized until the next rename, or for PREFIX_CACHE_TTL seconds
+# of enrollment changes
+SCAN_LIMIT = 256
+PREFIX_CACHE_TTL = 60
+
+COURSE = "course"
+CATEGORY = "category"
+TAG = "tag"
+
+
+def prefix_keys(label):
+    """Normalized keys starting at every word, so "py" finds "Belajar Python" """
+    words = WORD_RE.findall(normalize(label))
+    return {" ".join(words[start:])[:MAX_KEY_LENGTH] for start in range(len(words))}
+
+
+def normalize_prefix(prefix):
+    words = WORD_RE.findall(normalize(prefix))
+    return " ".join(words)[:MAX_KEY_LENGTH]
+
+
+class SuggestIndex:
+    """Sorted array of (key, kind, id) answering prefix lookups by bisect.
+
+    Courses are weighted by enrolled students; a category or tag by the
+    students of the courses it labels. Renames and enrollments update the
+    array and weights in place. ``refs`` mirrors ``keys`` with just
+    (kind, id), so a prefix range is deduplicated by slicing it into a set.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.refs = []
+        self.items = {}
+        self.course_labels = {}
+        self.prefix_cache = {}
+        self.lock = threading.Lock()
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def from_rows(cls, courses, course_links, labels):
+        """Build from (course_id, name, students), (course_id, (kind, id))
+        link and (kind, id, name) label rows.
+        """
+        index = cls()
+        linked = defaultdict(set)
+        for course_id, item in course_links:
+            linked[course_id].add(item)
+
+        weights = Counter()
+        entries = []
+        for course_id, name, students in courses:
+            index.items[(COURSE, course_id)] = [name, students]
+            entries.extend((key, COURSE, course_id) for key in prefix_keys(name))
+            for item in linked.get(course_id, ()):
+                weights[item] += students
+        index.course_labels = {
+            course_id: frozenset(items) for course_id, items in linked.items()
+        }
+        for kind, pk, name in labels:
+            index.items[(kind, pk)] = [name, weights[(kind, pk)]]
+            entries.extend((key, kind, pk) for key in prefix_keys(name))
+        entries.sort()
+        index.keys = entries
+        index.refs = [(kind, pk) for _, kind, pk in entries]
+        return index
+
+    @classmethod
+    def load(cls):
+        courses = Course.objects.annotate(
+            students=Count("coursemember", filter=Q(coursemember__roles="std"))
+        ).values_list("id", "name", "students")
+        course_links = [
+            (course_id, (CATEGORY, category_id))
+            for course_id, category_id in CourseCategory.objects.values_list(
+                "course_id", "category_id"
+            )
+        ]
+        course_links += [
+            (course_id, (TAG, tag_id))
+            for course_id, tag_id in ContentTag.objects.values_list(
+                "content__course_id", "tag_id"
+            ).distinct()
+        ]
+        labels = [
+            (kind, pk, name)
+            for kind, model in ((CATEGORY, Category), (TAG, Tag))
+            for pk, name in model.objects.values_list("id", "name")
+        ]
+        return cls.from_rows(courses, course_links, labels)
+
+    def set_label(self, kind, pk, label):
+        """Add or rename an item, keeping its weight"""
+        with self.lock:
+            weight = self._remove(kind, pk)
+            self.items[(kind, pk)] = [label, weight]
+            for key in prefix_keys(label):
+                position = bisect_left(self.keys, (key, kind, pk))
+                self.keys.insert(position, (key, kind, pk))
+                self.refs.insert(position, (kind, pk))
+            self.prefix_cache.clear()
+
+    def remove(self, kind, pk):
+        with self.lock:
+            self._remove(kind, pk)
+            self.prefix_cache.clear()
+
+    def _remove(self, kind, pk):
+        item = self.items.pop((kind, pk), None)
+        if item is None:
+            return 0
+        for key in prefix_keys(item[0]):
+            position = bisect_left(self.keys, (key, kind, pk))
+            if position < len(self.keys) and self.keys[position] == (key, kind, pk):
+                del self.keys[position]
+                del self.refs[position]
+        return item[1]
+
+    def add_enrollments(self, course_id, delta):
+        """Shift a course's weight, and its categories' and tags', by ``delta``"""
+        with self.lock:
+            for item in ((COURSE, course_id), *self.course_labels.get(course_id, ())):
+                if item in self.items:
+                    self.items[item][1] += delta
+
+    def suggest(self, prefix, limit=10):
+        """Top ``limit`` items with a word starting with ``prefix``, by weight"""
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        with self.lock:
+            cached = self.prefix_cache.get(prefix)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1][:limit]
+
+            start = bisect_left(self.keys, (prefix,))
+            end = bisect_left(self.keys, (prefix + "\uffff",), start)
+            items = self.items
+            top = heapq.nsmallest(
+                MAX_SUGGESTIONS,
+                set(self.refs[start:end]),
+                key=lambda item: (-items[item][1], items[item][0]),
+            )
+            suggestions = [
+                {
+                    "kind": kind,
+                    "id": pk,
+                    "label": self.items[(kind, pk)][0],
+                    "weight": self.items[(kind, pk)][1],
+                }
+                for kind, pk in top
+            ]
+            if end - start > SCAN_LIMIT:
+                expires = time.monotonic() + PREFIX_CACHE_TTL
+                self.prefix_cache[prefix] = (expires, suggestions)
+            return suggestions[:limit]
+
+
+_suggest = None
+_suggest_lock = threading.Lock()
+
+
+def get_suggest_index():
+    """Return this worker's suggest index, rebuilding it after invalidation
+    or once it is LMS_SEARCH_SYNC_SECONDS old (writes of other workers)
+    """
+    global _suggest
+    index = _suggest
+    if index is None:
+        with _suggest_lock:
+            if _suggest is None:
+                _suggest = SuggestIndex.load()
+            index = _suggest
+    elif time.monotonic() - index.built_at >= getattr(
+        settings, "LMS_SEARCH_SYNC_SECONDS", 30
+    ) and _suggest_lock.acquire(blocking=False):
+        try:
+            if _suggest is index:
+                _suggest = SuggestIndex.load()
+            index = _suggest
+        finally:
+            _suggest_lock.release()
+    return index
+
+
+def loaded_suggest_index():
+    return _suggest
+
+
+def invalidate_suggest_index():
+    global _suggest
+    _suggest = None
@@ -0,0 +1,106 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    # Bahasa Indonesia
+    "ada adalah agar akan aku anda antara apa atau bagi bahwa banyak belum "
+    "beberapa bisa dalam dan dapat dari dengan di dia hal hanya harus ia "
+    "ini itu jadi jika juga kami kamu karena ke kita lagi lebih maka masih "
+    "mereka nya oleh pada para pun saat saja sama sangat saya sebagai "
+    "secara sedang sehingga sejak semua seperti serta setelah sudah tak "
+    "tanpa telah tentang tersebut tetapi tidak untuk yaitu yang "
+    # English
+    "a about after all also an and any are as at be been but by can for "
+    "from had has have he her his how i if in into is it its more no not "
+    "of on or our she so than that the their them then there these they "
+    "this to was we were what when which who will with you your".split()
+)
+
+# Indonesian inflectional and derivational suffixes
+ID_PARTICLES = ("lah", "kah", "tah", "pun")
+ID_POSSESSIVES = ("nya", "ku", "mu")
+ID_SUFFIXES = ("kan", "an", "i")
+# (prefix, letter restored when the root starts with a vowel) - "menulis"
+# is meN- + "tulis", "pemrograman" is peN- + "program"
+ID_PREFIXES = (
+    ("meny", "s"),
+    ("peny", "s"),
+    ("meng", ""),
+    ("peng", ""),
+    ("mem", "p"),
+    ("pem", "p"),
+    ("men", "t"),
+    ("pen", "t"),
+    ("ber", ""),
+    ("ter", ""),
+    ("me", ""),
+    ("pe", ""),
+    ("be", ""),
+    ("di", ""),
+    ("ke", ""),
+    ("se", ""),
+)
+EN_SUFFIXES = ("ingly", "edly", "ing", "ies", "ied", "es", "ed", "ly", "s")
+VOWELS = frozenset("aeiou")
+
+MIN_STEM = 4
+
+
+def _strip_suffix(word, suffixes):
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[: -len(suffix)]
+    return word
+
+
+def _strip_prefix(word):
+    for prefix, restore in ID_PREFIXES:
+        rest = word[len(prefix) :]
+        if word.startswith(prefix) and len(rest) >= MIN_STEM:
+            if prefix == "be" and rest[0] == "r":
+                # a "ber-" word whose root was too short to strip
+                continue
+            if restore and (rest[0] in VOWELS or (restore == "p" and rest[0] == "r")):
+                return restore + rest
+            return rest
+    return word
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    """Light affix stripping for Indonesian and English.
+
+    Not a full morphological analyser: it only has to map a query word and
+    its indexed variants onto the same term ("belajar", "mempelajari" and
+    "pembelajaran" all meet, as do "program", "programs" and
+    "programming"). Every stem keeps at least four letters.
+    """
+    if word.isdigit():
+        return word
+    word = _strip_suffix(word, ID_PARTICLES)
+    word = _strip_suffix(word, ID_POSSESSIVES)
+    word = _strip_suffix(word, ID_SUFFIXES)
+    for _ in range(2):
+        word = _strip_prefix(word)
+    stemmed = _strip_suffix(word, EN_SUFFIXES)
+    if stemmed != word and len(stemmed) > MIN_STEM and stemmed[-1] == stemmed[-2]:
+        # "programming" -> "programm" -> "program"
+        stemmed = stemmed[:-1]
+    return stemmed
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text):
+    """Split text into stemmed, stopword-free index terms"""
+    if not text:
+        return []
+    return [
+        stem(word) for word in WORD_RE.findall(normalize(text)) if word not in STOPWORDS
+    ]
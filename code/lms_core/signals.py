@@ -0,0 +1,325 @@
+from collections import defaultdict
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from lms_core.caching import (
+    get_course_payloads,
+    get_visible_content_ids,
+    invalidate_content_tree,
+    invalidate_course_payloads,
+    invalidate_user_memberships,
+    invalidate_visible_contents,
+)
+from lms_core.models import (
+    Category,
+    Comment,
+    ContentTag,
+    Course,
+    CourseCategory,
+    CourseContent,
+    CourseMember,
+    DiscussionReply,
+    DiscussionThread,
+    ForumStats,
+    Notification,
+    NotificationCounter,
+    Tag,
+)
+from lms_core.notifications import announce, notify_course, notify_digest
+from lms_core.realtime import course_channel, publish, thread_channel
+from lms_core.scheduler import contents_released
+from lms_core.search.facets import invalidate_facet_index, loaded_facet_index
+from lms_core.search.memory import loaded_memory_backend
+from lms_core.search.suggest import (
+    CATEGORY,
+    COURSE,
+    TAG,
+    invalidate_suggest_index,
+    loaded_suggest_index,
+)
+
+
+@receiver([post_save, post_delete], sender=CourseMember)
+def membership_changed(sender, instance, **kwargs):
+    invalidate_user_memberships(instance.user_id_id)
+    facets = loaded_facet_index()
+    if facets:
+        course = instance.course_id
+        facets.set_available(course.id, not course.is_enrollment_full())
+    suggestions = loaded_suggest_index()
+    if suggestions and instance.roles == "std":
+        if kwargs.get("created"):
+            suggestions.add_enrollments(instance.course_id_id, 1)
+        elif kwargs["signal"] is post_delete:
+            suggestions.add_enrollments(instance.course_id_id, -1)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    invalidate_course_payloads(instance.id)
+    invalidate_facet_index()
+    search = loaded_memory_backend()
+    if search:
+        search.index_course(instance.id)
+    update_suggestion(COURSE, instance, kwargs["signal"])
+
+
+def update_suggestion(kind, instance, signal):
+    suggestions = loaded_suggest_index()
+    if suggestions:
+        if signal is post_delete:
+            suggestions.remove(kind, instance.id)
+        else:
+            suggestions.set_label(kind, instance.id, instance.name)
+
+
+@receiver(post_save, sender=User)
+def teacher_changed(sender, instance, created, update_fields, **kwargs):
+    # The teacher is embedded in every cached payload of their courses;
+    # logins only touch last_login, which is not part of the payload.
+    # updated_at moves too, as it is the course detail's ETag
+    if not created and update_fields != frozenset({"last_login"}):
+        course_ids = list(
+            Course.objects.filter(teacher=instance).values_list("id", flat=True)
+        )
+        if course_ids:
+            Course.objects.filter(id__in=course_ids).update(updated_at=timezone.now())
+            invalidate_course_payloads(*course_ids)
+            invalidate_facet_index()
+
+
+@receiver([post_save, post_delete], sender=CourseContent)
+def content_changed(sender, instance, **kwargs):
+    invalidate_content_tree(instance.course_id_id)
+    invalidate_visible_contents(instance.course_id_id)
+    search = loaded_memory_backend()
+    if search:
+        search.index_contents([instance.id])
+
+
+@receiver(contents_released)
+def scheduled_contents_released(sender, course_ids, content_ids, **kwargs):
+    invalidate_content_tree(*course_ids)
+    invalidate_visible_contents(*course_ids)
+    search = loaded_memory_backend()
+    if search:
+        search.index_contents(content_ids)
+
+    # Members hear about released contents they can now see (not the ones
+    # still under a hidden module): one notification per course
+    released = defaultdict(list)
+    for content_id, course_id, name in CourseContent.objects.filter(
+        id__in=content_ids
+    ).values_list("id", "course_id", "name"):
+        if content_id in get_visible_content_ids(course_id):
+            released[course_id].append((content_id, name))
+    courses = get_course_payloads(list(released))
+    for course_id, contents in released.items():
+        course = courses.get(course_id)
+        if course is None:
+            continue
+        if len(contents) == 1:
+            [(content_id, name)] = contents
+            title = f"New content: {name}"
+        else:
+            content_id = None
+            title = f"{len(contents)} new contents in {course['name']}"
+        notify_course(
+            course_id,
+            exclude_user_id=course["teacher"]["id"],
+            sender_id=course["teacher"]["id"],
+            notification_type="new_content",
+            title=title[:200],
+            message=", ".join(name for _, name in contents)[:500],
+            related_content_id=content_id,
+            action_url=f"/courses/{course_id}/contents",
+        )
+
+
+@receiver([post_save, post_delete], sender=CourseCategory)
+def course_category_changed(sender, instance, **kwargs):
+    invalidate_facet_index()
+    invalidate_suggest_index()
+    search = loaded_memory_backend()
+    if search:
+        search.index_course(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=ContentTag)
+def content_tag_changed(sender, instance, **kwargs):
+    invalidate_facet_index()
+    invalidate_suggest_index()
+    search = loaded_memory_backend()
+    if search:
+        search.index_contents([instance.content_id])
+
+
+@receiver(post_save, sender=Category)
+def category_renamed(sender, instance, created, **kwargs):
+    invalidate_facet_index()
+    search = loaded_memory_backend()
+    if search and not created:
+        for course_id in CourseCategory.objects.filter(category=instance).values_list(
+            "course_id", flat=True
+        ):
+            search.index_course(course_id)
+
+
+@receiver(post_save, sender=Tag)
+def tag_renamed(sender, instance, created, **kwargs):
+    invalidate_facet_index()
+    search = loaded_memory_backend()
+    if search and not created:
+        search.index_contents(
+            list(
+                ContentTag.objects.filter(tag=instance).values_list(
+                    "content_id", flat=True
+                )
+            )
+        )
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    update_suggestion(CATEGORY, instance, kwargs["signal"])
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    update_suggestion(TAG, instance, kwargs["signal"])
+
+
+@receiver(post_delete, sender=DiscussionReply)
+def reply_deleted(sender, instance, **kwargs):
+    # Runs inside the delete's transaction, once per reply, including the
+    # replies removed by cascade from a deleted parent reply
+    latest = (
+        DiscussionReply.objects.filter(thread_id=OuterRef("id"))
+        .order_by("-created_at")
+        .values("created_at")[:1]
+    )
+    DiscussionThread.objects.filter(id=instance.thread_id).update(
+        reply_count=F("reply_count") - 1,
+        last_reply_at=Subquery(latest),
+    )
+    ForumStats.objects.filter(
+        course_id__in=DiscussionThread.objects.filter(id=instance.thread_id).values(
+            "course_id"
+        )
+    ).update(total_replies=F("total_replies") - 1)
+
+
+@receiver(post_delete, sender=DiscussionThread)
+def thread_deleted(sender, instance, **kwargs):
+    # Its replies were deleted (and subtracted) first by the cascade
+    ForumStats.objects.filter(course_id=instance.course_id).update(
+        total_threads=F("total_threads") - 1
+    )
+
+
+@receiver(post_save, sender=DiscussionThread)
+def thread_posted(sender, instance, created, **kwargs):
+    if created:
+        event = {
+            "type": "thread",
+            "id": instance.id,
+            "course_id": instance.course_id,
+            "author_id": instance.author_id,
+            "title": instance.title,
+            "created_at": instance.created_at,
+        }
+        channels = [course_channel(instance.course_id)]
+        transaction.on_commit(partial(publish, channels, event))
+
+
+@receiver(post_save, sender=DiscussionReply)
+def reply_posted(sender, instance, created, **kwargs):
+    if created:
+        course_id = instance.thread.course_id
+        event = {
+            "type": "reply",
+            "id": instance.id,
+            "thread_id": instance.thread_id,
+            "parent_reply_id": instance.parent_reply_id,
+            "author_id": instance.author_id,
+            "content": instance.content,
+            "created_at": instance.created_at,
+        }
+        channels = [thread_channel(instance.thread_id), course_channel(course_id)]
+        transaction.on_commit(partial(publish, channels, event))
+
+        # The thread author and the replied-to author hear about it, in
+        # digests when the thread is busy
+        recipients = {instance.thread.author_id}
+        if instance.parent_reply_id:
+            recipients.add(instance.parent_reply.author_id)
+        recipients.discard(instance.author_id)
+        notify_digest(
+            recipients,
+            "discussion",
+            course_id,
+            sender_id=instance.author_id,
+            title=f"New reply in {instance.thread.title}"[:200],
+            message=instance.content[:500],
+            action_url=f"/threads/{instance.thread_id}",
+        )
+
+
+@receiver(post_save, sender=Comment)
+def comment_posted(sender, instance, created, **kwargs):
+    # Only approved comments are pushed, students never see held ones; a
+    # comment approved later is pushed then (clients upsert by id)
+    if instance.is_approved:
+        course_id = instance.content_id.course_id_id
+        event = {
+            "type": "comment",
+            "id": instance.id,
+            "content_id": instance.content_id_id,
+            "comment": instance.comment,
+            "created_at": instance.created_at,
+        }
+        transaction.on_commit(partial(publish, [course_channel(course_id)], event))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    # The teacher hears about every new comment (held ones need review),
+    # coalesced per course
+    if created:
+        content = instance.content_id
+        course = get_course_payloads([content.course_id_id]).get(content.course_id_id)
+        if course is None:
+            return
+        author_id = instance.member_id.user_id_id
+        notify_digest(
+            {course["teacher"]["id"]} - {author_id},
+            "comment",
+            content.course_id_id,
+            sender_id=author_id,
+            related_content_id=content.id,
+            title=f"New comment on {content.name}"[:200],
+            message=instance.comment[:500],
+        )
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    # Bulk inserts (fan-out, digests) announce their own chunks
+    if created:
+        transaction.on_commit(partial(announce, [instance]))
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    NotificationCounter.add(
+        [instance.recipient_id],
+        instance.notification_type,
+        total=-1,
+        unread=0 if instance.is_read else -1,
+        created_at=instance.created_at,
+    )
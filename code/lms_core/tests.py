@@ -0,0 +1,1128 @@
+import asyncio
+import json
+import warnings
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from lms_core import notifications, realtime
+from lms_core.caching import (
+    get_content_tree,
+    get_visible_content_ids,
+    invalidate_content_tree,
+)
+from lms_core.models import (
+    ArchivedNotification,
+    Category,
+    Comment,
+    ContentTag,
+    Course,
+    CourseCategory,
+    CourseContent,
+    CourseMember,
+    DiscussionReply,
+    DiscussionThread,
+    FanOutJob,
+    ForumActivity,
+    ForumStats,
+    Notification,
+    NotificationCounter,
+    NotificationPreference,
+    PendingDigest,
+    Tag,
+)
+from lms_core.moderation import APPROVE, CommentScreener, screen_pending_comments
+from lms_core.notifications import (
+    drain_fan_out_jobs,
+    flush_digests,
+    mark_all_read,
+    notify_course,
+    notify_digest,
+)
+from lms_core.renderers import negotiate_media_type
+from lms_core.retention import move_in_chunks
+from lms_core.scheduler import release_due_contents
+from lms_core.search import facets, memory, suggest
+from lms_core.search.database import get_database_backend
+from ninja_simple_jwt.jwt.token_operations import get_access_token_for_user
+
+
+class NotificationPollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("teacher", password="x")
+        cls.student = User.objects.create_user("student", password="x")
+        cls.course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=cls.teacher
+        )
+        cls.content = CourseContent.objects.create(
+            name="Modul 1", course_id=cls.course, is_published=True
+        )
+
+    def poll(self, after=0, unread=False):
+        token = get_access_token_for_user(self.student)[0]
+        return self.client.get(
+            f"/api/v1/notifications/poll?after={after}&timeout=0&unread={unread}",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+    def test_poll_serializes_related_content(self):
+        notification = Notification.objects.create(
+            recipient=self.student,
+            sender=self.teacher,
+            title="Konten baru",
+            message="Modul 1",
+            notification_type="new_content",
+            related_course=self.course,
+            related_content=self.content,
+        )
+
+        response = self.poll()
+
+        self.assertEqual(response.status_code, 200)
+        [item] = response.json()
+        self.assertEqual(item["id"], notification.id)
+        self.assertEqual(item["related_content"]["id"], self.content.id)
+        self.assertEqual(
+            item["related_content"]["course_id"]["teacher"]["id"], self.teacher.id
+        )
+
+    def test_poll_without_news_returns_empty_list(self):
+        response = self.poll(after=10**9)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_poll_reports_read_all_as_read(self):
+        covered, newer = [
+            Notification.objects.create(
+                recipient=self.student,
+                title=title,
+                message="m",
+                notification_type="announcement",
+            )
+            for title in ("Lama", "Baru")
+        ]
+        mark_all_read(self.student.id, now=covered.created_at)
+        Notification.objects.filter(id=newer.id).update(
+            created_at=covered.created_at + timedelta(seconds=1)
+        )
+
+        items = self.poll().json()
+        unread = self.poll(unread=True).json()
+
+        self.assertEqual(
+            [(item["id"], item["is_read"], item["is_unread"]) for item in items],
+            [(covered.id, False, False), (newer.id, False, True)],
+        )
+        self.assertEqual([item["id"] for item in unread], [newer.id])
+
+
+class NotificationCounterTests(TestCase):
+    def test_add_shifts_each_counter_once(self):
+        emptied, existing, missing = [
+            User.objects.create_user(name, password="x")
+            for name in ("emptied", "existing", "missing")
+        ]
+        NotificationCounter.objects.create(user=emptied, total=1, announcement_count=1)
+        NotificationCounter.objects.create(
+            user=existing, total=3, unread=1, announcement_count=3
+        )
+
+        NotificationCounter.add([emptied.id], "announcement", total=-1, unread=0)
+        NotificationCounter.add([emptied.id, existing.id, missing.id], "announcement")
+
+        counters = {
+            counter.user_id: (counter.total, counter.unread, counter.announcement_count)
+            for counter in NotificationCounter.objects.all()
+        }
+        self.assertEqual(
+            counters,
+            {emptied.id: (1, 1, 1), existing.id: (4, 2, 4), missing.id: (1, 1, 1)},
+        )
+
+
+class CourseAnnouncementTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user("teacher", password="x")
+        self.courses = [
+            Course.objects.create(
+                name=name, description="d", price=0, teacher=self.teacher
+            )
+            for name in ("Big", "Small")
+        ]
+        self.members = [
+            User.objects.create_user(f"member{number}", password="x")
+            for number in range(4)
+        ]
+        big, small = self.courses
+        for member in self.members[:3]:
+            CourseMember.objects.create(course_id=big, user_id=member)
+        CourseMember.objects.create(course_id=small, user_id=self.members[3])
+        CourseMember.objects.create(course_id=big, user_id=self.teacher)
+        NotificationPreference.objects.create(
+            user=self.members[2], announcement_notifications=False
+        )
+
+    def announce(self, course):
+        notify_course(
+            course.id,
+            exclude_user_id=self.teacher.id,
+            sender_id=self.teacher.id,
+            title=f"News from {course.name}",
+            message="m",
+        )
+
+    def test_jobs_are_drained_by_the_worker_taking_turns(self):
+        big, small = self.courses
+        self.announce(big)
+        self.announce(small)
+
+        self.assertEqual(FanOutJob.objects.count(), 2)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(drain_fan_out_jobs(chunk_size=1), 3)
+
+        self.assertFalse(FanOutJob.objects.exists())
+        self.assertEqual(
+            list(
+                Notification.objects.order_by("id").values_list(
+                    "related_course_id", "recipient_id"
+                )
+            ),
+            [
+                (big.id, self.members[0].id),
+                (small.id, self.members[3].id),
+                (big.id, self.members[1].id),
+            ],
+        )
+
+    def test_worker_resumes_after_the_last_written_member(self):
+        big, _ = self.courses
+        self.announce(big)
+        FanOutJob.objects.update(last_user_id=self.members[0].id)
+
+        self.assertEqual(drain_fan_out_jobs(), 1)
+        self.assertEqual(
+            list(Notification.objects.values_list("recipient_id", flat=True)),
+            [self.members[1].id],
+        )
+
+
+@override_settings(LMS_NOTIFICATION_DIGEST_WINDOW=300)
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        notifications._throttle = None
+
+    def tearDown(self):
+        notifications._throttle = None
+
+    def test_first_event_is_sent_and_the_rest_stored_until_flushed(self):
+        teacher = User.objects.create_user("teacher", password="x")
+        student = User.objects.create_user("student", password="x")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=teacher
+        )
+        for number in range(4):
+            notify_digest(
+                [teacher.id],
+                "comment",
+                course.id,
+                sender_id=student.id,
+                title=f"New comment {number}",
+                message="m",
+            )
+
+        self.assertEqual(
+            list(Notification.objects.values_list("title", flat=True)),
+            ["New comment 0"],
+        )
+        self.assertEqual(
+            list(PendingDigest.objects.values_list("recipient_id", "count")),
+            [(teacher.id, 3)],
+        )
+        self.assertEqual(flush_digests(), 0)
+
+        # The sender's deletion also takes the first notification with it
+        student.delete()
+        written = flush_digests(now=timezone.now() + timedelta(seconds=301))
+
+        self.assertEqual(written, 1)
+        self.assertFalse(PendingDigest.objects.exists())
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient_id, teacher.id)
+        self.assertEqual(notification.title, "3 new comments in Course")
+        self.assertIsNone(notification.sender_id)
+        self.assertEqual(NotificationCounter.objects.get(user=teacher).comment_count, 1)
+
+    def test_throttle_releases_a_key_after_the_window(self):
+        clock = [0.0]
+        throttle = notifications.DigestThrottle(300, clock=lambda: clock[0])
+
+        self.assertEqual(throttle.claim({"a", "b"}), {"a", "b"})
+        clock[0] = 299
+        self.assertEqual(throttle.claim({"a"}), set())
+        clock[0] = 300
+        self.assertEqual(throttle.claim({"a", "c"}), {"a", "c"})
+
+
+class ContentNegotiationTests(SimpleTestCase):
+    def negotiate(self, accept):
+        return negotiate_media_type(RequestFactory().get("/", HTTP_ACCEPT=accept))
+
+    def test_q_values_rank_the_formats(self):
+        self.assertEqual(
+            self.negotiate("application/msgpack;q=0.1, application/json"),
+            "application/json",
+        )
+        self.assertEqual(
+            self.negotiate("application/json;q=0.5, application/cbor"),
+            "application/cbor",
+        )
+        self.assertEqual(
+            self.negotiate("application/msgpack, */*;q=0.8"), "application/msgpack"
+        )
+
+    def test_json_wins_ties_and_wildcards(self):
+        self.assertEqual(
+            self.negotiate("application/cbor;q=0.5, application/*;q=0.5"),
+            "application/json",
+        )
+        self.assertEqual(self.negotiate("*/*"), "application/json")
+        self.assertEqual(self.negotiate("application/msgpack;q=0"), "application/json")
+
+
+class CourseDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_teacher_change_invalidates_the_etag(self):
+        teacher = User.objects.create_user("teacher", password="x", first_name="Old")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=teacher
+        )
+        etag = self.client.get(f"/api/v1/courses/{course.id}")["ETag"]
+        self.assertEqual(
+            self.client.get(
+                f"/api/v1/courses/{course.id}", HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            304,
+        )
+
+        teacher.first_name = "New"
+        teacher.save()
+        response = self.client.get(
+            f"/api/v1/courses/{course.id}", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["teacher"]["first_name"], "New")
+
+
+class ForumStatsTests(TestCase):
+    def test_updating_a_thread_does_not_count_it_again(self):
+        teacher = User.objects.create_user("teacher", password="x")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=teacher
+        )
+        thread = DiscussionThread.objects.create(
+            course=course, author=teacher, title="Tanya", description="x"
+        )
+
+        thread.title = "Tanya lagi"
+        thread.save(update_fields=["title"])
+        thread.save()
+
+        self.assertEqual(ForumStats.objects.get(course=course).total_threads, 1)
+        self.assertEqual(ForumActivity.objects.get(thread=thread).posts, 1)
+
+
+class ThreadReplyStatsTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user("teacher", password="x")
+        self.course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=self.teacher
+        )
+        self.pinned = DiscussionThread.objects.create(
+            course=self.course,
+            author=self.teacher,
+            title="Aturan",
+            description="x",
+            is_pinned=True,
+        )
+        self.thread = DiscussionThread.objects.create(
+            course=self.course, author=self.teacher, title="Tanya", description="x"
+        )
+
+    def reply(self, parent=None):
+        return DiscussionReply.objects.create(
+            thread=self.thread, author=self.teacher, content="r", parent_reply=parent
+        )
+
+    def test_replies_keep_the_thread_columns_in_step(self):
+        first = self.reply()
+        self.reply(parent=first)
+        last = self.reply()
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.reply_count, 3)
+        self.assertEqual(self.thread.last_reply_at, last.created_at)
+
+        last.delete()
+        first.delete()
+
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.reply_count, 0)
+        self.assertIsNone(self.thread.last_reply_at)
+
+    def test_listing_puts_pinned_threads_first(self):
+        self.reply()
+        token = get_access_token_for_user(self.teacher)[0]
+
+        body = self.client.get(
+            f"/api/v1/courses/{self.course.id}/threads",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        ).json()
+
+        self.assertEqual(
+            [(item["title"], item["reply_count"]) for item in body["threads"]],
+            [("Aturan", 0), ("Tanya", 1)],
+        )
+
+
+class ThreadDetailTests(TestCase):
+    def test_reply_older_than_its_parent_is_nested(self):
+        teacher = User.objects.create_user("teacher", password="x")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=teacher
+        )
+        thread = DiscussionThread.objects.create(
+            course=course, author=teacher, title="Tanya", description="x"
+        )
+        top = DiscussionReply.objects.create(thread=thread, author=teacher, content="a")
+        child = DiscussionReply.objects.create(
+            thread=thread, author=teacher, content="b", parent_reply=top
+        )
+        grandchild = DiscussionReply.objects.create(
+            thread=thread, author=teacher, content="c", parent_reply=child
+        )
+        # As after an import: the grandchild sorts before its parent
+        DiscussionReply.objects.filter(id=grandchild.id).update(
+            created_at=top.created_at - timedelta(minutes=1)
+        )
+        token = get_access_token_for_user(teacher)[0]
+
+        response = self.client.get(
+            f"/api/v1/threads/{thread.id}", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        [reply] = response.json()["replies"]
+        [nested] = reply["replies"]
+        self.assertEqual(nested["id"], child.id)
+        self.assertEqual([r["id"] for r in nested["replies"]], [grandchild.id])
+
+
+class RealtimeTests(TestCase):
+    def test_subscribers_only_get_their_channels(self):
+        broker = realtime.Broker()
+
+        async def listen():
+            async with broker.subscribe([realtime.thread_channel(1)]) as subscription:
+                broker.publish(realtime.thread_channel(2), {"type": "reply", "id": 2})
+                broker.publish(realtime.thread_channel(1), {"type": "reply", "id": 1})
+                self.assertEqual(broker.subscriber_count(), 1)
+                return await subscription.get(1), await subscription.get(0.01)
+
+        self.assertEqual(asyncio.run(listen()), ({"type": "reply", "id": 1}, None))
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_stream_formats_events_and_drops_slow_clients(self):
+        broker = realtime.Broker()
+
+        async def read():
+            stream = realtime.event_stream([realtime.course_channel(1)])
+            chunks = [await anext(stream)]
+            for number in range(realtime.QUEUE_SIZE + 1):
+                broker.publish(realtime.course_channel(1), {"type": "n", "id": number})
+            chunks += [chunk async for chunk in stream]
+            return chunks
+
+        with patch("lms_core.realtime._broker", broker):
+            chunks = asyncio.run(read())
+
+        self.assertTrue(chunks[0].startswith("retry: "))
+        self.assertEqual(chunks[1], 'event: n\ndata: {"type": "n", "id": 1}\n\n')
+        self.assertEqual(len(chunks), realtime.QUEUE_SIZE)
+
+    def test_reply_is_published_after_commit(self):
+        teacher = User.objects.create_user("teacher", password="x")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=teacher
+        )
+        thread = DiscussionThread.objects.create(
+            course=course, author=teacher, title="Tanya", description="x"
+        )
+
+        with patch("lms_core.signals.publish") as publish:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                DiscussionReply.objects.create(
+                    thread=thread, author=teacher, content="Jawab"
+                )
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        channels, event = publish.call_args.args
+        self.assertEqual(
+            channels,
+            [realtime.thread_channel(thread.id), realtime.course_channel(course.id)],
+        )
+        self.assertEqual(event["content"], "Jawab")
+
+
+class ContentReleaseTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user("teacher", password="x")
+        self.course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=self.teacher
+        )
+        self.token = get_access_token_for_user(self.teacher)[0]
+
+    def put(self, url, **data):
+        return self.client.put(
+            url,
+            json.dumps(data, default=str),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+    def test_only_scheduled_contents_are_released(self):
+        past = timezone.now() - timedelta(minutes=5)
+        draft = CourseContent.objects.create(
+            name="Draft", course_id=self.course, release_time=past
+        )
+        scheduled = CourseContent.objects.create(name="Modul 1", course_id=self.course)
+        self.assertEqual(
+            self.put(
+                f"/api/v1/contents/{scheduled.id}/schedule", release_time=past
+            ).status_code,
+            200,
+        )
+
+        with patch("lms_core.signals.notify_course") as notify_course:
+            self.assertEqual(release_due_contents(), 1)
+
+        draft.refresh_from_db()
+        scheduled.refresh_from_db()
+        self.assertFalse(draft.is_published)
+        self.assertTrue(scheduled.is_published)
+        self.assertFalse(scheduled.release_pending)
+        notify_course.assert_called_once()
+        self.assertEqual(notify_course.call_args.args, (self.course.id,))
+        self.assertEqual(
+            notify_course.call_args.kwargs["related_content_id"], scheduled.id
+        )
+
+    def test_unpublish_cancels_the_release_and_keeps_the_schedule(self):
+        release_time = timezone.now() + timedelta(minutes=5)
+        content = CourseContent.objects.create(name="Modul 1", course_id=self.course)
+        self.put(f"/api/v1/contents/{content.id}/schedule", release_time=release_time)
+
+        response = self.put(f"/api/v1/contents/{content.id}/unpublish")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(release_due_contents(release_time), 0)
+        content.refresh_from_db()
+        self.assertFalse(content.is_published)
+        self.assertEqual(content.release_time, release_time)
+
+
+class VisibleContentsTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user("teacher", password="x")
+        self.student = User.objects.create_user("student", password="x")
+        self.course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=self.teacher
+        )
+        CourseMember.objects.create(course_id=self.course, user_id=self.student)
+        cache.clear()
+
+    def test_scheduled_release_bounds_the_cache_timeout(self):
+        now = timezone.now()
+        CourseContent.objects.create(
+            name="Modul 1",
+            course_id=self.course,
+            release_pending=True,
+            release_time=now + timedelta(seconds=10),
+        )
+
+        with patch.object(cache, "set", wraps=cache.set) as cache_set:
+            self.assertEqual(get_visible_content_ids(self.course.id, now), frozenset())
+
+        self.assertEqual(cache_set.call_args.args[2], 10)
+
+    def test_etag_describes_the_served_tree(self):
+        content = CourseContent.objects.create(
+            name="Modul 1", course_id=self.course, is_published=True
+        )
+        token = get_access_token_for_user(self.student)[0]
+
+        def get():
+            return self.client.get(
+                f"/api/v1/courses/{self.course.id}/contents",
+                HTTP_AUTHORIZATION=f"Bearer {token}",
+            )
+
+        first = get()
+        # Written by another process: this worker's cached tree is now behind
+        CourseContent.objects.filter(id=content.id).update(
+            name="Modul 1 (revisi)", updated_at=timezone.now()
+        )
+        stale = get()
+        invalidate_content_tree(self.course.id)
+        fresh = get()
+
+        self.assertEqual(stale.json(), first.json())
+        self.assertEqual(stale["ETag"], first["ETag"])
+        self.assertEqual(fresh.json()[0]["name"], "Modul 1 (revisi)")
+        self.assertNotEqual(fresh["ETag"], first["ETag"])
+
+
+class CommentScreeningTests(TestCase):
+    def test_rejected_comment_is_not_screened_again(self):
+        teacher = User.objects.create_user("teacher", password="x")
+        student = User.objects.create_user("student", password="x")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=teacher
+        )
+        content = CourseContent.objects.create(
+            name="Modul 1", course_id=course, is_published=True
+        )
+        member = CourseMember.objects.create(course_id=course, user_id=student)
+        rejected, pending = Comment.objects.bulk_create(
+            [
+                Comment(content_id=content, member_id=member, comment="spam"),
+                Comment(content_id=content, member_id=member, comment="bagus"),
+            ]
+        )
+        token = get_access_token_for_user(teacher)[0]
+        response = self.client.put(
+            f"/api/v1/comments/{rejected.id}/moderate?approved=false",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        decisions = screen_pending_comments(CommentScreener([], []))
+
+        self.assertEqual(decisions[APPROVE], 1)
+        rejected.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertFalse(rejected.is_approved)
+        self.assertTrue(pending.is_approved)
+
+
+class CommentListingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("teacher", password="x")
+        cls.student = User.objects.create_user("student", password="x")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=cls.teacher
+        )
+        cls.content = CourseContent.objects.create(
+            name="Modul 1", course_id=course, is_published=True
+        )
+        members = [
+            CourseMember.objects.create(course_id=course, user_id=user)
+            for user in (
+                cls.student,
+                User.objects.create_user("other", password="x"),
+            )
+        ]
+        cls.comments = Comment.objects.bulk_create(
+            [
+                Comment(
+                    content_id=cls.content,
+                    member_id=members[number % 2],
+                    comment=f"Komentar {number}",
+                    is_approved=number != 2,
+                )
+                for number in range(5)
+            ]
+        )
+
+    def get_comments(self, user, query=""):
+        token = get_access_token_for_user(user)[0]
+        return self.client.get(
+            f"/api/v1/contents/{self.content.id}/comments?{query}",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+    def test_students_page_through_approved_comments(self):
+        seen, cursor = [], ""
+        while True:
+            body = self.get_comments(self.student, f"limit=2&cursor={cursor}").json()
+            seen += [item["comment"] for item in body["comments"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, ["Komentar 4", "Komentar 3", "Komentar 1", "Komentar 0"])
+
+    def test_page_cost_does_not_grow_with_its_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.get_comments(self.teacher, "limit=1")
+        with CaptureQueriesContext(connection) as large:
+            body = self.get_comments(self.teacher, "limit=50").json()
+
+        self.assertEqual(len(body["comments"]), 5)
+        self.assertEqual(body["comments"][0]["author"]["id"], self.student.id)
+        self.assertEqual(len(large), len(small))
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(
+            self.get_comments(self.teacher, "cursor=nope").status_code, 400
+        )
+
+
+class BulkModerationTests(TestCase):
+    def test_blank_selectors_are_rejected(self):
+        teacher = User.objects.create_user("teacher", password="x")
+        student = User.objects.create_user("student", password="x")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=teacher
+        )
+        content = CourseContent.objects.create(name="Modul 1", course_id=course)
+        member = CourseMember.objects.create(course_id=course, user_id=student)
+        Comment.objects.create(content_id=content, member_id=member, comment="x")
+        token = get_access_token_for_user(teacher)[0]
+
+        for selector in ({"keyword": ""}, {"keyword": "  "}, {"comment_ids": []}):
+            response = self.client.put(
+                "/api/v1/comments/moderate",
+                data=json.dumps(selector),
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Bearer {token}",
+            )
+            self.assertEqual(response.status_code, 400, selector)
+        self.assertFalse(Comment.objects.filter(is_approved=True).exists())
+
+    def test_reject_covers_pending_comments(self):
+        teacher = User.objects.create_user("teacher", password="x")
+        student = User.objects.create_user("student", password="x")
+        course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=teacher
+        )
+        content = CourseContent.objects.create(name="Modul 1", course_id=course)
+        member = CourseMember.objects.create(course_id=course, user_id=student)
+        Comment.objects.bulk_create(
+            [
+                Comment(content_id=content, member_id=member, comment="promo"),
+                Comment(
+                    content_id=content, member_id=member, comment="ok", is_approved=True
+                ),
+            ]
+        )
+        token = get_access_token_for_user(teacher)[0]
+
+        response = self.client.put(
+            "/api/v1/comments/moderate",
+            data=json.dumps({"content_id": content.id, "approved": False}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+        self.assertEqual(response.json()["affected"], 2)
+        self.assertFalse(
+            Comment.objects.filter(is_approved=True).exists()
+            or Comment.objects.filter(reviewed_at__isnull=True).exists()
+        )
+        self.assertEqual(
+            sum(screen_pending_comments(CommentScreener([], [])).values()), 0
+        )
+
+
+class ContentListingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("teacher", password="x")
+        cls.student = User.objects.create_user("student", password="x")
+        cls.course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=cls.teacher
+        )
+        CourseMember.objects.create(course_id=cls.course, user_id=cls.student)
+        cls.module = CourseContent.objects.create(
+            name="Modul 1", course_id=cls.course, is_published=True
+        )
+        CourseContent.objects.create(
+            name="Lesson", course_id=cls.course, parent_id=cls.module, is_published=True
+        )
+        CourseContent.objects.create(
+            name="Draft", course_id=cls.course, parent_id=cls.module
+        )
+        CourseContent.objects.create(
+            name="Later",
+            course_id=cls.course,
+            is_published=True,
+            release_time=timezone.now() + timedelta(days=1),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, nodes):
+        return [(node["name"], self.names(node["children"])) for node in nodes]
+
+    def test_tree_is_loaded_with_one_query_and_cached(self):
+        with self.assertNumQueries(1):
+            tree = get_content_tree(self.course.id)
+        with self.assertNumQueries(0):
+            get_content_tree(self.course.id)
+
+        self.assertEqual(
+            self.names(tree),
+            [("Modul 1", [("Lesson", []), ("Draft", [])]), ("Later", [])],
+        )
+
+    def test_content_change_rebuilds_the_tree(self):
+        get_content_tree(self.course.id)
+        CourseContent.objects.create(
+            name="Modul 2", course_id=self.course, is_published=True
+        )
+
+        self.assertEqual(
+            [node["name"] for node in get_content_tree(self.course.id)],
+            ["Modul 1", "Later", "Modul 2"],
+        )
+
+    def test_students_get_published_released_contents(self):
+        token = get_access_token_for_user(self.student)[0]
+
+        response = self.client.get(
+            f"/api/v1/courses/{self.course.id}/contents",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response.json()), [("Modul 1", [("Lesson", [])])])
+
+
+class ContentTreeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("teacher", password="x")
+        cls.student = User.objects.create_user("student", password="x")
+        cls.course = Course.objects.create(
+            name="Course", description="d", price=0, teacher=cls.teacher
+        )
+        CourseMember.objects.create(course_id=cls.course, user_id=cls.student)
+        cls.module = CourseContent.objects.create(
+            name="Modul 1", course_id=cls.course, is_published=True
+        )
+        cls.draft = CourseContent.objects.create(
+            name="Draft", course_id=cls.course, parent_id=cls.module
+        )
+
+    def test_unsaved_content_has_no_descendants(self):
+        content = CourseContent(name="Baru", course_id=self.course)
+
+        self.assertFalse(content.descendants().exists())
+        self.assertEqual(list(self.module.descendants()), [self.draft])
+
+    def test_breadcrumbs_of_unpublished_content_are_hidden_from_students(self):
+        token = get_access_token_for_user(self.student)[0]
+
+        response = self.client.get(
+            f"/api/v1/contents/{self.draft.id}/breadcrumbs",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(LMS_SEARCH_SYNC_SECONDS=0)
+class SearchIndexSyncTests(TestCase):
+    def setUp(self):
+        memory._backend = None
+        suggest.invalidate_suggest_index()
+        teacher = User.objects.create_user("teacher", password="x")
+        self.course = Course.objects.create(
+            name="Belajar Python", description="d", price=0, teacher=teacher
+        )
+
+    def tearDown(self):
+        memory._backend = None
+        suggest.invalidate_suggest_index()
+
+    def rename_from_another_worker(self):
+        # A queryset update sends no signals, like a write in another process
+        Course.objects.filter(id=self.course.id).update(
+            name="Kalkulus Dasar", updated_at=timezone.now()
+        )
+
+    def test_memory_index_catches_up(self):
+        memory.get_memory_backend()
+        self.rename_from_another_worker()
+
+        _, hits = memory.get_memory_backend().search_courses("kalkulus", 10)
+
+        self.assertEqual(hits, [self.course.id])
+
+    def test_suggest_index_is_rebuilt(self):
+        suggest.get_suggest_index()
+        self.rename_from_another_worker()
+
+        suggestions = suggest.get_suggest_index().suggest("kalk")
+
+        self.assertEqual([item["id"] for item in suggestions], [self.course.id])
+
+
+class SearchBackendTests(TestCase):
+    def setUp(self):
+        memory._backend = None
+        teacher = User.objects.create_user("teacher", password="x")
+        self.by_name, self.by_description, self.other = [
+            Course.objects.create(
+                name=name, description=description, price=0, teacher=teacher
+            )
+            for name, description in (
+                ("Python dasar", "Pemrograman"),
+                ("Analisis data", "Memakai python"),
+                ("Java", "Pemrograman"),
+            )
+        ]
+
+    def tearDown(self):
+        memory._backend = None
+
+    def backends(self):
+        yield memory.get_memory_backend()
+        yield get_database_backend()
+
+    def test_names_rank_above_descriptions(self):
+        for backend in self.backends():
+            with self.subTest(backend=type(backend).__name__):
+                self.assertEqual(
+                    backend.search_courses("python", 10),
+                    (2, [self.by_name.id, self.by_description.id]),
+                )
+                self.assertEqual(
+                    backend.search_courses(
+                        "python", 10, candidates={self.by_description.id}
+                    ),
+                    (1, [self.by_description.id]),
+                )
+
+    def test_database_index_follows_writes(self):
+        backend = get_database_backend()
+        self.other.name = "Python untuk Java"
+        self.other.save()
+        self.by_name.delete()
+
+        self.assertEqual(
+            backend.match_courses("python"), {self.by_description.id, self.other.id}
+        )
+
+
+class SearchFacetTests(TestCase):
+    def setUp(self):
+        facets._facets = None
+        self.alice = User.objects.create_user("alice", password="x")
+        bob = User.objects.create_user("bob", password="x")
+        self.web, self.data = [
+            Category.objects.create(name=name) for name in ("Web", "Data")
+        ]
+        self.python = Tag.objects.create(name="python")
+        courses = [
+            Course.objects.create(
+                name=name, description="d", price=price, teacher=teacher
+            )
+            for name, price, teacher in (
+                ("HTML", 0, self.alice),
+                ("Django", 150_000, self.alice),
+                ("Statistik", 600_000, bob),
+            )
+        ]
+        for course, category in (
+            (courses[0], self.web),
+            (courses[1], self.web),
+            (courses[1], self.data),
+            (courses[2], self.data),
+        ):
+            CourseCategory.objects.create(course=course, category=category)
+        content = CourseContent.objects.create(name="ORM", course_id=courses[1])
+        ContentTag.objects.create(content=content, tag=self.python)
+
+    def tearDown(self):
+        facets._facets = None
+
+    def test_counts_leave_out_their_own_facet_filter(self):
+        body = self.client.get(
+            f"/api/v1/search/facets?category_ids={self.web.id}"
+        ).json()
+
+        self.assertEqual(body["total"], 2)
+        self.assertEqual(
+            {item["name"]: item["count"] for item in body["categories"]},
+            {"Web": 2, "Data": 2},
+        )
+        self.assertEqual(
+            [(item["id"], item["count"]) for item in body["teachers"]],
+            [(self.alice.id, 2)],
+        )
+        self.assertEqual(
+            [(item["id"], item["count"]) for item in body["tags"]],
+            [(self.python.id, 1)],
+        )
+        self.assertEqual(
+            [bucket["count"] for bucket in body["price_buckets"]], [1, 0, 1, 0, 0]
+        )
+        self.assertEqual(sum(body["has_available_slots"].values()), 2)
+
+    def test_price_filter_narrows_the_other_facets(self):
+        body = self.client.get("/api/v1/search/facets?min_price=100000").json()
+
+        self.assertEqual(body["total"], 2)
+        self.assertEqual(
+            {item["name"]: item["count"] for item in body["categories"]},
+            {"Web": 1, "Data": 2},
+        )
+        self.assertEqual(
+            [bucket["count"] for bucket in body["price_buckets"]], [1, 0, 1, 0, 1]
+        )
+
+
+class SuggestIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = suggest.SuggestIndex.from_rows(
+            [(1, "Belajar Python", 5), (2, "Python Lanjut", 20), (3, "Java", 50)],
+            [(1, (suggest.TAG, 7)), (2, (suggest.TAG, 7))],
+            [(suggest.TAG, 7, "python")],
+        )
+
+    def ranked(self, prefix, limit=10):
+        return [
+            (item["kind"], item["id"], item["weight"])
+            for item in self.index.suggest(prefix, limit)
+        ]
+
+    def test_word_prefixes_rank_by_enrollments(self):
+        self.assertEqual(
+            self.ranked("PY"),
+            [("tag", 7, 25), ("course", 2, 20), ("course", 1, 5)],
+        )
+        self.assertEqual(self.ranked("python l", limit=1), [("course", 2, 20)])
+        self.assertEqual(self.ranked("  "), [])
+
+    def test_renames_and_enrollments_update_in_place(self):
+        self.index.set_label(suggest.COURSE, 3, "Pyramid")
+        self.index.add_enrollments(1, 30)
+
+        self.assertEqual(
+            self.ranked("py"),
+            [("tag", 7, 55), ("course", 3, 50), ("course", 1, 35), ("course", 2, 20)],
+        )
+        self.assertEqual(self.ranked("java"), [])
+
+
+class SearchVisibilityTests(TestCase):
+    def setUp(self):
+        memory._backend = None
+        teacher = User.objects.create_user("teacher", password="x")
+        course = Course.objects.create(
+            name="Kursus", description="d", price=0, teacher=teacher
+        )
+        self.shown = CourseContent.objects.create(
+            name="Python dasar",
+            course_id=course,
+            is_published=True,
+            video_url="https://video/1",
+        )
+        hidden_module = CourseContent.objects.create(
+            name="Modul rahasia", course_id=course, is_published=False
+        )
+        # Published, but under an unpublished module
+        CourseContent.objects.create(
+            name="Python lanjut",
+            course_id=course,
+            parent_id=hidden_module,
+            is_published=True,
+        )
+
+    def tearDown(self):
+        memory._backend = None
+
+    @override_settings(LMS_SEARCH_BACKEND="database")
+    def test_database_backend_follows_content_visibility(self):
+        self.test_hits_follow_content_visibility()
+
+    def test_hits_follow_content_visibility(self):
+        for url in ("/api/v1/search?query=python", "/api/v1/search"):
+            body = self.client.get(url).json()
+
+            self.assertEqual([item["id"] for item in body["contents"]], [self.shown.id])
+            self.assertEqual(body["total_contents"], 1)
+            self.assertNotIn("video_url", body["contents"][0])
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("student", password="x")
+
+    def test_chunks_seek_past_sparse_ids(self):
+        for notification_id in (3, 4, 1000, 50000, 50001):
+            Notification.objects.create(
+                id=notification_id,
+                recipient=self.user,
+                title="t",
+                message="m",
+                notification_type="announcement",
+            )
+        chunks = []
+
+        def move(chunk):
+            chunks.append(list(chunk.order_by("id").values_list("id", flat=True)))
+            return len(chunks[-1])
+
+        moved = move_in_chunks(Notification.objects.all(), move, chunk_size=2)
+
+        self.assertEqual(moved, 5)
+        self.assertEqual(chunks, [[3, 4], [1000, 50000], [50001]])
+
+    def test_restore_since_is_a_local_midnight(self):
+        for archived_id, day in ((1, 1), (2, 3)):
+            ArchivedNotification.objects.create(
+                id=archived_id,
+                recipient_id=self.user.id,
+                title=f"Day {day}",
+                message="m",
+                notification_type="announcement",
+                is_read=True,
+                created_at=timezone.make_aware(datetime(2026, 1, day, 12)),
+            )
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            call_command(
+                "restore_archived",
+                "--user",
+                str(self.user.id),
+                "--since",
+                "2026-01-02",
+                stdout=StringIO(),
+            )
+
+        self.assertEqual(
+            list(Notification.objects.values_list("title", flat=True)), ["Day 3"]
+        )
+        self.assertEqual(
+            list(ArchivedNotification.objects.values_list("id", flat=True)), [1]
+        )
@@ -91,6 +91,65 @@ DATABASES = {
 }
 
 
+# Cache - membership per user, payload kursus, pohon dan set konten terlihat.
+# Dengan LMS_CACHE_REDIS_URL (docker-compose: redis://redis:6379/1) cache
+# dipakai bersama semua worker, jadi invalidasi dari satu worker (atau dari
+# scheduler) langsung berlaku di semua. Tanpa Redis tiap proses punya
+# LocMemCache sendiri; TTL dibuat pendek agar data basi di worker lain cepat
+# kedaluwarsa
+LMS_CACHE_REDIS_URL = os.environ.get("LMS_CACHE_REDIS_URL")
+if LMS_CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": LMS_CACHE_REDIS_URL,
+            "KEY_PREFIX": "simplelms",
+        }
+    }
+    LMS_CACHE_TIMEOUT = 60 * 60
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "simplelms",
+        }
+    }
+    LMS_CACHE_TIMEOUT = 30
+
+# Search - snapshot indeks in-memory untuk startup worker yang cepat
+# (dibuat dengan `python manage.py build_search_index`)
+LMS_SEARCH_SNAPSHOT = os.path.join(BASE_DIR, "search_index.pickle")
+# "memory" (indeks per worker) atau "database" (FULLTEXT MySQL, tsvector
+# PostgreSQL, FTS5 SQLite - mengikuti ENGINE database)
+LMS_SEARCH_BACKEND = "memory"
+# Indeks pencarian, facet, dan suggest per worker hanya diperbarui sinyal
+# dari worker itu sendiri; perubahan dari worker lain terbaca paling lambat
+# setelah sekian detik
+LMS_SEARCH_SYNC_SECONDS = 30
+
+# Moderasi komentar otomatis (dicocokkan per kata, tanpa huruf besar/aksen):
+# BLOCKLIST -> ditahan dan ditandai, HOLDLIST -> ditahan untuk review,
+# ALLOWLIST -> frasa aman yang membatalkan kecocokan di dalamnya
+LMS_COMMENT_BLOCKLIST = ["bangsat", "goblok", "judi online", "slot gacor", "pinjol"]
+LMS_COMMENT_HOLDLIST = ["http://", "https://", "www", "wa.me", "whatsapp", "promo"]
+LMS_COMMENT_ALLOWLIST = []
+
+# Realtime (SSE, jalankan dengan server ASGI: uvicorn simplelms.asgi:application)
+# Tanpa URL Redis, event hanya sampai ke klien di worker yang sama
+LMS_REALTIME_REDIS_URL = os.environ.get("LMS_REALTIME_REDIS_URL")
+
+# Notifikasi komentar/diskusi sejenis dari course yang sama dikumpulkan per
+# penerima selama jendela ini (detik) lalu ditulis sebagai satu ringkasan
+# ("12 new replies in Course X"); 0 = tulis langsung. Event pertama dalam
+# jendela langsung dikirim, sisanya disimpan di tabel PendingDigest dan
+# ditulis oleh `python manage.py run_notification_worker`
+LMS_NOTIFICATION_DIGEST_WINDOW = 300
+
+# Notifikasi yang sudah dibaca dan lebih tua dari ini (hari) dipindahkan ke
+# tabel arsip oleh `python manage.py archive_old_records`
+LMS_NOTIFICATION_RETENTION_DAYS = 90
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,154 @@
+"""Rows and writes saved by coalescing comment/discussion notifications.
+
+Creates a throwaway test database with a few busy courses, then replays
+one simulated hour of reply and comment events (each aimed at a random
+member of the event's course) twice: once writing a Notification per
+event, as the signals would without a digest, and once through the
+digest path on a simulated clock (first event of a key sent at once,
+the rest counted in PendingDigest), flushed every quarter window as
+run_notification_worker would. Reports rows, SQL write statements
+and wall time of both.
+
+Usage: python load_test/bench_digest.py [events] [window_seconds] [members]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.abspath(os.path.join(__file__, os.pardir, os.pardir, "code")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplelms.settings")
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from lms_core.models import Course, Notification, NotificationCounter, PendingDigest
+from lms_core.notifications import DigestThrottle, flush_digests, send_or_queue
+
+COURSES = 5
+HOUR = 3600
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+class WriteCounter:
+    def __init__(self):
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(WRITES):
+            self.writes += 1
+        return execute(sql, params, many, context)
+
+
+def simulated_events(events, courses, users, rng):
+    """(second, recipient, type, course) for one hour, busiest course first"""
+    weights = [1 / (rank + 1) for rank in range(len(courses))]
+    for second in sorted(rng.uniform(0, HOUR) for _ in range(events)):
+        course = rng.choices(courses, weights)[0]
+        yield (
+            second,
+            rng.choice(users[course.id]),
+            rng.choice(("discussion", "discussion", "comment")),
+            course,
+        )
+
+
+def reset():
+    Notification.objects.all().delete()
+    NotificationCounter.objects.all().delete()
+    PendingDigest.objects.all().delete()
+
+
+def measure(label, replay, events):
+    reset()
+    counter = WriteCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        replay()
+    elapsed = time.perf_counter() - started
+    rows = Notification.objects.count()
+    print(
+        f"{label:8} {rows:7,} rows  {counter.writes:7,} write statements  "
+        f"{elapsed:6.2f}s ({events / elapsed:,.0f} events/s)"
+    )
+    return rows, counter.writes
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    window = float(sys.argv[2]) if len(sys.argv) > 2 else 300
+    members = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    rng = random.Random(42)
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        teacher = User.objects.create_user("bench_teacher", password="x")
+        courses = [
+            Course.objects.create(
+                name=f"Course {number}", description="bench", price=0, teacher=teacher
+            )
+            for number in range(COURSES)
+        ]
+        users = {
+            course.id: User.objects.bulk_create(
+                User(username=f"bench_{course.id}_{number}")
+                for number in range(members)
+            )
+            for course in courses
+        }
+        users = {
+            course_id: [user.id for user in group] for course_id, group in users.items()
+        }
+        replay = list(simulated_events(events, courses, users, rng))
+        print(
+            f"{events:,} events in one simulated hour, {COURSES} courses x "
+            f"{members} members, {window:.0f}s window"
+        )
+
+        def naive():
+            for _, recipient_id, notification_type, course in replay:
+                Notification.objects.create(
+                    recipient_id=recipient_id,
+                    notification_type=notification_type,
+                    related_course=course,
+                    title="New reply",
+                    message="bench",
+                )
+
+        def digest():
+            start = timezone.now()
+            clock = [0.0]
+            throttle = DigestThrottle(window, clock=lambda: clock[0])
+            next_flush = window / 4
+            for second, recipient_id, notification_type, course in replay:
+                while second >= next_flush:
+                    flush_digests(window, start + timedelta(seconds=next_flush))
+                    next_flush += window / 4
+                clock[0] = second
+                send_or_queue(
+                    [recipient_id],
+                    notification_type,
+                    course.id,
+                    {"title": "New reply", "message": "bench"},
+                    throttle,
+                    now=start + timedelta(seconds=second),
+                )
+            flush_digests(0, start + timedelta(seconds=HOUR))
+
+        naive_rows, naive_writes = measure("naive", naive, events)
+        digest_rows, digest_writes = measure("digest", digest, events)
+        print(
+            f"digest writes {digest_rows / naive_rows:.1%} of the rows with "
+            f"{digest_writes / naive_writes:.1%} of the write statements"
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Latency of bitmap facet counts.
+
+Builds a FacetIndex from synthetic rows (courses with prices and teachers,
+category and tag links, availability) without touching the database, then
+times ``counts()`` for random SearchFilters combinations.
+
+Usage: python load_test/bench_facets.py [courses] [queries]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(__file__, os.pardir, os.pardir, "code")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplelms.settings")
+import django
+
+django.setup()
+
+from lms_core.schema import SearchFilters
+from lms_core.search.facets import FacetIndex
+
+CATEGORIES = 200
+TAGS = 2_000
+TEACHERS = 5_000
+
+
+def random_filters(rng):
+    filters = {}
+    if rng.random() < 0.5:
+        filters["category_ids"] = rng.sample(range(CATEGORIES), rng.randint(1, 3))
+    if rng.random() < 0.3:
+        filters["tag_ids"] = rng.sample(range(TAGS), rng.randint(1, 3))
+    if rng.random() < 0.4:
+        filters["min_price"] = rng.randrange(0, 300_000, 25_000)
+        filters["max_price"] = filters["min_price"] + rng.randrange(50_000, 500_000)
+    if rng.random() < 0.1:
+        filters["teacher_id"] = rng.randrange(TEACHERS)
+    if rng.random() < 0.3:
+        filters["has_available_slots"] = rng.random() < 0.5
+    return SearchFilters(**filters)
+
+
+def main():
+    courses = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    rng = random.Random(42)
+
+    rows = [
+        (course_id, rng.randrange(0, 1_000_000, 5_000), rng.randrange(TEACHERS))
+        for course_id in range(courses)
+    ]
+    category_links = [
+        (course_id, rng.randrange(CATEGORIES))
+        for course_id in range(courses)
+        for _ in range(rng.randint(1, 3))
+    ]
+    tag_links = [
+        (course_id, int(rng.paretovariate(1.1)) % TAGS)
+        for course_id in range(courses)
+        for _ in range(rng.randint(0, 8))
+    ]
+    available = [course_id for course_id in range(courses) if rng.random() < 0.7]
+    names = {
+        "categories": {i: f"category {i}" for i in range(CATEGORIES)},
+        "tags": {i: f"tag {i}" for i in range(TAGS)},
+        "teachers": {i: f"teacher {i}" for i in range(TEACHERS)},
+    }
+
+    started = time.perf_counter()
+    index = FacetIndex.from_rows(rows, category_links, tag_links, available, names)
+    print(
+        f"Built facet bitmaps for {courses:,} courses in {time.perf_counter() - started:.1f}s"
+    )
+
+    latencies = []
+    for _ in range(queries):
+        filters = random_filters(rng)
+        started = time.perf_counter()
+        index.counts(filters)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"counts()   p50 {statistics.median(latencies):7.2f} ms   "
+        f"p95 {p95:7.2f} ms   max {latencies[-1]:7.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Database load of idle notification clients: long-poll versus polling.
+
+Creates a throwaway test database with one course of N members, then
+drives the ASGI application in-process (no network, no server): every
+member holds /notifications/poll open in a loop for a while with nothing
+to deliver, and the SQL queries run in that time are counted. A course
+announcement is then fanned out and the time until every held request
+returns is measured. The polling side replays /notifications/poll with
+timeout=0 (what a timer-driven client costs per request) and extrapolates
+N clients polling every few seconds.
+
+Run from code/, where the JWT signing key is:
+    cd code && python ../load_test/bench_notification_poll.py [clients] [idle_seconds] [hold_seconds] [poll_interval]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(__file__, os.pardir, os.pardir, "code")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplelms.settings")
+import django
+
+django.setup()
+
+from asgiref.sync import sync_to_async
+from bench_realtime import http_scope, request
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from lms_core.models import Course, CourseMember
+from lms_core.notifications import course_recipients, fan_out
+from lms_core.realtime import get_broker
+from ninja_simple_jwt.jwt.token_operations import get_access_token_for_user
+
+POLL_SAMPLES = 300
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+
+def poll_scope(token, timeout):
+    scope = http_scope("/api/v1/notifications/poll", token)
+    scope["query_string"] = f"timeout={timeout}".encode()
+    return scope
+
+
+async def long_poll(app, token, hold_seconds, stop, returned):
+    """Hold /notifications/poll open again and again until ``stop``"""
+    while True:
+        bodies = []
+        await request(app, poll_scope(token, hold_seconds), on_body=bodies.append)
+        if json.loads(b"".join(bodies)):
+            returned.append(time.perf_counter())
+        if stop.is_set():
+            return
+
+
+async def run(app, course, teacher, tokens, counter, idle_seconds, hold, interval):
+    clients = len(tokens)
+    stop = asyncio.Event()
+    returned = []
+    tasks = [
+        asyncio.create_task(long_poll(app, token, hold, stop, returned))
+        for token in tokens
+    ]
+    while get_broker().subscriber_count() < clients:
+        await asyncio.sleep(0.05)
+
+    counter.queries = 0
+    await asyncio.sleep(idle_seconds)
+    idle_queries = counter.queries
+    print(
+        f"Long-poll {clients:,} clients idle {idle_seconds:.0f}s ({hold:.0f}s hold): "
+        f"{idle_queries:,} queries -> {idle_queries * 60 / idle_seconds:,.0f} queries/minute"
+    )
+
+    stop.set()
+    published = time.perf_counter()
+    await sync_to_async(fan_out)(
+        course_recipients(course.id, "announcement"),
+        sender_id=teacher.id,
+        title="Pengumuman",
+        message="bench",
+        related_course_id=course.id,
+    )
+    await asyncio.gather(*tasks)
+    latencies = sorted(at - published for at in returned)
+    print(
+        f"Long-poll one announcement delivered to {len(returned):,} clients: "
+        f"p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, "
+        f"last {latencies[-1] * 1000:.0f} ms"
+    )
+
+    counter.queries = 0
+    for _ in range(POLL_SAMPLES):
+        await request(app, poll_scope(tokens[0], 0))
+    per_poll = counter.queries / POLL_SAMPLES
+    polls_per_minute = clients * 60 / interval
+    print(
+        f"Polling   {per_poll:.1f} queries per request; {clients:,} clients every "
+        f"{interval:.0f}s = {polls_per_minute:,.0f} requests/minute "
+        f"-> {per_poll * polls_per_minute:,.0f} queries/minute"
+    )
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    idle_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+    hold = float(sys.argv[3]) if len(sys.argv) > 3 else 25
+    interval = float(sys.argv[4]) if len(sys.argv) > 4 else 5
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    counter = QueryCounter()
+    connection_created.connect(counter.install)
+    connection.execute_wrappers.append(counter)
+    try:
+        teacher = User.objects.create_user("bench_teacher", password="x")
+        course = Course.objects.create(
+            name="Notifications", description="bench", price=0, teacher=teacher
+        )
+        users = User.objects.bulk_create(
+            User(username=f"bench_{number}") for number in range(clients)
+        )
+        CourseMember.objects.bulk_create(
+            CourseMember(course_id=course, user_id=user) for user in users
+        )
+        tokens = [get_access_token_for_user(user)[0] for user in users]
+        asyncio.run(
+            run(
+                get_asgi_application(),
+                course,
+                teacher,
+                tokens,
+                counter,
+                idle_seconds,
+                hold,
+                interval,
+            )
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Idle cost of SSE subscribers versus polling clients.
+
+Creates a throwaway test database with one course and forum, then drives
+the ASGI application in-process (no network, no server): opens N
+subscribers on /courses/{id}/events, measures the memory they hold and
+the CPU the worker burns while they sit idle, publishes a reply and times
+its fan-out to every subscriber. The polling side replays
+/courses/{id}/threads requests through the same application and
+extrapolates the CPU of N clients polling every few seconds.
+
+Run from code/, where the JWT signing key is:
+    cd code && python ../load_test/bench_realtime.py [subscribers] [idle_seconds] [poll_interval]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(__file__, os.pardir, os.pardir, "code")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplelms.settings")
+import django
+
+django.setup()
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.db import connection
+from lms_core.models import Course, CourseMember, DiscussionReply, DiscussionThread
+from lms_core.realtime import get_broker
+from ninja_simple_jwt.jwt.token_operations import get_access_token_for_user
+
+POLL_SAMPLES = 300
+
+
+def http_scope(path, token):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+async def request(app, scope, disconnect=None, on_body=None):
+    """Run one ASGI request; ``disconnect`` is an Event ending a stream"""
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await (disconnect.wait() if disconnect else asyncio.Future())
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if on_body and message.get("body"):
+            on_body(message["body"])
+
+    await app(scope, receive, send)
+
+
+async def run(app, course, thread, token, subscribers, idle_seconds, poll_interval):
+    broker = get_broker()
+    disconnect = asyncio.Event()
+    received = []
+    first = {}
+
+    def collector(index):
+        def on_body(body):
+            if b"event: reply" in body:
+                received.append(time.perf_counter())
+                first.setdefault(index, True)
+
+        return on_body
+
+    scope = http_scope(f"/api/v1/courses/{course.id}/events", token)
+    tracemalloc.start()
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(request(app, scope, disconnect, collector(index)))
+        for index in range(subscribers)
+    ]
+    while broker.subscriber_count() < subscribers:
+        await asyncio.sleep(0.05)
+    connect_seconds = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"SSE      {subscribers:,} subscribers connected in {connect_seconds:.1f}s, "
+        f"{memory / subscribers / 1024:.1f} KiB each"
+    )
+
+    cpu = time.process_time()
+    await asyncio.sleep(idle_seconds)
+    idle_cpu = time.process_time() - cpu
+    print(
+        f"SSE      idle {idle_seconds:.0f}s: {idle_cpu * 1000:.0f} ms CPU "
+        f"-> {idle_cpu * 60 / idle_seconds * 1000:,.0f} ms CPU/minute"
+    )
+
+    published = time.perf_counter()
+    await sync_to_async(DiscussionReply.objects.create)(
+        thread=thread, author_id=course.teacher_id, content="pengumuman"
+    )
+    while len(received) < subscribers:
+        await asyncio.sleep(0.01)
+    latencies = sorted(at - published for at in received)
+    print(
+        f"SSE      one reply fanned out to {len(first):,} subscribers: "
+        f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+        f"last {latencies[-1] * 1000:.1f} ms"
+    )
+
+    disconnect.set()
+    await asyncio.gather(*tasks)
+
+    poll_scope = http_scope(f"/api/v1/courses/{course.id}/threads", token)
+    cpu = time.process_time()
+    for _ in range(POLL_SAMPLES):
+        await request(app, poll_scope)
+    per_poll = (time.process_time() - cpu) / POLL_SAMPLES
+    polls_per_minute = subscribers * 60 / poll_interval
+    print(
+        f"Polling  {per_poll * 1000:.2f} ms CPU per request; {subscribers:,} clients "
+        f"every {poll_interval:.0f}s = {polls_per_minute:,.0f} requests/minute "
+        f"-> {per_poll * polls_per_minute * 1000:,.0f} ms CPU/minute"
+    )
+
+
+def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    idle_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    poll_interval = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        teacher = User.objects.create_user("bench_teacher", password="x")
+        student = User.objects.create_user("bench_student", password="x")
+        course = Course.objects.create(
+            name="Realtime", description="bench", price=0, teacher=teacher
+        )
+        CourseMember.objects.create(course_id=course, user_id=student)
+        for number in range(20):
+            thread = DiscussionThread.objects.create(
+                course=course, author=student, title=f"Thread {number}", description="x"
+            )
+        token = get_access_token_for_user(student)[0]
+        asyncio.run(
+            run(
+                get_asgi_application(),
+                course,
+                thread,
+                token,
+                subscribers,
+                idle_seconds,
+                poll_interval,
+            )
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Query latency of the in-memory BM25 search index.
+
+Indexes synthetic course/content documents (Indonesian and English topic
+words mixed with a 50k-word long tail, Zipf-like term frequencies) directly
+into InvertedIndex, then reports build time, snapshot dump/load time and
+query latency percentiles.
+
+Usage: python load_test/bench_search.py [documents] [queries]
+"""
+
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(__file__, os.pardir, os.pardir, "code")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplelms.settings")
+import django
+
+django.setup()
+
+from lms_core.search.inverted_index import InvertedIndex
+
+VOCABULARY = (
+    "belajar pemrograman python django web desain grafis data analisis "
+    "statistik jaringan komputer keamanan sistem operasi basis mobile android "
+    "ios kotlin swift javascript react frontend backend api rest cloud devops "
+    "docker kubernetes linux machine learning deep neural network visualisasi "
+    "bisnis pemasaran digital akuntansi keuangan manajemen proyek agile scrum "
+    "fotografi video editing musik bahasa inggris matematika fisika kimia "
+    "biologi sejarah ekonomi pengantar lanjutan dasar menengah mahir praktis "
+    "introduction advanced beginner practical guide complete course bootcamp"
+).split()
+
+QUERIES = [
+    "python",
+    "belajar pemrograman python",
+    "machine learning",
+    "desain grafis dasar",
+    "kubernetes docker devops",
+    "pengantar akuntansi keuangan",
+    "advanced react frontend",
+    "statistik",
+]
+
+
+def long_tail(rng, size=50_000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(5, 10))) for _ in range(size)]
+
+
+def random_text(rng, tail, words):
+    """Half topic words, half long-tail words, both Zipf-distributed"""
+    picked = []
+    for _ in range(words):
+        vocabulary = VOCABULARY if rng.random() < 0.5 else tail
+        rank = min(int(rng.paretovariate(1.1)), len(vocabulary)) - 1
+        picked.append(vocabulary[rank])
+    return " ".join(picked)
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(42)
+    tail = long_tail(rng)
+    index = InvertedIndex()
+
+    started = time.perf_counter()
+    for doc_id in range(documents):
+        index.add(
+            doc_id,
+            {
+                "name": (random_text(rng, tail, 4), 3),
+                "tags": (random_text(rng, tail, 2), 2),
+                "description": (random_text(rng, tail, 12), 1),
+            },
+        )
+    build_s = time.perf_counter() - started
+    print(f"Indexed {documents:,} documents in {build_s:.1f}s")
+    print(f"Terms: {len(index.postings):,}")
+
+    snapshot = io.BytesIO()
+    started = time.perf_counter()
+    index.dump(snapshot)
+    dump_s = time.perf_counter() - started
+    snapshot.seek(0)
+    started = time.perf_counter()
+    InvertedIndex.load(snapshot)
+    load_s = time.perf_counter() - started
+    size_mb = snapshot.getbuffer().nbytes / 1024 / 1024
+    print(f"Snapshot: {size_mb:.0f} MB, dump {dump_s:.1f}s, load {load_s:.1f}s")
+
+    candidates = set(rng.sample(range(documents), max(1, documents // 100)))
+    for label, kwargs in (("all docs", {}), ("1% filter", {"candidates": candidates})):
+        latencies = []
+        for i in range(queries):
+            query = QUERIES[i % len(QUERIES)]
+            started = time.perf_counter()
+            index.search(query, limit=20, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(
+            f"{label:<10} p50 {statistics.median(latencies):7.2f} ms   "
+            f"p95 {p95:7.2f} ms   max {latencies[-1]:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
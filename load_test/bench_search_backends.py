@@ -0,0 +1,152 @@
+"""Relevance checks and query latency for every search backend.
+
+Creates a throwaway test database on the configured engine (MySQL,
+PostgreSQL or SQLite), fills it with synthetic courses and contents plus a
+few relevance fixtures, then runs the same checks and queries against the
+in-memory index and the database full-text backend.
+
+Usage: python load_test/bench_search_backends.py [contents] [queries]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(__file__, os.pardir, os.pardir, "code")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplelms.settings")
+import django
+
+django.setup()
+
+from bench_search import QUERIES, long_tail, random_text
+from django.contrib.auth.models import User
+from django.db import connection
+from lms_core.models import Course, CourseContent
+from lms_core.search.database import get_database_backend
+from lms_core.search.memory import MemorySearchBackend
+
+BATCH_SIZE = 2_000
+
+
+def populate(contents, rng):
+    tail = long_tail(rng)
+    teacher = User.objects.create_user("bench_teacher", password="x")
+    courses = Course.objects.bulk_create(
+        Course(
+            name=random_text(rng, tail, 4),
+            description=random_text(rng, tail, 12),
+            price=rng.randrange(0, 500_000, 10_000),
+            teacher=teacher,
+        )
+        for _ in range(max(1, contents // 10))
+    )
+    CourseContent.objects.bulk_create(
+        (
+            CourseContent(
+                name=random_text(rng, tail, 4),
+                description=random_text(rng, tail, 12),
+                course_id=rng.choice(courses),
+                is_published=rng.random() < 0.9,
+            )
+            for _ in range(contents)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return teacher, courses
+
+
+def relevance_fixtures(teacher, course):
+    """Create fixture rows; return [(label, check(backend) -> bool)]"""
+    in_name = Course.objects.create(
+        name="Quokkamatika Dasar", description="pengantar", price=0, teacher=teacher
+    )
+    in_description = Course.objects.create(
+        name="Pengantar", description="membahas quokkamatika", price=0, teacher=teacher
+    )
+    both = CourseContent.objects.create(
+        name="Wombatistika dan Quokkamatika", course_id=course, is_published=True
+    )
+    one = CourseContent.objects.create(
+        name="Wombatistika", course_id=course, is_published=True
+    )
+    hidden = CourseContent.objects.create(
+        name="Wombatistika rahasia", course_id=course, is_published=False
+    )
+
+    def name_first(backend):
+        _, ids = backend.search_courses("quokkamatika", 2)
+        return ids == [in_name.id, in_description.id]
+
+    def all_terms_first(backend):
+        _, ids = backend.search_contents("wombatistika quokkamatika", 5)
+        return ids[:1] == [both.id] and one.id in ids
+
+    def unpublished_hidden(backend):
+        _, ids = backend.search_contents("wombatistika", 10)
+        return hidden.id not in ids
+
+    def candidates_respected(backend):
+        total, ids = backend.search_courses("quokkamatika", 5, {in_description.id})
+        return total == 1 and ids == [in_description.id]
+
+    return [
+        ("name outranks description", name_first),
+        ("all terms outrank one", all_terms_first),
+        ("unpublished contents hidden", unpublished_hidden),
+        ("candidate filter respected", candidates_respected),
+    ]
+
+
+def latency(backend, queries, candidates=None):
+    latencies = []
+    for i in range(queries):
+        started = time.perf_counter()
+        backend.search_contents(QUERIES[i % len(QUERIES)], 20, candidates)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    return statistics.median(latencies), p95
+
+
+def main():
+    contents = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(42)
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.perf_counter()
+        teacher, courses = populate(contents, rng)
+        print(f"Loaded {contents:,} contents in {time.perf_counter() - started:.1f}s")
+        checks = relevance_fixtures(teacher, courses[0])
+
+        started = time.perf_counter()
+        memory = MemorySearchBackend()
+        memory.build()
+        print(f"Built memory index in {time.perf_counter() - started:.1f}s\n")
+
+        content_ids = list(CourseContent.objects.values_list("id", flat=True))
+        filtered = set(rng.sample(content_ids, max(1, len(content_ids) // 100)))
+        backends = [("memory", memory)]
+        database = get_database_backend()
+        if database is not None:
+            backends.append((f"database ({database.vendor})", database))
+
+        for label, backend in backends:
+            print(label)
+            for check_label, check in checks:
+                print(f"  {'PASS' if check(backend) else 'FAIL'}  {check_label}")
+            for filter_label, candidates in (
+                ("all docs", None),
+                ("1% filter", filtered),
+            ):
+                p50, p95 = latency(backend, queries, candidates)
+                print(f"  {filter_label:<10} p50 {p50:7.2f} ms   p95 {p95:7.2f} ms")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
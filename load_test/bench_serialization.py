@@ -0,0 +1,107 @@
+"""Compare JSON, MessagePack and CBOR for a large content listing.
+
+Builds a payload shaped like ``GET /courses/{id}/contents`` (CourseContentFull
+items, 3000 per course as in the sample data) and measures encoded size plus
+encode/decode time with the same encoders the API renderer uses.
+
+Usage: python load_test/bench_serialization.py [items] [rounds]
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(__file__, os.pardir, os.pardir, "code")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplelms.settings")
+import django
+
+django.setup()
+
+import cbor2
+import msgpack
+from lms_core.renderers import encode_cbor, encode_msgpack
+from ninja.responses import NinjaJSONEncoder
+
+
+def build_payload(items):
+    now = datetime.now(timezone.utc)
+    course = {
+        "id": 1,
+        "name": "Belajar Django",
+        "description": "Belajar Django dengan Mudah",
+        "price": 1000000,
+        "image": None,
+        "teacher": {
+            "id": 1,
+            "email": "admin@example.com",
+            "first_name": "Admin",
+            "last_name": "LMS",
+        },
+        "max_students": 100,
+        "created_at": now,
+        "updated_at": now,
+    }
+    return [
+        {
+            "id": i,
+            "name": f"Konten {i}",
+            "description": "Deskripsi konten pembelajaran nomor %d" % i,
+            "video_url": f"https://videos.example.com/{i}.mp4",
+            "file_attachment": None,
+            "course_id": course,
+            "release_time": now + timedelta(days=i % 30),
+            "is_published": i % 3 != 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(items)
+    ]
+
+
+def measure(name, encode, decode, payload, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        body = encode(payload)
+    encode_ms = (time.perf_counter() - start) / rounds * 1000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode(body)
+    decode_ms = (time.perf_counter() - start) / rounds * 1000
+
+    print(f"{name:<10} {len(body):>12,} {encode_ms:>12.2f} {decode_ms:>12.2f}")
+    return len(body)
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    payload = build_payload(items)
+
+    print(f"Payload: {items} contents, {rounds} rounds")
+    print(f"{'format':<10} {'bytes':>12} {'encode ms':>12} {'decode ms':>12}")
+    json_size = measure(
+        "json",
+        lambda data: json.dumps(data, cls=NinjaJSONEncoder).encode(),
+        json.loads,
+        payload,
+        rounds,
+    )
+    msgpack_size = measure(
+        "msgpack",
+        encode_msgpack,
+        lambda body: msgpack.unpackb(body, timestamp=3),
+        payload,
+        rounds,
+    )
+    cbor_size = measure("cbor", encode_cbor, cbor2.loads, payload, rounds)
+
+    print()
+    print(f"msgpack size vs json: {msgpack_size / json_size:.1%}")
+    print(f"cbor size vs json:    {cbor_size / json_size:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Latency of prefix autocomplete.
+
+Builds a SuggestIndex from synthetic course, category and tag names
+(without touching the database), then times ``suggest()`` for prefixes of
+one to six letters taken from real words in the index.
+
+Usage: python load_test/bench_suggest.py [courses] [queries]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(__file__, os.pardir, os.pardir, "code")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "simplelms.settings")
+import django
+
+django.setup()
+
+from bench_search import VOCABULARY, long_tail, random_text
+from lms_core.search.suggest import CATEGORY, TAG, SuggestIndex
+
+CATEGORIES = 200
+TAGS = 5_000
+
+
+def main():
+    courses = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rng = random.Random(42)
+    tail = long_tail(rng)
+
+    rows = [
+        (course_id, random_text(rng, tail, 4), int(rng.paretovariate(1.2)) - 1)
+        for course_id in range(courses)
+    ]
+    links = [
+        (course_id, (CATEGORY, rng.randrange(CATEGORIES)))
+        for course_id in range(courses)
+    ] + [(course_id, (TAG, rng.randrange(TAGS))) for course_id in range(courses)]
+    labels = [(CATEGORY, pk, random_text(rng, tail, 2)) for pk in range(CATEGORIES)]
+    labels += [(TAG, pk, random_text(rng, tail, 1)) for pk in range(TAGS)]
+
+    started = time.perf_counter()
+    index = SuggestIndex.from_rows(rows, links, labels)
+    print(
+        f"Indexed {len(index.keys):,} keys for {courses:,} courses"
+        f" in {time.perf_counter() - started:.1f}s"
+    )
+
+    words = VOCABULARY + tail[:1_000]
+    for length in (1, 2, 3, 6):
+        latencies = []
+        for _ in range(queries):
+            prefix = rng.choice(words)[:length]
+            started = time.perf_counter()
+            index.suggest(prefix, 10)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(
+            f"{length} letter(s)  p50 {statistics.median(latencies):6.3f} ms   "
+            f"p95 {p95:6.3f} ms   max {latencies[-1]:6.3f} ms"
+        )
+
+    started = time.perf_counter()
+    for course_id in range(1_000):
+        index.add_enrollments(course_id, 1)
+        index.set_label("course", course_id, f"renamed course {course_id}")
+    print(f"1,000 renames + enrollments in {(time.perf_counter() - started):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
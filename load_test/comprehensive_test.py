@@ -101,7 +101,8 @@ class LMSTestSuite(TaskSet):
         """Test 7: Course Listing Test"""
         response = self.client.get("/api/courses")
         if response.status_code == 200:
-            courses = response.json()
+            # One keyset page: {"courses": [...], "next_cursor": ...}
+            courses = response.json()["courses"]
             if courses:
                 self.course_id = courses[0].get("id")
                 print(f"✅ Course Listing Test PASSED - Found {len(courses)} courses")
@@ -318,7 +319,7 @@ class LMSTestSuite(TaskSet):
 
         response = self.client.get("/api/courses", params=search_params)
         if response.status_code == 200:
-            results = response.json()
+            results = response.json()["courses"]
             print(f"✅ Search & Filter Test PASSED - Found {len(results)} results")
         else:
             print(f"❌ Search & Filter Test FAILED - Status: {response.status_code}")
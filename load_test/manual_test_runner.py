@@ -175,7 +175,8 @@ class LMSManualTester:
         try:
             response = self.session.get(f"{self.api_base}/courses")
             if response.status_code == 200:
-                courses = response.json()
+                # One keyset page: {"courses": [...], "next_cursor": ...}
+                courses = response.json()["courses"]
                 self.course_id = courses[0].get("id") if courses else None
                 print(f"✅ Course Listing PASSED - Found {len(courses)} courses")
             else:
@@ -423,7 +424,7 @@ class LMSManualTester:
         try:
             response = self.session.get(f"{self.api_base}/courses", params=params)
             if response.status_code == 200:
-                results = response.json()
+                results = response.json()["courses"]
                 print(f"✅ Search & Filter PASSED - Found {len(results)} results")
             else:
                 print(f"❌ Search & Filter FAILED - Status: {response.status_code}")